@@ -0,0 +1,193 @@
+from typing import Optional
+
+import numpy as np
+
+from Encoding import TripleEncoding
+from models import Config
+
+TEACHER_CLASH_PENALTY = 10
+CLASSROOM_CLASH_PENALTY = 10
+GAP_PENALTY = 5
+
+# Curriculum penalties, only scored when the evaluator is built from a ProblemModel
+HOURS_PENALTY = 10  # Per missing or extra weekly hour of a (group, subject)
+ELIGIBILITY_PENALTY = 10  # Teacher does not teach the subject to the group, or not on that day
+EQUIPMENT_PENALTY = 10  # Room lacks the equipment the subject requires
+DAY_TIME_PENALTY = 5  # Subject placed on a day or hour it is not allowed on
+
+EMPTY = -1  # Gene value of a free slot (problem mode only)
+
+
+def gaps_from_counts(counts: np.ndarray) -> np.ndarray:
+    """
+    Gaps of buckets given per-hour occupancy counts (last axis = hours):
+    every repeated hour and every jump over a free hour is one gap.
+    """
+    present = counts > 0
+    n_present = present.sum(axis=-1)
+    duplicates = (counts - present).sum(axis=-1)
+    adjacent = (present[..., 1:] & present[..., :-1]).sum(axis=-1)
+    return duplicates + np.maximum(n_present - 1, 0) - adjacent
+
+
+class BatchEvaluator:
+    """
+    Scores a whole population in one call.
+
+    The population is an integer array of shape (pop, n_groups, n_days, n_hours)
+    (or already flattened to (pop, genes)) whose elements are encoding indices.
+    The result is a vector of penalties, one per individual, identical to what
+    GeneticAlgorithm.evaluate_schedule returns for the flattened individual.
+
+    Without a problem the legacy scoring rules are used: gene positions map to
+    (day, hour) as idx % n_days, idx % n_hours and gaps are counted per day over
+    all groups. With a ProblemModel the genome is a real (group, day, hour)
+    grid, EMPTY genes are free slots, gaps are counted per group-day and the
+    curriculum (weekly hours, teacher eligibility, equipment, day/time
+    restrictions) is scored as well.
+    """
+
+    def __init__(self, config: Config, encoding: TripleEncoding, chunk_size: int = 1024, problem=None):
+        self.config = config
+        self.chunk_size = chunk_size
+        self.problem = problem
+
+        # Lookup arrays: encoding index --> teacher / subject / classroom
+        self.teacher_of = encoding.teacher
+        self.subject_of = encoding.subject
+        self.classroom_of = encoding.classroom
+
+        n_genes = config.n_groups * config.n_days * config.n_hours
+        genes = np.arange(n_genes)
+        self.n_slots = config.n_days * config.n_hours
+
+        if problem is None:
+            # Each gene position is mapped to the (day, hour) slot used by the
+            # scoring rules, exactly as evaluate_schedule derives it from the
+            # position in the flat individual.
+            self.gene_group = genes // self.n_slots
+            self.gene_day = genes % config.n_days
+            self.gene_hour = genes % config.n_hours
+
+            # Gaps are counted per bucket of hours (one bucket per day)
+            self.n_buckets = config.n_days
+            self.gene_bucket = self.gene_day
+        else:
+            # Position = (group, day, hour) in C order of the agent matrix
+            self.gene_group = genes // self.n_slots
+            self.gene_day = (genes // config.n_hours) % config.n_days
+            self.gene_hour = genes % config.n_hours
+
+            # One bucket per (group, day)
+            self.n_buckets = config.n_groups * config.n_days
+            self.gene_bucket = self.gene_group * config.n_days + self.gene_day
+
+            self.required_hours = problem.required_hours.astype(np.int64).ravel()
+
+        self.gene_slot = self.gene_day * config.n_hours + self.gene_hour
+        self.gene_bucket_hour = self.gene_bucket * config.n_hours + self.gene_hour
+
+    @property
+    def n_genes(self) -> int:
+        return self.gene_slot.shape[0]
+
+    def __call__(self, population: np.ndarray) -> np.ndarray:
+        return self.evaluate(population)
+
+    def evaluate(self, population: np.ndarray) -> np.ndarray:
+        population = np.asarray(population).reshape(-1, self.n_genes)
+        penalties = np.empty(population.shape[0], dtype=np.float64)
+
+        for start in range(0, population.shape[0], self.chunk_size):
+            chunk = population[start:start + self.chunk_size]
+            penalties[start:start + chunk.shape[0]] = self._evaluate_chunk(chunk)
+
+        return penalties
+
+    def _evaluate_chunk(self, genomes: np.ndarray) -> np.ndarray:
+        if self.problem is None:
+            teachers = self.teacher_of[genomes]
+            classrooms = self.classroom_of[genomes]
+
+            penalty = TEACHER_CLASH_PENALTY * self._count_clashes(teachers)
+            penalty += CLASSROOM_CLASH_PENALTY * self._count_clashes(classrooms)
+            penalty += GAP_PENALTY * self._count_gaps(genomes)
+            return penalty
+
+        occupied = genomes >= 0
+        values = np.where(occupied, genomes, 0)
+        teachers = self.teacher_of[values]
+        classrooms = self.classroom_of[values]
+
+        penalty = TEACHER_CLASH_PENALTY * self._count_clashes(teachers, occupied)
+        penalty += CLASSROOM_CLASH_PENALTY * self._count_clashes(classrooms, occupied)
+        penalty += GAP_PENALTY * self._count_gaps(genomes, occupied)
+        penalty += HOURS_PENALTY * self._count_hour_deviation(values, occupied)
+        penalty += (self.gene_penalty(self._positions(genomes), values) * occupied).sum(axis=1)
+
+        return penalty
+
+    def _positions(self, genomes: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(np.arange(self.n_genes), genomes.shape)
+
+    def gene_penalty(self, positions: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Static penalty of placing encoding indices `values` at gene `positions`
+        (problem mode only): it depends on nothing but the gene itself.
+        """
+        problem = self.problem
+        groups = self.gene_group[positions]
+        days = self.gene_day[positions]
+        hours = self.gene_hour[positions]
+        teachers = self.teacher_of[values]
+        subjects = self.subject_of[values]
+        classrooms = self.classroom_of[values]
+
+        teacher_ok = problem.eligible[teachers, groups, subjects] & problem.teacher_days[teachers, days]
+        time_ok = problem.day_allowed[groups, subjects, days] & problem.time_allowed[groups, subjects, hours]
+
+        return (ELIGIBILITY_PENALTY * ~teacher_ok
+                + EQUIPMENT_PENALTY * ~problem.room_ok[groups, subjects, classrooms]
+                + DAY_TIME_PENALTY * ~time_ok)
+
+    def _count_clashes(self, resources: np.ndarray, occupied: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Number of genes that reuse a (resource, slot) pair already taken by an
+        earlier gene of the same individual: after sorting the keys of a row,
+        every zero in np.diff is one extra booking. Free slots get distinct
+        negative keys so they never clash.
+        """
+        keys = resources.astype(np.int64) * self.n_slots + self.gene_slot
+        if occupied is not None:
+            keys = np.where(occupied, keys, -1 - np.arange(self.n_genes))
+        keys.sort(axis=1)
+        return np.count_nonzero(np.diff(keys, axis=1) == 0, axis=1)
+
+    def _count_gaps(self, genomes: np.ndarray, occupied: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Reproduces the sorted-hours walk of evaluate_schedule from hour counts:
+        within a bucket every repeated hour and every jump over a free hour
+        is one gap.
+        """
+        n_individuals = genomes.shape[0]
+        n_hours = self.config.n_hours
+        per_row = self.n_buckets * n_hours
+
+        keys = np.arange(n_individuals)[:, None] * per_row + self.gene_bucket_hour
+        weights = None if occupied is None else occupied.ravel()
+        counts = np.bincount(keys.ravel(), weights=weights, minlength=n_individuals * per_row)
+        counts = counts.astype(np.int64).reshape(n_individuals, self.n_buckets, n_hours)
+
+        return gaps_from_counts(counts).sum(axis=1)
+
+    def _count_hour_deviation(self, values: np.ndarray, occupied: np.ndarray) -> np.ndarray:
+        """Sum over (group, subject) of |placed hours - required weekly hours|."""
+        n_individuals = values.shape[0]
+        per_row = self.required_hours.shape[0]
+
+        keys = (np.arange(n_individuals)[:, None] * per_row
+                + self.gene_group * self.config.n_subjects + self.subject_of[values])
+        counts = np.bincount(keys.ravel(), weights=occupied.ravel(), minlength=n_individuals * per_row)
+        counts = counts.astype(np.int64).reshape(n_individuals, per_row)
+
+        return np.abs(counts - self.required_hours).sum(axis=1)
@@ -0,0 +1,236 @@
+import argparse
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ExcelParser import ExcelParser
+from GeneticAlgorithm import GeneticAlgorithm
+from InstanceGenerator import InstanceSpec, generate_instance, write_workbook
+from Metrics import Metrics, peak_rss_mb
+from Schedule import Schedule
+from ScheduleExporter import ScheduleExporter
+from ScheduleLog import NullSink
+from ScheduleTable import ScheduleTable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (10, 50, 200, 1000)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the prints of the parser and exporter."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def reseed(seed: int) -> None:
+    """Seeds `random` and `numpy.random`, so a stage reruns identically for the same spec."""
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def schedule_penalty(schedule: Schedule, algo: GeneticAlgorithm) -> float:
+    """Scores a Schedule with the GA's problem-mode fitness."""
+    genomes = ScheduleTable.from_schedule(schedule).to_genomes(algo.encoding, schedule.problem)
+    return float(algo.evaluator.evaluate(genomes)[0])
+
+
+def run_case(spec: InstanceSpec, population_size: int, num_generations: int,
+             modes=("constructive",), workdir: Optional[str] = None) -> List[Dict]:
+    """Runs every stage on one instance and returns one result record per stage."""
+    logging.getLogger("GeneticAlgorithm").setLevel(logging.WARNING)
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="schedule-bench-"))
+    results = []
+
+    def record(stage, wall_time, **metrics):
+        entry = {"n_groups": spec.n_groups, "stage": stage,
+                 "wall_time_s": wall_time, "peak_rss_mb": peak_rss_mb(),
+                 "evaluations": None, "evals_per_s": None, "penalty": None, "unplaced_hours": None}
+        entry.update(metrics)
+        entry["spec"] = asdict(spec)
+        results.append(entry)
+        logger.info(f"{spec.n_groups} groups, {stage}: {entry['wall_time_s']:.3f} s")
+
+    started = time.perf_counter()
+    data = generate_instance(spec)
+    record("generate", time.perf_counter() - started)
+
+    workbook = workdir / f"instance_{spec.n_groups}_{spec.seed}.xlsx"
+    started = time.perf_counter()
+    write_workbook(data, workbook)
+    record("write_workbook", time.perf_counter() - started, file_size=workbook.stat().st_size)
+
+    started = time.perf_counter()
+    with quiet():
+        parser = ExcelParser(workbook)
+        parser.setup()
+    record("parse", time.perf_counter() - started)
+    data = parser.data
+
+    schedule = Schedule(data)
+    metrics = Metrics()
+    algo = GeneticAlgorithm(problem=schedule.problem, population_size=population_size,
+                            num_generations=num_generations, metrics=metrics)
+
+    best_schedule = None
+    for mode in modes:
+        schedule = Schedule(data, NullSink())
+        reseed(spec.seed)
+        started = time.perf_counter()
+        schedule.generate_initial_schedule(mode)
+        elapsed = time.perf_counter() - started
+        record(f"schedule_{mode}", elapsed,
+               penalty=schedule_penalty(schedule, algo),
+               unplaced_hours=sum(map(len, schedule.unplaced_subjects.values())),
+               rejections=metrics.observe_schedule(schedule, mode, elapsed)["rejections"])
+        best_schedule = best_schedule or schedule
+
+    reseed(spec.seed)
+    started = time.perf_counter()
+    try:
+        population = algo.toolbox.population(n=population_size)
+        algo.evaluate_population(population)
+        for _ in range(num_generations):
+            population = algo.generation_evolutionary_loop(population)
+    finally:
+        algo.close()
+    elapsed = time.perf_counter() - started
+    record("ga", elapsed, evaluations=algo.evaluations, evals_per_s=algo.evaluations / elapsed,
+           penalty=min(ind.fitness.values[0] for ind in population), phases=dict(metrics.phase_seconds))
+
+    if best_schedule is not None:
+        started = time.perf_counter()
+        with quiet():
+            ScheduleExporter(best_schedule, str(workdir / f"schedule_{spec.n_groups}.xlsx")).export_streaming()
+        record("export", time.perf_counter() - started)
+
+    return results
+
+
+def merge_repeats(runs: List[List[Dict]]) -> List[Dict]:
+    """
+    Merges the records of repeated run_case calls stage by stage: wall_time_s
+    becomes the median and the single times are kept in wall_time_samples.
+    Everything else is seeded and taken from the first run, except peak RSS
+    (the maximum) and evals_per_s (recomputed from the median).
+    """
+    merged = []
+    for records in zip(*runs):
+        entry = dict(records[0])
+        samples = [record["wall_time_s"] for record in records]
+        entry["wall_time_s"] = float(np.median(samples))
+        entry["wall_time_samples"] = samples
+        rss = [record["peak_rss_mb"] for record in records if record["peak_rss_mb"] is not None]
+        entry["peak_rss_mb"] = max(rss) if rss else None
+        if entry["evaluations"] is not None:
+            entry["evals_per_s"] = entry["evaluations"] / entry["wall_time_s"]
+        merged.append(entry)
+    return merged
+
+
+def run_sweep(sizes=DEFAULT_SIZES, density=0.8, tightness=0.5, seed=0, population_size=50,
+              num_generations=5, modes=("constructive",), isolate=True, repeats=5) -> Dict:
+    """
+    Runs run_case `repeats` times for every size and merges the repeats with
+    merge_repeats. With isolate=True every run is in a fresh spawned process,
+    so peak RSS is measured per size.
+    """
+    results = []
+    for size in sizes:
+        spec = InstanceSpec(n_groups=size, density=density, tightness=tightness, seed=seed)
+        args = (spec, population_size, num_generations, tuple(modes))
+        runs = []
+        for _ in range(repeats):
+            if isolate:
+                with multiprocessing.get_context("spawn").Pool(1) as pool:
+                    runs.append(pool.apply(run_case, args))
+            else:
+                runs.append(run_case(*args))
+        results.extend(merge_repeats(runs))
+
+    return {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__,
+                 "machine": platform.machine(), "cpu_count": os.cpu_count(),
+                 "population_size": population_size, "num_generations": num_generations,
+                 "repeats": repeats},
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float = 0.3, min_time: float = 0.05) -> List[Dict]:
+    """
+    Matches results by (n_groups, stage) and returns the ones whose wall time
+    grew by more than `tolerance` or whose penalty got worse. Stages faster
+    than `min_time` seconds in both runs are timing noise and only have
+    their penalty compared. With repeated runs on both sides the median has
+    to grow and every current sample has to be slower than every baseline
+    sample, so run-to-run jitter of the same code does not count.
+    """
+    previous = {(entry["n_groups"], entry["stage"]): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in current["results"]:
+        old = previous.get((entry["n_groups"], entry["stage"]))
+        if old is None:
+            continue
+        timed = max(entry["wall_time_s"], old["wall_time_s"]) >= min_time
+        ratio = entry["wall_time_s"] / old["wall_time_s"] if old["wall_time_s"] else float("inf")
+        samples, old_samples = entry.get("wall_time_samples"), old.get("wall_time_samples")
+        separated = not (samples and old_samples) or min(samples) > max(old_samples)
+        worse_penalty = (entry["penalty"] is not None and old["penalty"] is not None
+                         and entry["penalty"] > old["penalty"])
+        if (timed and separated and ratio > 1 + tolerance) or worse_penalty:
+            regressions.append({"n_groups": entry["n_groups"], "stage": entry["stage"], "time_ratio": ratio,
+                                "penalty": entry["penalty"], "baseline_penalty": old["penalty"]})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the schedule solvers")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--density", type=float, default=0.8)
+    parser.add_argument("--tightness", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--population", type=int, default=50)
+    parser.add_argument("--generations", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["constructive"], choices=["constructive", "random"])
+    parser.add_argument("--output", help="JSON file for the results (default: stdout)")
+    parser.add_argument("--compare", help="Baseline results JSON; exit code 1 on regressions")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per size; times are their median")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="Stages faster than this (seconds) are not checked for time regressions")
+    args = parser.parse_args(argv)
+
+    report = run_sweep(args.sizes, args.density, args.tightness, args.seed,
+                       args.population, args.generations, args.modes, repeats=args.repeats)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), report,
+                              args.tolerance, args.min_time)
+        for regression in regressions:
+            logger.warning(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
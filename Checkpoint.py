@@ -0,0 +1,107 @@
+import os
+import random
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from FitnessCache import DIGEST_SIZE
+
+FORMAT_VERSION = 1
+
+
+def capture_rng_state():
+    """States of the `random` and legacy `numpy.random` generators as arrays."""
+    version, words, gauss_next = random.getstate()
+    _, keys, pos, has_gauss, cached_gaussian = np.random.get_state(legacy=True)
+    return {
+        "random_version": np.int64(version),
+        "random_words": np.asarray(words, dtype=np.uint32),
+        "random_gauss": np.array([np.nan if gauss_next is None else gauss_next, gauss_next is not None]),
+        "numpy_keys": np.asarray(keys, dtype=np.uint32),
+        "numpy_pos": np.int64(pos),
+        "numpy_gauss": np.array([cached_gaussian, has_gauss], dtype=np.float64),
+    }
+
+
+def restore_rng_state(state):
+    gauss, has_gauss = state["random_gauss"]
+    random.setstate((int(state["random_version"]),
+                     tuple(int(word) for word in state["random_words"]),
+                     float(gauss) if has_gauss else None))
+    cached_gaussian, has_numpy_gauss = state["numpy_gauss"]
+    np.random.set_state(("MT19937", np.asarray(state["numpy_keys"], dtype=np.uint32), int(state["numpy_pos"]),
+                         int(has_numpy_gauss), float(cached_gaussian)))
+
+
+@dataclass
+class GACheckpoint:
+    """
+    Snapshot of a GA run between two generations: the population as one
+    genome matrix with its fitness vector, the hall of fame, the counters
+    (including the generation of the last improvement, for the stagnation
+    criterion), the RNG states and the fitness cache entries in LRU order
+    (cache hits are not evaluations, so a cold cache would change the
+    evaluation count). Restoring all of it and continuing gives exactly the
+    run that was never interrupted.
+
+    Stored as a compressed .npz (no pickle); save() writes a temporary file
+    next to the target, fsyncs it and renames it over the target, so a crash
+    leaves either the previous checkpoint or the new one.
+    """
+    generation: int
+    evaluations: int
+    genomes: np.ndarray
+    fitness: np.ndarray
+    hof_genomes: np.ndarray
+    hof_fitness: np.ndarray
+    rng_state: dict
+    last_improvement: int = 0
+    cache_keys: np.ndarray = field(default_factory=lambda: np.zeros((0, DIGEST_SIZE), dtype=np.uint8))
+    cache_penalties: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+
+    def save(self, path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{path.name}-", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez_compressed(file,
+                                    format_version=np.int64(FORMAT_VERSION),
+                                    generation=np.int64(self.generation),
+                                    evaluations=np.int64(self.evaluations),
+                                    last_improvement=np.int64(self.last_improvement),
+                                    genomes=self.genomes,
+                                    fitness=self.fitness,
+                                    hof_genomes=self.hof_genomes,
+                                    hof_fitness=self.hof_fitness,
+                                    cache_keys=self.cache_keys,
+                                    cache_penalties=self.cache_penalties,
+                                    **self.rng_state)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path) -> "GACheckpoint":
+        with np.load(path, allow_pickle=False) as archive:
+            version = int(archive["format_version"])
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported checkpoint format {version}, expected {FORMAT_VERSION}")
+            arrays = {name: archive[name] for name in archive.files}
+
+        return cls(generation=int(arrays.pop("generation")),
+                   evaluations=int(arrays.pop("evaluations")),
+                   genomes=arrays.pop("genomes"),
+                   fitness=arrays.pop("fitness"),
+                   hof_genomes=arrays.pop("hof_genomes"),
+                   hof_fitness=arrays.pop("hof_fitness"),
+                   last_improvement=int(arrays.pop("last_improvement", 0)),
+                   cache_keys=arrays.pop("cache_keys", np.zeros((0, DIGEST_SIZE), dtype=np.uint8)),
+                   cache_penalties=arrays.pop("cache_penalties", np.zeros(0, dtype=np.float64)),
+                   rng_state={name: value for name, value in arrays.items() if name != "format_version"})
@@ -0,0 +1,264 @@
+import numpy as np
+
+from Schedule import ALL_SLOTS_MASK, DAYS, SLOTS, slot_bit
+from ScheduleLog import WARNING
+
+
+class Demand:
+    # Потребность: все часы одного предмета одной группы (номера из ProblemModel)
+    def __init__(self, index, group, subject, name, difficult, hours, teachers, rooms, allowed):
+        self.index = index
+        self.group = group
+        self.subject = subject
+        self.name = name  # Название предмета
+        self.difficult = difficult
+        self.remaining = hours
+        self.teachers = teachers  # Номера преподавателей, которые могут вести предмет в группе
+        self.rooms = rooms  # Номера кабинетов с подходящим оборудованием в порядке предпочтения
+        self.allowed = allowed  # 48-битная маска слотов, разрешенных ограничениями по дням и времени
+
+
+class ConstructiveScheduler:
+    """
+    Детерминированное построение расписания без случайных попыток.
+
+    Из-за запрета окон занятия группы в каждый день идут подряд с первого слота,
+    поэтому расписание строится по слотам: для каждого (день, слот) каждой
+    группе, у которой день еще не закончен, подбирается одно занятие.
+
+    Домен потребности (группа, предмет) - маска оставшихся слотов группы, где
+    предмет разрешен ограничениями по дням и времени. Отношение оставшихся
+    часов к размеру домена задает срочность; загрузка преподавателя -
+    отношение его неразмещенных часов к оставшимся слотам. В каждом слоте
+    сначала обслуживается группа с наименьшим числом допустимых вариантов,
+    варианты перебираются от самого срочного. Занятость преподавателей и
+    кабинетов в слоте распространяется на остальные группы; если какой-то
+    группе не хватило варианта, выполняется ограниченный возврат внутри слота
+    (не более max_backtracks узлов перебора на слот). Группа без варианта
+    заканчивает день, а оставшиеся часы переносятся на следующие дни.
+
+    Все данные берутся из числовой модели schedule.problem: группы,
+    преподаватели и кабинеты - номера, занятость - списки масок по номерам.
+    """
+
+    def __init__(self, schedule, max_backtracks=200):
+        self.schedule = schedule
+        self.data = schedule.data
+        self.problem = schedule.problem
+        self.max_backtracks = max_backtracks
+
+        problem = self.problem
+        limit = problem.daily_hours_limit
+        self.daily_limit = min(SLOTS, limit) if limit else SLOTS
+        self.difficult_limit = problem.daily_difficult_hours_limit
+
+        self.teacher_objects = [self.data.teachers[name] for name in problem.teacher_names]
+        self.teacher_days = problem.teacher_days.tolist()
+        self.teacher_busy = [schedule.teacher_busy.get(name, 0) for name in problem.teacher_names]
+        self.room_busy = [schedule.room_busy.get(name, 0) for name in problem.room_names]
+
+        self.demands = []
+        self.by_group = {}  # Ключ - номер группы, значение - список потребностей
+        self.teacher_required = [0.0] * problem.n_teachers  # Ожидаемое число неразмещенных часов преподавателя
+        self._rooms_cache = {}
+
+    def run(self):
+        self._build_demands()
+
+        for day in range(DAYS):
+            targets = {group: self._day_target(group, day) for group in self.by_group}
+            open_groups = [group for group, target in targets.items() if target > 0]
+            difficult = {group: 0 for group in open_groups}
+
+            for slot in range(self.daily_limit):
+                open_groups = [group for group in open_groups if slot < targets[group]]
+                if not open_groups:
+                    break
+
+                assignment = self._assign_slot(day, slot, open_groups, targets, difficult)
+                for group in open_groups:
+                    if group in assignment:
+                        demand, teacher, room = assignment[group]
+                        self._place(demand, day, slot, teacher, room)
+                        if demand.difficult:
+                            difficult[group] += 1
+                    else:
+                        # Нет допустимого занятия - день группы заканчивается, часы переносятся
+                        targets[group] = slot
+
+        for demand in self.demands:
+            if demand.remaining > 0:
+                unplaced = self.schedule.unplaced_subjects.setdefault(self.problem.group_names[demand.group], [])
+                unplaced.extend([demand.name] * demand.remaining)
+                self.schedule.log.counters["unplaced"] += demand.remaining
+
+    def _build_demands(self):
+        problem = self.problem
+        for group, group_name in enumerate(problem.group_names):
+            self.schedule.init_group_schedule(group_name)
+            self.by_group[group] = []
+
+            for subject in np.flatnonzero(problem.group_subjects[group]):
+                subject_name = problem.subject_names[subject]
+                hours = int(problem.required_hours[group, subject])
+                if hours <= 0:
+                    try:
+                        int(self.data.groups[group_name].subjects[subject_name].weekly_hours)
+                    except (TypeError, ValueError):
+                        if self.schedule.log.warning:
+                            self.schedule.log.emit(WARNING, "invalid_hours", group=group_name, subject=subject_name)
+                    continue
+
+                teachers = np.flatnonzero(problem.eligible[:, group, subject]).tolist()
+                demand = Demand(len(self.demands), group, subject, subject_name,
+                                bool(problem.is_difficult[group, subject]), hours, teachers,
+                                self._ordered_rooms(group, subject), self._allowed_mask(group, subject, teachers))
+                self.demands.append(demand)
+                self.by_group[group].append(demand)
+
+                for teacher in teachers:
+                    self.teacher_required[teacher] += hours / len(teachers)
+
+    def _ordered_rooms(self, group, subject):
+        # Сначала кабинеты главного корпуса; оборудованные кабинеты оставляем тем, кому они нужны
+        requirement = int(self.problem.subject_equipment[group, subject])
+        if requirement not in self._rooms_cache:
+            problem = self.problem
+            rooms = np.flatnonzero(problem.room_ok[group, subject]).tolist()
+            self._rooms_cache[requirement] = sorted(
+                rooms, key=lambda room: (requirement < 0 and problem.room_equipment[room] >= 0,
+                                         problem.room_building[room] != 0))
+        return self._rooms_cache[requirement]
+
+    def _allowed_mask(self, group, subject, teachers):
+        problem = self.problem
+        days = problem.day_allowed[group, subject].copy()
+        if teachers:
+            days &= problem.teacher_days[teachers].any(axis=0)
+        allowed = days[:, None] & problem.time_allowed[group, subject][None, :]
+
+        mask = 0
+        for bit in np.flatnonzero(allowed.ravel()):
+            mask |= 1 << int(bit)
+        return mask
+
+    def _remaining_hours(self, group):
+        return sum(demand.remaining for demand in self.by_group[group])
+
+    def _day_target(self, group, day):
+        # Оставшиеся часы группы поровну на оставшиеся дни
+        return min(self.daily_limit, -(-self._remaining_hours(group) // (DAYS - day)))
+
+    def _future_mask(self, group, day, slot, target):
+        # Слоты группы, начиная с текущего, которые еще будут заполняться
+        mask = 0
+        for current in range(slot, target):
+            mask |= slot_bit(day, current)
+        if day + 1 < DAYS:
+            later_hours = max(self._remaining_hours(group) - (target - slot), 0)
+            per_day = min(self.daily_limit, -(-later_hours // (DAYS - day - 1)))
+            for later in range(day + 1, DAYS):
+                mask |= ((1 << per_day) - 1) << (later * SLOTS)
+        return mask & ALL_SLOTS_MASK
+
+    def _candidates(self, group, day, slot, target, difficult):
+        # Допустимые в слоте потребности группы от самой срочной к наименее срочной
+        schedule = self.schedule
+        bit = slot_bit(day, slot)
+        future = self._future_mask(group, day, slot, target)
+        cells_left = (DAYS - day) * SLOTS - slot
+        candidates = []
+
+        for demand in self.by_group[group]:
+            if demand.remaining <= 0 or not demand.allowed & bit:
+                continue
+            if demand.difficult and self.difficult_limit is not None and difficult >= self.difficult_limit:
+                continue
+
+            if demand.teachers:
+                teachers = [teacher for teacher in demand.teachers
+                            if self.teacher_days[teacher][day] and not self.teacher_busy[teacher] & bit]
+                if not teachers:
+                    continue
+                # Нагруженного преподавателя оставляем тем, кому без него не обойтись
+                teachers.sort(key=self.teacher_required.__getitem__)
+                pressure = self.teacher_required[teachers[0]] / cells_left
+            else:
+                # Преподаватель для предмета не найден - ставим "N/A", как и случайный режим
+                teachers, pressure = [None], 0
+
+            urgency = demand.remaining / max((demand.allowed & future).bit_count(), 1)
+            same_today = schedule.schedule[self.problem.group_names[group]][day][:slot].count(demand.name)
+            candidates.append(((-max(urgency, pressure), same_today, demand.index), demand, teachers))
+
+        candidates.sort(key=lambda candidate: candidate[0])
+        return [(demand, teachers) for _, demand, teachers in candidates]
+
+    def _assign_slot(self, day, slot, groups, targets, difficult):
+        # Подбор занятий всем открытым группам в одном слоте с ограниченным перебором
+        bit = slot_bit(day, slot)
+        options = {group: self._candidates(group, day, slot, targets[group], difficult[group]) for group in groups}
+        order = sorted(groups, key=lambda group: len(options[group]))
+
+        best = {}
+        current = {}
+        used_teachers, used_rooms = set(), set()
+        nodes = 0
+
+        def free_room(rooms):
+            for room in rooms:
+                if room not in used_rooms and not self.room_busy[room] & bit:
+                    return room
+            return None
+
+        def search(position):
+            nonlocal best, nodes
+            if len(current) > len(best):
+                best = dict(current)
+            # Все группы уже обслужены, бюджет исчерпан или лучшего не получить
+            if len(best) == len(order) or nodes >= self.max_backtracks:
+                return
+            if position == len(order) or len(current) + len(order) - position <= len(best):
+                return
+
+            group = order[position]
+            for demand, teachers in options[group]:
+                teacher = next((t for t in teachers if t is None or t not in used_teachers), False)
+                room = free_room(demand.rooms)
+                if teacher is False or room is None:
+                    continue
+
+                nodes += 1
+                if teacher is not None:
+                    used_teachers.add(teacher)
+                used_rooms.add(room)
+                current[group] = (demand, teacher, room)
+
+                search(position + 1)
+
+                del current[group]
+                used_rooms.discard(room)
+                if teacher is not None:
+                    used_teachers.discard(teacher)
+                if len(best) == len(order) or nodes >= self.max_backtracks:
+                    return
+
+            # Группа остается без занятия в этом слоте
+            search(position + 1)
+
+        search(0)
+        return best
+
+    def _place(self, demand, day, slot, teacher, room):
+        bit = slot_bit(day, slot)
+        if teacher is not None:
+            self.teacher_busy[teacher] |= bit
+        self.room_busy[room] |= bit
+
+        self.schedule.place_lesson(self.problem.group_names[demand.group], day, slot, demand.name,
+                                   self.teacher_objects[teacher] if teacher is not None else None,
+                                   self.data.rooms[room])
+        demand.remaining -= 1
+        self.schedule.log.counters["placed"] += 1
+        for other in demand.teachers:
+            self.teacher_required[other] -= 1 / len(demand.teachers)
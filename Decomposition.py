@@ -0,0 +1,310 @@
+import math
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Entities import MainData
+from ProblemModel import ProblemModel
+from Schedule import DAYS, SLOTS, Schedule
+from ScheduleLog import NullSink
+
+
+class Decomposition:
+    """
+    Разбиение задачи на части, которые можно решать независимо.
+
+    Граф взаимодействия: группа связана с каждым преподавателем, который
+    может вести у нее предмет с ненулевыми часами. Группы из разных
+    компонент связности не делят ни одного преподавателя. Кабинеты в граф
+    не входят: это взаимозаменяемый пул (все кабинеты одного оборудования
+    равноценны), поэтому каждая часть получает свою долю кабинетов каждого
+    вида пропорционально своим часам. Тогда расписания частей не
+    пересекаются ни по преподавателям, ни по кабинетам.
+
+    Привязка к корпусам не учитывается: в MainData корпус есть только у
+    кабинета (Room.building), у групп и преподавателей его нет, а
+    допустимость кабинета (ProblemModel.room_ok) от корпуса не зависит.
+    Поэтому спрос части по корпусам неизвестен, и часть может получить
+    кабинеты другого кампуса - это не нарушает ограничений. Доля каждой
+    части набирается из как можно меньшего числа корпусов (крупные корпуса
+    целиком), чтобы занятия части не разбрасывались по многим корпусам.
+
+    Если компонент меньше, чем нужно частей, самые крупные компоненты
+    делятся на слабо связанные кластеры: группы объединяются по убыванию
+    числа общих преподавателей, пока кластер не достигнет предельного
+    размера. Общие преподаватели кластеров - разделяемый ресурс, накладки по
+    ним снимает проход разрешения конфликтов при слиянии.
+    """
+
+    def __init__(self, data: MainData):
+        self.data = data
+        if data.problem is None:
+            data.problem = ProblemModel.from_main_data(data)
+        self.problem = problem = data.problem
+        taught = problem.eligible & (problem.required_hours > 0)[None, :, :]
+        self.group_teachers = taught.any(axis=2).T  # (G, T)
+        self.group_hours = problem.required_hours.astype(np.int64).sum(axis=1)
+
+    def components(self):
+        # Компоненты связности графа группа - преподаватель: списки номеров групп
+        links = self.group_teachers
+        n_groups = len(links)
+        labels = np.arange(n_groups)
+        outside = n_groups  # Метка для преподавателей без групп
+        while True:
+            teacher_labels = np.where(links, labels[:, None], outside).min(axis=0)
+            updated = np.minimum(labels, np.where(links, teacher_labels[None, :], outside).min(axis=1))
+            if np.array_equal(updated, labels):
+                break
+            labels = updated
+        return [np.flatnonzero(labels == label) for label in np.unique(labels)]
+
+    def split(self, groups, n_clusters):
+        # Деление компоненты на n_clusters слабо связанных кластеров
+        links = self.group_teachers[groups].astype(np.int64)
+        weights = links @ links.T  # Число общих преподавателей пар групп
+        first, second = np.nonzero(np.triu(weights, k=1))
+        order = np.argsort(-weights[first, second], kind="stable")
+
+        parent = list(range(len(groups)))
+        size = [1] * len(groups)
+        limit = math.ceil(len(groups) / n_clusters)
+
+        def root(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for a, b in zip(first[order].tolist(), second[order].tolist()):
+            a, b = root(a), root(b)
+            if a != b and size[a] + size[b] <= limit:
+                parent[b] = a
+                size[a] += size[b]
+
+        roots = np.array([root(node) for node in range(len(groups))])
+        clusters = [groups[roots == label] for label in np.unique(roots)]
+        return self.pack(clusters, n_clusters)
+
+    def pack(self, pieces, n_parts):
+        # Раскладка кусков по n_parts частям с выравниванием часов: самый большой кусок - в самую легкую часть
+        parts = [[] for _ in range(min(n_parts, len(pieces)))]
+        loads = [0] * len(parts)
+        for piece in sorted(pieces, key=lambda piece: -int(self.group_hours[piece].sum())):
+            lightest = loads.index(min(loads))
+            parts[lightest].append(piece)
+            loads[lightest] += int(self.group_hours[piece].sum())
+        return [np.sort(np.concatenate(part)) for part in parts]
+
+    def partition(self, n_parts, coupled=False):
+        """
+        Группы, разложенные на не более чем n_parts частей. Без coupled
+        части составляются только из целых компонент; с coupled крупнейшие
+        компоненты делятся, пока частей не станет n_parts.
+        """
+        pieces = self.components()
+        if coupled:
+            while len(pieces) < n_parts:
+                largest = max(range(len(pieces)), key=lambda index: len(pieces[index]))
+                if len(pieces[largest]) < 2:
+                    break
+                need = min(n_parts - len(pieces) + 1, len(pieces[largest]))
+                pieces[largest:largest + 1] = self.split(pieces[largest], need)
+        return self.pack(pieces, n_parts)
+
+    def allocate_rooms(self, parts):
+        # Кабинеты каждого вида оборудования делятся между частями пропорционально часам, корпус за корпусом.
+        # Спрос части по корпусам неизвестен (см. описание класса), поэтому корпус части не сопоставляется
+        problem = self.problem
+        rooms = self.data.rooms
+        shares = [[] for _ in parts]
+        for equipment in np.unique(problem.room_equipment):
+            kind = np.flatnonzero(problem.room_equipment == equipment)
+            # Крупные корпуса первыми, внутри корпуса - исходный порядок
+            buildings = problem.room_building[kind]
+            kind = kind[np.lexsort((kind, buildings, -np.bincount(buildings)[buildings]))]
+
+            needs = problem.subject_equipment == equipment
+            demand = [int((problem.required_hours[part] * needs[part]).sum()) for part in parts]
+            start = 0
+            for index, quota in enumerate(_quotas(len(kind), demand)):
+                shares[index].extend(rooms[room] for room in kind[start:start + quota].tolist())
+                start += quota
+        return shares
+
+    def subproblems(self, parts):
+        # MainData каждой части: ее группы, преподаватели этих групп и выделенные кабинеты
+        data = self.data
+        group_names = list(data.groups)
+        teacher_names = list(data.teachers)
+        result = []
+        for groups, rooms in zip(parts, self.allocate_rooms(parts)):
+            part = MainData()
+            part.set_schedule_config(data.schedule_config)
+            for group in groups.tolist():
+                part.add_group(data.groups[group_names[group]])
+            for teacher in np.flatnonzero(self.group_teachers[groups].any(axis=0)).tolist():
+                part.add_teacher(data.teachers[teacher_names[teacher]])
+            for room in rooms:
+                part.add_room(room)
+            result.append(part)
+        return result
+
+
+def _quotas(total, demand):
+    # Метод наибольших остатков; часть со спросом получает хотя бы один кабинет, если их хватает
+    needy = [index for index, value in enumerate(demand) if value > 0]
+    quotas = [0] * len(demand)
+    if not needy or not total:
+        return quotas
+    base = 1 if total >= len(needy) else 0
+    rest = total - base * len(needy)
+    weight = sum(demand[index] for index in needy)
+    shares = {index: rest * demand[index] / weight for index in needy}
+    for index in needy:
+        quotas[index] = base + int(shares[index])
+    left = total - sum(quotas)
+    for index in sorted(needy, key=lambda index: int(shares[index]) - shares[index])[:left]:
+        quotas[index] += 1
+    return quotas
+
+
+def _solve_part(data, mode, seed):
+    # Решение одной части в рабочем процессе; результат - занятия в виде названий
+    random.seed(seed)
+    schedule = Schedule(data, NullSink())
+    schedule.generate_initial_schedule(mode)
+    lessons = []
+    for group_name, group_schedule in schedule.schedule.items():
+        for day in range(DAYS):
+            for slot in range(SLOTS):
+                subject_name = group_schedule[day][slot]
+                if subject_name is not None:
+                    lessons.append((group_name, day, slot, subject_name,
+                                    schedule.teacher_assignments[group_name][day][slot],
+                                    schedule.room_assignments[group_name][day][slot]))
+    return lessons, dict(schedule.log.counters)
+
+
+def solve_decomposed(schedule, mode="constructive", workers=None, n_parts=None, coupled=False, start_method=None):
+    """
+    Строит расписание schedule по частям: разбиение (Decomposition),
+    решение частей режимом mode в workers процессах и слияние с проходом
+    разрешения конфликтов. n_parts по умолчанию равно числу процессов.
+    Зерна частей берутся из модуля random, поэтому результат
+    воспроизводим при одинаковом random.seed().
+    """
+    workers = workers or os.cpu_count() or 1
+    decomposition = Decomposition(schedule.data)
+    parts = decomposition.partition(n_parts or workers, coupled)
+    datas = decomposition.subproblems(parts)
+    seeds = [random.randrange(2 ** 32) for _ in datas]
+
+    if workers > 1 and len(datas) > 1:
+        context = multiprocessing.get_context(start_method)
+        with ProcessPoolExecutor(max_workers=min(workers, len(datas)), mp_context=context) as pool:
+            results = list(pool.map(_solve_part, datas, [mode] * len(datas), seeds))
+    else:
+        results = [_solve_part(data, mode, seed) for data, seed in zip(datas, seeds)]
+
+    for _, counters in results:
+        schedule.log.counters.update({name: value for name, value in counters.items() if name != "unplaced"})
+    merge(schedule, [lessons for lessons, _ in results])
+
+
+def merge(schedule, parts):
+    """
+    Сливает занятия частей в schedule. Проход разрешения конфликтов:
+    занятие, чей преподаватель или кабинет в этом слоте уже занят другой
+    частью, получает в том же слоте другого свободного преподавателя или
+    кабинет, а если их нет - переносится. Затем недостающие по плану часы
+    (вытесненные занятия и то, что части не разместили из-за своей доли
+    кабинетов) размещаются по всему пулу ресурсов; что не поместилось,
+    попадает в unplaced_subjects.
+    """
+    data = schedule.data
+    rooms = {room.number: room for room in data.rooms}
+    for group_name in data.groups:
+        schedule.init_group_schedule(group_name)
+
+    for lessons in parts:
+        for group_name, day, slot, subject_name, teacher_name, room_number in lessons:
+            subject = data.groups[group_name].subjects[subject_name]
+            teacher = data.teachers.get(teacher_name)
+            if teacher is not None and not schedule.is_teacher_available(teacher, day, slot):
+                teacher = _free_teacher(schedule, subject_name, group_name, day, slot)
+                if teacher is None:
+                    continue
+            room = rooms.get(room_number)
+            if room is not None and not schedule.is_room_free(room, day, slot):
+                room = schedule.find_free_room(subject, day, slot)
+                if room is None:
+                    continue
+            schedule.place_lesson(group_name, day, slot, subject_name, teacher, room)
+
+    counters = schedule.log.counters
+    for group_name, group in data.groups.items():
+        placed = {}
+        for day in range(DAYS):
+            for subject_name in schedule.schedule[group_name][day]:
+                if subject_name is not None:
+                    placed[subject_name] = placed.get(subject_name, 0) + 1
+        for subject_name, subject in group.subjects.items():
+            try:
+                missing = int(subject.weekly_hours) - placed.get(subject_name, 0)
+            except ValueError:
+                continue
+            while missing > 0 and _place_missing(schedule, group, subject_name):
+                missing -= 1
+                counters["placed"] += 1
+            if missing > 0:
+                # Одна запись на неразмещенный час, как в ConstructiveScheduler
+                schedule.unplaced_subjects.setdefault(group_name, []).extend([subject_name] * missing)
+                counters["unplaced"] += missing
+
+
+def _free_teacher(schedule, subject_name, group_name, day, slot):
+    # Свободный в слоте преподаватель предмета, который работает в этот день
+    for teacher in schedule.data.get_teachers_for(subject_name, group_name):
+        if teacher.available_days[day] and schedule.is_teacher_available(teacher, day, slot):
+            return teacher
+    return None
+
+
+def _place_missing(schedule, group, subject_name):
+    # Ставит один час предмета в окно внутри дня или сразу после последнего занятия
+    subject = group.subjects[subject_name]
+    config = schedule.data.schedule_config
+    daily_limit = min(SLOTS, getattr(config, "daily_hours_limit", None) or SLOTS)
+    difficult_limit = getattr(config, "daily_difficult_hours_limit", None)
+    has_teachers = bool(schedule.data.get_teachers_for(subject_name, group.name))
+
+    for day in range(DAYS):
+        if not subject.is_day_allowed(day):
+            continue
+        row = schedule.schedule[group.name][day]
+        filled = [slot for slot, name in enumerate(row) if name is not None]
+        if len(filled) >= daily_limit:
+            continue
+        if subject.is_difficult and difficult_limit is not None and sum(
+                group.subjects[row[slot]].is_difficult for slot in filled) >= difficult_limit:
+            continue
+
+        candidates = [0] if not filled else (
+                [slot for slot in range(filled[0], filled[-1]) if row[slot] is None]
+                + ([filled[-1] + 1] if filled[-1] + 1 < SLOTS else []))
+        for slot in candidates:
+            if not subject.is_time_allowed(slot):
+                continue
+            teacher = _free_teacher(schedule, subject_name, group.name, day, slot)
+            if teacher is None and has_teachers:
+                continue
+            room = schedule.find_free_room(subject, day, slot)
+            if room is None:
+                continue
+            schedule.place_lesson(group.name, day, slot, subject_name, teacher, room)
+            return True
+    return False
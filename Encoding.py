@@ -0,0 +1,66 @@
+from typing import Tuple, Union
+
+import numpy as np
+
+from models import Config
+
+IndexLike = Union[int, np.ndarray]
+
+
+class TripleEncoding:
+    """
+    Mixed-radix mapping between an encoding index and a (teacher, subject, classroom)
+    triple:
+
+        index = (teacher * n_subjects + subject) * n_classrooms + classroom
+
+    This is the same order itertools.product(teachers, subjects, classrooms) yields,
+    so indices are compatible with the previous dict based encoding. Encoding and
+    decoding are pure arithmetic; the dense int16 decode arrays are there for
+    vectorized lookups over whole populations.
+    """
+
+    def __init__(self, n_teachers: int, n_subjects: int, n_classrooms: int):
+        if max(n_teachers, n_subjects, n_classrooms) > np.iinfo(np.int16).max:
+            raise ValueError("Encoding dimensions do not fit into int16 decode arrays")
+
+        self.n_teachers = n_teachers
+        self.n_subjects = n_subjects
+        self.n_classrooms = n_classrooms
+        self.size = n_teachers * n_subjects * n_classrooms
+
+        # Same tables as decode(np.arange(size)), built by repetition without
+        # materializing int64 intermediates
+        self.teacher = np.repeat(np.arange(n_teachers, dtype=np.int16), n_subjects * n_classrooms)
+        self.subject = np.tile(np.repeat(np.arange(n_subjects, dtype=np.int16), n_classrooms), n_teachers)
+        self.classroom = np.tile(np.arange(n_classrooms, dtype=np.int16), n_teachers * n_subjects)
+
+        for array in (self.teacher, self.subject, self.classroom):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_config(cls, config: Config) -> "TripleEncoding":
+        return cls(config.n_teachers, config.n_subjects, config.n_classrooms)
+
+    @property
+    def index_dtype(self) -> np.dtype:
+        """Smallest signed integer type able to hold every index (and -1)."""
+        if self.size <= np.iinfo(np.int16).max:
+            return np.dtype(np.int16)
+        return np.dtype(np.int32)
+
+    def encode(self, teacher: IndexLike, subject: IndexLike, classroom: IndexLike) -> IndexLike:
+        return (teacher * self.n_subjects + subject) * self.n_classrooms + classroom
+
+    def decode(self, index: IndexLike) -> Tuple[IndexLike, IndexLike, IndexLike]:
+        rest, classroom = np.divmod(index, self.n_classrooms)
+        teacher, subject = np.divmod(rest, self.n_subjects)
+        return teacher, subject, classroom
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> Tuple[int, int, int]:
+        if not 0 <= index < self.size:
+            raise KeyError(index)
+        return int(self.teacher[index]), int(self.subject[index]), int(self.classroom[index])
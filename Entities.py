@@ -14,6 +14,13 @@ class Subject:
         self.day_constraints = [False] * 6  # 6 дней в неделе
         self.time_constraints = [False] * 8  # 8 слотов в день
 
+    # Отметки "X" задают дни/слоты, в которые предмет можно ставить; без отметок подходит любой
+    def is_day_allowed(self, day):
+        return self.day_constraints[day] or not any(self.day_constraints)
+
+    def is_time_allowed(self, slot):
+        return self.time_constraints[slot] or not any(self.time_constraints)
+
 
 class ClassGroup:
     def __init__(self, name):
@@ -47,18 +54,76 @@ class MainData:
         self.teachers = {}  # Ключ - имя преподавателя, значение - объект Teacher
         self.rooms = []  # Список объектов Room
 
+        # Индексы для поиска за O(1)
+        self.teachers_by_subject_group = {}  # Ключ - (предмет, группа), значение - {имя преподавателя: Teacher}
+        self.rooms_by_equipment = {}  # Ключ - оборудование (None - без оборудования), значение - список Room
+
+        # Скомпилированная ProblemModel; сбрасывается при любом изменении данных
+        self.problem = None
 
     def set_schedule_config(self, config):
         self.schedule_config = config
+        self.problem = None
 
     def add_group(self, group):
         self.groups[group.name] = group
+        self.problem = None
 
     def add_teacher(self, teacher):
+        # Повторное добавление преподавателя переиндексирует его предметы и группы
+        if teacher.name in self.teachers:
+            self._unindex_teacher(self.teachers[teacher.name])
         self.teachers[teacher.name] = teacher
+        self._index_teacher(teacher)
+        self.problem = None
 
     def add_room(self, room):
         self.rooms.append(room)
+        self.problem = None
+        self.rooms_by_equipment.setdefault(room.equipment, []).append(room)
+
+    def remove_room(self, number):
+        # Выводит кабинет из списка и индекса по оборудованию
+        room = next((room for room in self.rooms if room.number == number), None)
+        if room is None:
+            raise KeyError(f"кабинет {number!r} не найден")
+        self.rooms.remove(room)
+        self.rooms_by_equipment[room.equipment].remove(room)
+        self.problem = None
+        return room
+
+    def get_teachers_for(self, subject_name, group_name):
+        # Преподаватели, которые ведут предмет в группе
+        return self.teachers_by_subject_group.get((subject_name, group_name), {}).values()
+
+    def get_rooms_for(self, equipment_requirement):
+        # Кабинеты с нужным оборудованием; без требования подходит любой кабинет
+        if equipment_requirement is None:
+            return self.rooms
+        return self.rooms_by_equipment.get(equipment_requirement, [])
+
+    def rebuild_indexes(self):
+        # Полная перестройка индексов, если объекты менялись в обход методов add_*
+        self.teachers_by_subject_group = {}
+        self.rooms_by_equipment = {}
+        self.problem = None
+        for group in self.groups.values():
+            for subject_name in group.subjects:
+                self.teachers_by_subject_group.setdefault((subject_name, group.name), {})
+        for teacher in self.teachers.values():
+            self._index_teacher(teacher)
+        for room in self.rooms:
+            self.rooms_by_equipment.setdefault(room.equipment, []).append(room)
+
+    def _index_teacher(self, teacher):
+        for subject_name in teacher.subjects_name:
+            for group_name in teacher.available_groups_name:
+                self.teachers_by_subject_group.setdefault((subject_name, group_name), {})[teacher.name] = teacher
+
+    def _unindex_teacher(self, teacher):
+        for subject_name in teacher.subjects_name:
+            for group_name in teacher.available_groups_name:
+                self.teachers_by_subject_group.get((subject_name, group_name), {}).pop(teacher.name, None)
 
     def add_subject(self, subject):
         self.subjects[subject.name] = subject
@@ -71,3 +136,5 @@ class MainData:
             group = ClassGroup(group_name)
             group.add_subject(subject)
             self.add_group(group)
+        self.teachers_by_subject_group.setdefault((subject.name, group_name), {})
+        self.problem = None
@@ -0,0 +1,122 @@
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+from FitnessCache import FitnessCache, genome_keys
+
+# Problem definition (the evaluator) installed once per worker process
+_worker_evaluator: Optional[Callable[[np.ndarray], np.ndarray]] = None
+
+
+def _init_worker(evaluator: Callable[[np.ndarray], np.ndarray]) -> None:
+    global _worker_evaluator
+    _worker_evaluator = evaluator
+
+
+def _evaluate_chunk(chunk: np.ndarray) -> np.ndarray:
+    return _worker_evaluator(chunk)
+
+
+class EvaluationExecutor:
+    """
+    Runs a batch evaluator over a population on one of three backends:
+
+    * "serial"  - evaluates the whole array in the calling thread;
+    * "thread"  - splits the array into chunks scored by a thread pool
+                  (NumPy releases the GIL in the heavy reductions);
+    * "process" - ships the evaluator to every worker once through the pool
+                  initializer, then sends only chunks of genomes as compact
+                  integer arrays.
+
+    The pool is started lazily on the first evaluation and reused until close().
+
+    With a FitnessCache, cached genomes are answered in the calling process
+    and only the distinct misses are scored; `evaluated` counts the genomes
+    that actually reached the evaluator.
+    """
+
+    BACKENDS = ("serial", "thread", "process")
+
+    def __init__(self,
+                 evaluator: Callable[[np.ndarray], np.ndarray],
+                 backend: str = "serial",
+                 workers: Optional[int] = None,
+                 chunk_size: int = 256,
+                 start_method: Optional[str] = None,
+                 genome_dtype=np.int32,
+                 cache: Optional[FitnessCache] = None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown executor backend {backend!r}, expected one of {self.BACKENDS}")
+
+        self.evaluator = evaluator
+        self.backend = backend
+        self.workers = workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.start_method = start_method
+        self.genome_dtype = np.dtype(genome_dtype)
+        self.cache = cache
+        self.evaluated = 0
+
+        self._pool: Optional[Executor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.backend == "thread":
+                self._pool = ThreadPoolExecutor(max_workers=self.workers)
+            else:
+                context = multiprocessing.get_context(self.start_method)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=context,
+                                                 initializer=_init_worker,
+                                                 initargs=(self.evaluator,))
+        return self._pool
+
+    def evaluate(self, genomes: np.ndarray) -> np.ndarray:
+        genomes = np.asarray(genomes)
+        genomes = genomes.reshape(genomes.shape[0], -1)
+        if self.cache is None:
+            self.evaluated += genomes.shape[0]
+            return self._evaluate(genomes)
+
+        genomes = np.ascontiguousarray(genomes, dtype=self.genome_dtype)
+        keys = genome_keys(genomes)
+        penalties, missing = self.cache.lookup(keys)
+        if len(missing):
+            # Copies inside the batch (e.g. tournament clones) are scored once
+            first = {}
+            for index in missing.tolist():
+                first.setdefault(keys[index], index)
+            scored = self._evaluate(genomes[list(first.values())])
+            self.evaluated += len(first)
+            self.cache.store(list(first), scored)
+            by_key = dict(zip(first, scored.tolist()))
+            penalties[missing] = [by_key[keys[index]] for index in missing.tolist()]
+        return penalties
+
+    def _evaluate(self, genomes: np.ndarray) -> np.ndarray:
+        if self.backend == "serial" or genomes.shape[0] <= self.chunk_size:
+            return self.evaluator(genomes)
+
+        genomes = np.ascontiguousarray(genomes, dtype=self.genome_dtype)
+        chunks = [genomes[start:start + self.chunk_size]
+                  for start in range(0, genomes.shape[0], self.chunk_size)]
+
+        if self.backend == "thread":
+            results = self._get_pool().map(self.evaluator, chunks)
+        else:
+            results = self._get_pool().map(_evaluate_chunk, chunks)
+
+        return np.concatenate(list(results))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -1,34 +1,104 @@
 from openpyxl import load_workbook
 from Entities import *
+from ParseCache import ParseCache
+
+# Версия разбора: меняется при любом изменении результата парсера, делает кэш недействительным
+PARSER_VERSION = 3
+
+# Группы идут в строке заголовка начиная со столбца C (номера столбцов с нуля)
+FIRST_GROUP_COLUMN = 2
+
+
+def row_value(row, index):
+    # В потоковом режиме строка может быть короче, если хвостовые ячейки пусты
+    return row[index] if index < len(row) else None
+
+
+def is_filled(cell):
+    # Заливка ячейки с часами означает сложный предмет
+    return cell.fill.start_color.index != "00000000" and cell.fill.start_color.index != "000000"
+
 
 class ExcelParser:
-    def __init__(self, file_path):
+    def __init__(self, file_path, read_only=True, cache_dir=None):
         self.file_path = file_path
-        self.workbook = load_workbook(filename=self.file_path, data_only=True)
+        # read_only=True - потоковое чтение: строки читаются по одной, дерево ячеек в памяти не строится
+        self.read_only = read_only
+        self._workbook = None
         self.data = MainData()  # Главный объект, содержащий все данные
 
+        # Кэш разобранных данных по хэшу содержимого книги; None - без кэша
+        self.cache = ParseCache(cache_dir, PARSER_VERSION) if cache_dir is not None else None
+        self.cache_hit = False
+
+    @property
+    def workbook(self):
+        # Книга открывается при первом обращении
+        if self._workbook is None:
+            self._workbook = load_workbook(filename=self.file_path, read_only=self.read_only, data_only=True)
+        return self._workbook
+
+    def close(self):
+        # В потоковом режиме книга держит файл открытым до закрытия
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
     def setup(self):
-        self.parse_time_restrictions()
-        self.parse_rooms()
-        self.parse_curriculum()
-        self.parse_equipment_requirements()
-        self.parse_teacher_matrix()
-        self.parse_day_and_time_constraints()
+        if self.cache is None:
+            self.parse()
+            return
+
+        key = self.cache.key(self.file_path)
+        cached = self.cache.load(key)
+        self.cache_hit = cached is not None
+        if self.cache_hit:
+            # Книга не открывается вовсе
+            self.data = cached
+            return
+
+        self.parse()
+        self.cache.store(key, self.data)
+
+    def parse(self):
+        try:
+            self.parse_time_restrictions()
+            self.parse_rooms()
+            self.parse_curriculum()
+            self.parse_equipment_requirements()
+            self.parse_teacher_matrix()
+            self.parse_day_and_time_constraints()
+        finally:
+            if self.read_only:
+                self.close()
+        self.data.rebuild_indexes()
 
     def get_sheet(self, sheet_name):
         return self.workbook[sheet_name]
 
+    def read_group_columns(self, sheet, header_row):
+        # Столбцы групп - непустые ячейки строки заголовка начиная со столбца C
+        # (в исходной книге это C-G и I-M учебного плана и C-L матрицы преподавателей)
+        header = next(sheet.iter_rows(min_row=header_row, max_row=header_row, values_only=True), ())
+        return [(col, name) for col, name in enumerate(header) if col >= FIRST_GROUP_COLUMN and name]
+
+    def get_group(self, group_name):
+        if group_name not in self.data.groups:
+            group = ClassGroup(group_name)
+            self.data.add_group(group)
+        return self.data.groups[group_name]
+
     def parse_rooms(self):
         sheet = self.get_sheet('Аудитории')
 
         for row in sheet.iter_rows(min_row=2, values_only=True):  # Пропускаем заголовок
-            room_number = row[0]  # Номер аудитории (столбец A)
+            room_number = row_value(row, 0)  # Номер аудитории (столбец A)
 
             if not room_number:
                 continue
 
-            building_flag = row[1]  # Другой корпус (столбец B)
-            equipment = row[2]  # Оборудование (столбец C)
+            building_flag = row_value(row, 1)  # Другой корпус (столбец B)
+            equipment = row_value(row, 2)  # Оборудование (столбец C)
 
             building = "Другой корпус" if building_flag == "Да" else "Главный корпус"
             equipment = equipment if equipment != "Нет" else None
@@ -42,14 +112,14 @@ class ExcelParser:
 
         # Обрабатываем каждую строку с 4-й строки
         for row in sheet.iter_rows(min_row=4, values_only=True):
-            subject_name = row[0]  # Название предмета (столбец A)
+            subject_name = row_value(row, 0)  # Название предмета (столбец A)
 
             if not subject_name:
                 continue
 
             # Обработка ограничений по дням недели (столбцы B-G)
             for day_index in range(6):  # Индексы для дней недели: 0 = понедельник, 5 = суббота
-                day_constraint = row[day_index + 1]  # Смещение на +1 из-за столбца A
+                day_constraint = row_value(row, day_index + 1)  # Смещение на +1 из-за столбца A
 
                 if day_constraint == 'X':
                     # Применяем ограничения по дням недели для каждого предмета в каждой группе
@@ -59,7 +129,7 @@ class ExcelParser:
 
             # Обработка ограничений по временным слотам (столбцы H-O)
             for slot_index in range(8):  # Индексы для слотов: 0 = 1-ое занятие, 7 = 8-ое занятие
-                time_constraint = row[slot_index + 7]  # Смещение на +7 из-за столбцов A-G
+                time_constraint = row_value(row, slot_index + 7)  # Смещение на +7 из-за столбцов A-G
 
                 if time_constraint == 'X':
                     # Применяем ограничения по временным слотам для каждого предмета в каждой группе
@@ -70,42 +140,63 @@ class ExcelParser:
     def parse_curriculum(self):
         sheet = self.get_sheet('Учебный план')
 
-        group_columns = ["C", "D", "E", "F", "G", "I", "J", "K", "L", "M"]
+        group_columns = self.read_group_columns(sheet, 3)
 
-        for row in range(4, sheet.max_row + 1):
-            subject_name = sheet[f"A{row}"].value
+        # Первый проход - только значения; запоминаем ячейки, где указаны часы
+        hours_cells = {}  # Ключ - (строка, столбец), значение - (предмет, группа, часы)
+        for row_index, row in enumerate(sheet.iter_rows(min_row=4, values_only=True), start=4):
+            subject_name = row_value(row, 0)
 
             if not subject_name:
                 continue
 
-            for col in group_columns:
-                cell = sheet[f"{col}{row}"]
-                group_name = sheet[f"{col}3"].value
+            for col, group_name in group_columns:
+                hours = row_value(row, col)
+                if hours is not None:
+                    hours_cells[(row_index, col)] = (subject_name, group_name, hours)
 
-                if group_name and cell.value is not None:
-                    hours = cell.value
-                    is_difficult = cell.fill.start_color.index != "00000000" and cell.fill.start_color.index != "000000"
+        # Второй проход - стили только тех ячеек, где указаны часы
+        difficult_cells = self.read_difficult_cells(sheet, hours_cells, group_columns)
 
-                    if group_name not in self.data.groups:
-                        group = ClassGroup(group_name)
-                        self.data.add_group(group)
-                    else:
-                        group = self.data.groups[group_name]
+        for cell_key, (subject_name, group_name, hours) in hours_cells.items():
+            is_difficult = cell_key in difficult_cells
+            group = self.get_group(group_name)
 
-                    # Если предмет не существует в группе, добавляем его
-                    if subject_name not in group.subjects:
-                        subject_info = Subject(subject_name, weekly_hours=hours, is_difficult=is_difficult)
-                        group.add_subject(subject_info)
-                    else:
-                        group.subjects[subject_name].weekly_hours = hours
-                        group.subjects[subject_name].is_difficult = is_difficult
+            # Если предмет не существует в группе, добавляем его
+            if subject_name not in group.subjects:
+                subject_info = Subject(subject_name, weekly_hours=hours, is_difficult=is_difficult)
+                group.add_subject(subject_info)
+            else:
+                group.subjects[subject_name].weekly_hours = hours
+                group.subjects[subject_name].is_difficult = is_difficult
+
+    def read_difficult_cells(self, sheet, cells, group_columns):
+        # Выборочный проход по стилям: читаем только строки и столбцы с часами
+        if not cells:
+            return set()
+
+        rows = [row for row, _ in cells]
+        min_row, max_row = min(rows), max(rows)
+        min_col, max_col = group_columns[0][0], group_columns[-1][0]
+        difficult = set()
+
+        for row_index, row in enumerate(sheet.iter_rows(min_row=min_row, max_row=max_row,
+                                                        min_col=min_col + 1, max_col=max_col + 1),
+                                        start=min_row):
+            for offset, cell in enumerate(row):
+                cell_key = (row_index, min_col + offset)
+                if cell_key in cells and is_filled(cell):
+                    difficult.add(cell_key)
+
+        return difficult
 
     def parse_time_restrictions(self):
         sheet = self.get_sheet('Ограничения по часам')
 
-        daily_hours_limit = sheet['B1'].value
-        weekly_hours_limit = sheet['B2'].value
-        daily_difficult_hours_limit = sheet['B3'].value
+        limits = [row_value(row, 0) for row in sheet.iter_rows(min_row=1, max_row=3, min_col=2, max_col=2,
+                                                                 values_only=True)]
+        limits += [None] * (3 - len(limits))
+        daily_hours_limit, weekly_hours_limit, daily_difficult_hours_limit = limits
 
         schedule_config = ScheduleConfig(daily_hours_limit, weekly_hours_limit, daily_difficult_hours_limit)
         self.data.set_schedule_config(schedule_config)
@@ -113,30 +204,23 @@ class ExcelParser:
     def parse_equipment_requirements(self):
         sheet = self.get_sheet('Требования по оснащению')
 
-        group_columns = ["C", "D", "E", "F", "G", "I", "J", "K", "L", "M"]
+        group_columns = self.read_group_columns(sheet, 3)  # Названия групп в строке 3
 
-        for row in range(4, sheet.max_row + 1):
-            subject_name = sheet[f"A{row}"].value  # Название предмета (столбец A)
+        for row in sheet.iter_rows(min_row=4, values_only=True):
+            subject_name = row_value(row, 0)  # Название предмета (столбец A)
 
             if not subject_name:
                 continue
 
-            for col in group_columns:
-                cell = sheet[f"{col}{row}"]
-                group_name = sheet[f"{col}3"].value  # Название группы в строке 3
-
-                if group_name and cell.value:
-                    equipment_requirement = cell.value
+            for col, group_name in group_columns:
+                equipment_requirement = row_value(row, col)
 
+                if equipment_requirement:
                     # Проверка на знак "-", если есть, заменяем на None
                     if equipment_requirement == "-":
                         equipment_requirement = None
 
-                    if group_name not in self.data.groups:
-                        group = ClassGroup(group_name)
-                        self.data.add_group(group)
-                    else:
-                        group = self.data.groups[group_name]
+                    group = self.get_group(group_name)
 
                     if subject_name in group.subjects:
                         group.subjects[subject_name].equipment_requirement = equipment_requirement
@@ -147,12 +231,11 @@ class ExcelParser:
     def parse_teacher_matrix(self):
         sheet = self.get_sheet('Матрицы преподавателей')
 
-        group_columns = ["C", "D", "E", "F", "G", "H", "I", "J", "K", "L"]
-        groups = [sheet[f"{col}2"].value for col in group_columns]
+        group_columns = self.read_group_columns(sheet, 2)
 
-        for row in range(3, sheet.max_row + 1):
-            teacher_name = sheet[f"A{row}"].value  # Имя преподавателя (столбец A)
-            subjects_string = sheet[f"B{row}"].value  # Предметы, которые ведет преподаватель (столбец B)
+        for row in sheet.iter_rows(min_row=3, values_only=True):
+            teacher_name = row_value(row, 0)  # Имя преподавателя (столбец A)
+            subjects_string = row_value(row, 1)  # Предметы, которые ведет преподаватель (столбец B)
 
             if not teacher_name or not subjects_string:
                 continue
@@ -161,26 +244,23 @@ class ExcelParser:
 
             if teacher_name not in self.data.teachers:
                 teacher = Teacher(teacher_name)
-                self.data.add_teacher(teacher)
             else:
                 teacher = self.data.teachers[teacher_name]
+                self.data._unindex_teacher(teacher)
 
             teacher.subjects_name.extend(subjects)
 
-            for col_index, group_name in enumerate(groups):
-                cell = sheet[f"{group_columns[col_index]}{row}"]
-
-                if cell.value == "X":
+            for col, group_name in group_columns:
+                if row_value(row, col) == "X":
                     if group_name not in teacher.available_groups_name:
                         teacher.available_groups_name.append(group_name)
 
-                    if group_name in self.data.groups:
-                        group = self.data.groups[group_name]
-                    else:
-                        group = ClassGroup(group_name)
-                        self.data.add_group(group)
+                    group = self.get_group(group_name)
 
                     for subject_name in subjects:
                         if subject_name not in group.subjects:
                             group_subject = Subject(subject_name)
                             group.add_subject(group_subject)
+
+            # Индексируем преподавателя после заполнения его предметов и групп
+            self.data.add_teacher(teacher)
@@ -0,0 +1,91 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+import numpy as np
+
+DIGEST_SIZE = 16
+
+
+def genome_keys(genomes: np.ndarray) -> list:
+    """
+    BLAKE2b digests of the rows of a C-contiguous genome array. Unlike hash(),
+    digests do not depend on the process (PYTHONHASHSEED), so keys computed
+    in different processes or runs match.
+    """
+    rows = genomes.reshape(genomes.shape[0], -1)
+    return [hashlib.blake2b(row.tobytes(), digest_size=DIGEST_SIZE).digest() for row in rows]
+
+
+class FitnessCache:
+    """
+    Bounded LRU map genome digest -> penalty.
+
+    The cache sits in front of the evaluator in the calling process: lookups
+    and inserts happen before chunks are sent to pool workers, which stay
+    stateless, so it is safe with every executor backend. A lock guards the
+    map for callers sharing one cache between threads, and entries (plain
+    bytes -> float) can be exported and merged, e.g. between islands.
+
+    Penalties depend on the evaluator, so the owner clears the cache when
+    the evaluator changes.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        if maxsize <= 0:
+            raise ValueError(f"Cache size must be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def lookup(self, keys: list) -> Tuple[np.ndarray, np.ndarray]:
+        """Penalties of the cached keys (NaN elsewhere) and the indices of the misses."""
+        penalties = np.full(len(keys), np.nan)
+        with self._lock:
+            entries = self._entries
+            for index, key in enumerate(keys):
+                penalty = entries.get(key)
+                if penalty is not None:
+                    entries.move_to_end(key)
+                    penalties[index] = penalty
+            missing = np.flatnonzero(np.isnan(penalties))
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return penalties, missing
+
+    def store(self, keys: list, penalties) -> None:
+        with self._lock:
+            entries = self._entries
+            for key, penalty in zip(keys, penalties):
+                entries[key] = float(penalty)
+                entries.move_to_end(key)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self._entries.items())
+
+    def update(self, items) -> None:
+        keys, penalties = zip(*items) if items else ((), ())
+        self.store(list(keys), penalties)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"size": len(self), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hit_rate}
@@ -1,93 +1,341 @@
 import gc
 import logging
 import random
-from itertools import product
+import time
 from pathlib import Path
 from pprint import pprint
-from typing import Dict, List, Tuple
+from typing import List
 
 import numpy as np
 from tqdm import tqdm
 from deap import base, creator, tools
 import matplotlib.pyplot as plt
-from numpy.random import shuffle, choice
-
+from numpy.random import choice
+
+from BatchEvaluator import EMPTY, BatchEvaluator
+from Checkpoint import GACheckpoint, capture_rng_state, restore_rng_state
+from Encoding import TripleEncoding
+from EvaluationExecutor import EvaluationExecutor
+from FitnessCache import DIGEST_SIZE, FitnessCache
+from IncrementalFitness import attach_state, cx_two_point_delta, mut_shuffle_delta
+from LocalSearch import LocalSearch
+from Metrics import Metrics
 from models import Config
+from Population import ArrayPopulation
+from ProblemModel import ProblemModel
+from Repair import FeasibilityRepair
+from ScheduleValidator import ValidationReport, validate_genomes
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+def _register_creator_types():
+    """
+    Creates the DEAP fitness and individual classes once per interpreter.
+
+    Called at import time so that processes started with the spawn or
+    forkserver methods get the classes as soon as they import this module
+    (e.g. to unpickle an Individual).
+    """
+    if not hasattr(creator, "FitnessMin"):
+        creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
+    if not hasattr(creator, "Individual"):
+        creator.create("Individual", list, fitness=creator.FitnessMin)
+
+
+_register_creator_types()
+
+
 class GeneticAlgorithm:
     def __init__(self,
-                 config: Config,
+                 config: Config = None,
                  population_size=200,
                  crossover_prob=0.7,
                  mut_pb=0.2,
-                 num_generations=50):
-        self.config = config
+                 num_generations=50,
+                 executor="serial",
+                 workers=None,
+                 chunk_size=256,
+                 start_method=None,
+                 incremental=False,
+                 verify_incremental=False,
+                 problem: ProblemModel = None,
+                 metrics: Metrics = None,
+                 hall_of_fame_size=1,
+                 checkpoint_path=None,
+                 checkpoint_interval=10,
+                 indpb=0.05,
+                 elitism=0,
+                 adaptive=False,
+                 diversity_target=0.3,
+                 target_fitness=None,
+                 stagnation_generations=None,
+                 time_budget=None,
+                 max_evaluations=None,
+                 repair=False,
+                 memetic=0,
+                 memetic_method="anneal",
+                 memetic_iterations=500,
+                 fitness_cache=0,
+                 population_backend="list"):
+        # With a problem model the GA optimizes the parsed workbook: sizes come
+        # from the model and the curriculum is part of the fitness
+        self.problem = problem
+        self.config = config if config is not None else problem.config()
         self.population_size = population_size
         self.crossover_prob = crossover_prob
         self.mut_pb = mut_pb
+        self.indpb = indpb
         self.num_generations = num_generations
 
+        # Rates used by the current generation; with adaptive=True they follow
+        # the population diversity, otherwise they stay at the values above
+        self.adaptive = adaptive
+        self.diversity_target = diversity_target
+        self.current_crossover_prob = crossover_prob
+        self.current_mut_pb = mut_pb
+        self.current_indpb = indpb
+        self.diversity = None
+
+        # Stopping criteria checked by run() before every generation; None disables one
+        self.target_fitness = target_fitness
+        self.stagnation_generations = stagnation_generations
+        self.time_budget = time_budget
+        self.max_evaluations = max_evaluations
+        self.stop_reason = None
+
+        # Evaluation backend: "serial", "thread" or "process"
+        self.executor_backend = executor
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.start_method = start_method
+        self._executor = None
+
+        # Delta fitness: operators keep per-individual conflict counters current
+        self.incremental = incremental
+        self.verify_incremental = verify_incremental
+
+        # Population storage: "list" (DEAP individuals) or "array" (one genome
+        # matrix and a fitness vector, see ArrayPopulation)
+        if population_backend not in ("list", "array"):
+            raise ValueError(f"Unknown population backend {population_backend!r}, expected 'list' or 'array'")
+        if population_backend == "array" and incremental:
+            raise ValueError("The array population backend keeps no per-individual conflict state")
+        self.population_backend = population_backend
+
+        # Feasibility repair (problem mode): curriculum-shaped initial population
+        # and a repair pass over every changed offspring
+        if repair and problem is None:
+            raise ValueError("Feasibility repair needs a problem model")
+        if repair and incremental:
+            raise ValueError("Feasibility repair rewrites genes behind the incremental conflict state")
+        self.repair = repair
+        self._repairer = None
+
+        # Memetic step: the `memetic` best offspring of every generation are
+        # refined by a local search with a fixed iteration budget (no clock,
+        # so runs stay reproducible)
+        if memetic and problem is None:
+            raise ValueError("The memetic step needs a problem model")
+        self.memetic = memetic
+        self.memetic_method = memetic_method
+        self.memetic_iterations = memetic_iterations
+        self._local_search = None
+
+        # Number of individuals scored so far, by the batch evaluator or by
+        # the delta operators in incremental mode
+        self.evaluations = 0
+
+        # Optional LRU cache of penalties by genome digest (size, 0 disables);
+        # cache hits do not count as evaluations
+        self.fitness_cache = FitnessCache(fitness_cache) if fitness_cache else None
+
+        # Optional per-phase timings; None keeps the loop free of timer calls
+        self.metrics = metrics
+
+        # Best individuals seen so far and the number of completed generations.
+        # The `elitism` best of them replace the worst offspring every generation
+        self.elitism = elitism
+        self.hall_of_fame = tools.HallOfFame(max(hall_of_fame_size, elitism, 1))
+        self.generation = 0
+        self.best_fitness = float("inf")
+        self.last_improvement = 0
+
+        # run() saves a checkpoint every `checkpoint_interval` generations and
+        # after the last one
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+
+        self._encoding = None
+        self._encoding_key = None
+        self._evaluator = None
+        self._evaluator_key = None
+
         self.toolbox = base.Toolbox()
         self._setup_deap()
 
     def _setup_deap(self):
-        creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
-        creator.create("Individual", list, fitness=creator.FitnessMin)
-
-        self.encoding_list = list(self.encoding.keys())
+        _register_creator_types()
 
         # Register functions to create individuals and populations
-        self.toolbox.register("attr_index", random.choice, self.encoding_list)  # Fixed this line
+        self.toolbox.register("attr_index", random.randrange, len(self.encoding))
         # self.toolbox.register("individual", tools.initRepeat, creator.Individual,
         #                       self.toolbox.attr_index, n=48)  # 6 days, 8 hours => 6*8 = 48 slots
-        self.toolbox.register("individual", lambda: creator.Individual(self.initialize_agent().flatten()))
-        self.toolbox.register("population", tools.initRepeat, list, self.toolbox.individual)
+        self.toolbox.register("individual", lambda: creator.Individual(self.initialize_agent().flatten().tolist()))
+        if self.repair:
+            self.toolbox.register("population", self.repaired_population)
+        else:
+            self.toolbox.register("population", tools.initRepeat, list, self.toolbox.individual)
 
         # Register the evaluation function
         self.toolbox.register("evaluate", self.evaluate_schedule)
 
         # Register genetic operators
-        self.toolbox.register("mate", tools.cxTwoPoint)
-        self.toolbox.register("mutate", tools.mutShuffleIndexes, indpb=0.05)
+        if self.incremental:
+            self.toolbox.register("mate", lambda ind1, ind2: cx_two_point_delta(ind1, ind2, self.evaluator))
+            self.toolbox.register("mutate", lambda ind: mut_shuffle_delta(ind, self.evaluator,
+                                                                          indpb=self.current_indpb))
+        else:
+            self.toolbox.register("mate", tools.cxTwoPoint)
+            self.toolbox.register("mutate", lambda ind: tools.mutShuffleIndexes(ind, indpb=self.current_indpb))
         self.toolbox.register("select", tools.selTournament, tournsize=3)
 
     @property
-    def encoding(self) -> Dict[int, Tuple[int, int, int]]:
+    def encoding(self) -> TripleEncoding:
         """
-        Maps id (int, primary) --> triple (teacher, subject, classroom) represents
-        a single slot in the schedule.
+        Maps id (int, primary) <--> triple (teacher, subject, classroom) represents
+        a single slot in the schedule. Built once and rebuilt only when the
+        relevant Config sizes change.
         """
-        # groups = list(range(self.config.n_groups))
-        teachers = list(range(self.config.n_teachers))
-        subjects = list(range(self.config.n_subjects))
-        classrooms = list(range(self.config.n_classrooms))
+        key = (self.config.n_teachers, self.config.n_subjects, self.config.n_classrooms)
+        if self._encoding is None or self._encoding_key != key:
+            self._encoding = TripleEncoding.from_config(self.config)
+            self._encoding_key = key
+
+        return self._encoding
 
-        triples = list(product(*[teachers, subjects, classrooms]))
+    @property
+    def evaluator(self) -> BatchEvaluator:
+        """Batch fitness evaluator, rebuilt only when Config changes."""
+        key = tuple(vars(self.config).values())
+        if self._evaluator is None or self._evaluator_key != key:
+            self._evaluator = BatchEvaluator(self.config, self.encoding, problem=self.problem)
+            self._evaluator_key = key
+
+        return self._evaluator
 
-        return dict(zip(range(len(triples)), triples))
+    @property
+    def executor(self) -> EvaluationExecutor:
+        """Evaluation backend wrapping the current evaluator."""
+        evaluator = self.evaluator
+        if self._executor is None or self._executor.evaluator is not evaluator:
+            self.close()
+            if self.fitness_cache is not None:
+                self.fitness_cache.clear()
+            self._executor = EvaluationExecutor(evaluator,
+                                                backend=self.executor_backend,
+                                                workers=self.workers,
+                                                chunk_size=self.chunk_size,
+                                                start_method=self.start_method,
+                                                genome_dtype=self.encoding.index_dtype,
+                                                cache=self.fitness_cache)
+
+        return self._executor
+
+    @property
+    def repairer(self) -> FeasibilityRepair:
+        """Feasibility repair operator of the problem model."""
+        if self._repairer is None or self._repairer.encoding is not self.encoding:
+            self._repairer = FeasibilityRepair(self.problem, self.encoding)
+
+        return self._repairer
+
+    @property
+    def local_search(self) -> LocalSearch:
+        """Local search used by the memetic step, rebuilt with the evaluator."""
+        evaluator = self.evaluator
+        if self._local_search is None or self._local_search.evaluator is not evaluator:
+            self._local_search = LocalSearch(evaluator, method=self.memetic_method, time_budget=None,
+                                             max_iterations=self.memetic_iterations)
+
+        return self._local_search
+
+    def close(self):
+        """Shuts down the worker pool of the evaluation backend, if any."""
+        if self._executor is not None:
+            self._executor.close()
+            self._executor = None
 
     def initialize_agent(self) -> np.ndarray:
         """Agent is a 6x8 (6 days, 8 hours)  matrix where each element is an index
         of the encoding dictionary"""
 
-        agent = np.full((self.config.n_groups, self.config.n_days, self.config.n_hours), -1)
-        triple_idxs = list(self.encoding.keys())
+        shape = (self.config.n_groups, self.config.n_days, self.config.n_hours)
+        if self.problem is None:
+            return choice(len(self.encoding), size=shape)
 
-        for group in range(self.config.n_groups):
-            available_slots = [(day, hour) for day in range(self.config.n_days)
-                               for hour in range(self.config.n_hours)]
-            shuffle(available_slots)
-
-            for day, hour in available_slots:
-                agent[group, day, hour] = choice(triple_idxs)
+        # One gene per required weekly hour of the group, placed in random
+        # slots; the remaining slots stay free
+        agent = np.full(shape, EMPTY, dtype=np.int64)
+        n_slots = self.config.n_days * self.config.n_hours
+        required = np.minimum(self.problem.required_hours.sum(axis=1), n_slots)
+        for group, hours in enumerate(required):
+            slots = choice(n_slots, size=hours, replace=False)
+            agent[group].flat[slots] = choice(len(self.encoding), size=hours)
 
         return agent
 
+    def repaired_population(self, n: int) -> List[List[int]]:
+        """
+        Initial population that already follows the curriculum: every group gets
+        exactly its weekly hours, with eligible teachers and equipped rooms, in
+        gap-free blocks per day.
+        """
+        genomes = self.repairer.repair(self.repairer.empty(n))
+        return [creator.Individual(genome) for genome in genomes.tolist()]
+
+    def repair_individuals(self, individuals: List[List[int]]) -> None:
+        """Repairs the given individuals in place, in one batch."""
+        if not individuals:
+            return
+
+        genomes = self.repairer.repair(np.asarray(individuals, dtype=self.encoding.index_dtype))
+        for ind, genome in zip(individuals, genomes.tolist()):
+            ind[:] = genome
+
+    def array_population(self, n: int) -> ArrayPopulation:
+        """Initial population of the array backend, same distribution as toolbox.population."""
+        if self.repair:
+            genomes = self.repairer.repair(self.repairer.empty(n))
+        elif self.problem is None:
+            genomes = choice(len(self.encoding), size=(n, self.config.n_groups * self.config.n_days
+                                                       * self.config.n_hours))
+        else:
+            genomes = np.stack([self.initialize_agent().ravel() for _ in range(n)])
+        return ArrayPopulation(genomes.astype(self.encoding.index_dtype))
+
+    def evaluate_rows(self, population: ArrayPopulation, rows: np.ndarray) -> None:
+        """Scores the given rows of an array population in one batch."""
+        if not len(rows):
+            return
+
+        executor = self.executor
+        evaluated = executor.evaluated
+        population.fitness[rows] = executor.evaluate(population.genomes[rows])
+        self.evaluations += executor.evaluated - evaluated
+
+    def refine_best(self, individuals: List[List[int]]) -> None:
+        """Replaces the `memetic` best individuals by their local-search refinements."""
+        ranked = sorted(individuals, key=lambda ind: ind.fitness.values[0])[:self.memetic]
+        for ind in ranked:
+            genome, penalty = self.local_search.run(np.asarray(ind, dtype=np.int64))
+            ind[:] = genome.tolist()
+            ind.fitness.values = (penalty,)
+            if self.incremental:
+                attach_state(self.evaluator, ind)
+
     # def get_valid_triples(self, agent: np.ndarray, day: int, hour: int) -> list:
     #     """
     #     Get a list of valid (subject, teacher, classroom) triples that can be placed
@@ -123,18 +371,23 @@ class GeneticAlgorithm:
         """
         Evaluate the fitness of an individual (schedule).
         The function returns a penalty score based on how many constraints are violated.
+        With a problem model the curriculum rules are scored by the batch evaluator.
         """
+        if self.problem is not None:
+            return float(self.evaluator.evaluate(np.asarray([individual]))[0]),
+
         penalty = 0
 
         # Constraint 1: No teacher should be in two places at the same time
         teacher_slots, classroom_slots = {}, {}
         student_schedule = {day: [] for day in range(self.config.n_days)}
+        encoding = self.encoding
 
         for idx, triple_idx in enumerate(individual):
 
             day = idx % self.config.n_days
             hour = idx % self.config.n_hours
-            teacher, subject, classroom = self.encoding[triple_idx]
+            teacher, subject, classroom = encoding.decode(triple_idx)
 
             student_schedule[day].append(hour)
 
@@ -161,25 +414,102 @@ class GeneticAlgorithm:
 
         return penalty,
 
+    def evaluate_population(self, individuals: List[List[int]]) -> None:
+        """
+        Scores all given individuals with a single batch evaluator call and
+        stores the penalties in their fitness.
+        """
+        if not individuals:
+            return
+
+        genomes = np.asarray(individuals, dtype=self.encoding.index_dtype)
+        executor = self.executor
+        evaluated = executor.evaluated
+        penalties = executor.evaluate(genomes)
+        self.evaluations += executor.evaluated - evaluated
+
+        for ind, penalty in zip(individuals, penalties):
+            ind.fitness.values = (float(penalty),)
+
+        if self.incremental:
+            for ind in individuals:
+                attach_state(self.evaluator, ind)
+
+    def verify_fitness(self, individuals: List[List[int]]) -> None:
+        """Full rescore of the given individuals, raises if a stored fitness is stale."""
+        penalties = self.evaluator.evaluate(np.asarray(individuals, dtype=self.encoding.index_dtype))
+
+        for ind, penalty in zip(individuals, penalties):
+            if ind.fitness.values[0] != penalty:
+                raise RuntimeError(f"Incremental penalty {ind.fitness.values[0]} "
+                                   f"differs from full evaluation {penalty}")
+
     def generation_evolutionary_loop(self, population: List[List[int]]
                                      ) -> np.ndarray[np.ndarray[np.int8]]:
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.start_generation(self.evaluations)
+
+        if self.adaptive:
+            self.adapt_rates(population)
+
         offspring = self.toolbox.select(population, len(population))
+        if metrics is not None:
+            metrics.lap("select")
         offspring = list(map(self.toolbox.clone, offspring))
+        if metrics is not None:
+            metrics.lap("clone")
 
-        # Apply crossover and mutation
+        # Apply crossover and mutation. Delta operators rescore offspring in
+        # place and keep their fitness valid, so they are counted separately
+        delta_scored = set()
         for child1, child2 in zip(offspring[::2], offspring[1::2]):
-            if random.random() < self.crossover_prob:
+            if random.random() < self.current_crossover_prob:
                 self.toolbox.mate(child1, child2)
+                if self.incremental:
+                    delta_scored.update((id(child1), id(child2)))
+                else:
+                    del child1.fitness.values
+                    del child2.fitness.values
+        if metrics is not None:
+            metrics.lap("mate")
 
         for mutant in offspring:
-            if random.random() < self.mut_pb:
+            if random.random() < self.current_mut_pb:
                 self.toolbox.mutate(mutant)
+                if self.incremental:
+                    delta_scored.add(id(mutant))
+                else:
+                    del mutant.fitness.values
+        if metrics is not None:
+            metrics.lap("mutate")
+
+        if self.repair:
+            self.repair_individuals([ind for ind in offspring if not ind.fitness.valid])
+            if metrics is not None:
+                metrics.lap("repair")
+
+        if self.incremental and self.verify_incremental:
+            self.verify_fitness(offspring)
 
         # Evaluate the individuals with an invalid fitness
+        self.evaluations += len(delta_scored)
         invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-        fitnesses = map(self.toolbox.evaluate, invalid_ind)
-        for ind, fit in zip(invalid_ind, fitnesses):
-            ind.fitness.values = fit
+        self.evaluate_population(invalid_ind)
+        if metrics is not None:
+            metrics.lap("evaluate")
+
+        if self.memetic:
+            self.refine_best(offspring)
+            if metrics is not None:
+                metrics.lap("local_search")
+
+        # Elitism: the best individuals found so far replace the worst offspring
+        if self.elitism:
+            elites = self.hall_of_fame[:self.elitism]
+            worst = sorted(range(len(offspring)), key=lambda i: offspring[i].fitness.values[0])[-len(elites):]
+            for index, elite in zip(worst, elites):
+                offspring[index] = self.toolbox.clone(elite)
 
         # Replace the old population with the new one
         population[:] = offspring
@@ -196,19 +526,247 @@ class GeneticAlgorithm:
         logger.info(f"Avg: {mean}")
         logger.info(f"Std: {std}")
 
+        self.hall_of_fame.update(population)
+        self.generation += 1
+        self._track_best()
+
+        if metrics is not None:
+            metrics.lap("stats")
+            metrics.end_generation(self.evaluations, best=min(fits))
+
         return population
 
-    def run(self):
-        next_generation = self.toolbox.population(n=self.population_size)
-        fitnesses = map(self.toolbox.evaluate, next_generation)
+    def array_generation(self, population: ArrayPopulation) -> ArrayPopulation:
+        """One generation of the array backend; same steps as generation_evolutionary_loop."""
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.start_generation(self.evaluations)
+
+        if self.adaptive:
+            self.adapt_rates(population)
+
+        parents = population.select_tournament(3)
+        if metrics is not None:
+            metrics.lap("select")
+        population.breed(parents)
+        if metrics is not None:
+            metrics.lap("clone")
+
+        population.crossover_two_point(self.current_crossover_prob)
+        if metrics is not None:
+            metrics.lap("mate")
+        population.mutate_shuffle(self.current_mut_pb, self.current_indpb)
+        if metrics is not None:
+            metrics.lap("mutate")
+
+        if self.repair:
+            rows = population.invalid()
+            if len(rows):
+                population.genomes[rows] = self.repairer.repair(population.genomes[rows])
+            if metrics is not None:
+                metrics.lap("repair")
+
+        self.evaluate_rows(population, population.invalid())
+        if metrics is not None:
+            metrics.lap("evaluate")
+
+        if self.memetic:
+            for row in population.best(self.memetic):
+                genome, penalty = self.local_search.run(population.genomes[row])
+                population.genomes[row] = genome
+                population.fitness[row] = penalty
+            if metrics is not None:
+                metrics.lap("local_search")
+
+        if self.elitism:
+            elites = self.hall_of_fame[:self.elitism]
+            worst = population.worst(len(elites))
+            population.genomes[worst] = np.asarray(elites, dtype=population.genomes.dtype)
+            population.fitness[worst] = [elite.fitness.values[0] for elite in elites]
+
+        fits = population.fitness
+        logger.info(f"Min: {fits.min()}")
+        logger.info(f"Max: {fits.max()}")
+        logger.info(f"Avg: {fits.mean()}")
+        logger.info(f"Std: {fits.std()}")
+
+        self._update_hall_of_fame(population)
+        self.generation += 1
+        self._track_best()
+
+        if metrics is not None:
+            metrics.lap("stats")
+            metrics.end_generation(self.evaluations, best=float(fits.min()))
 
-        for ind, fit in zip(next_generation, fitnesses):
-            ind.fitness.values = fit
+        return population
 
-        print(type(next_generation))
+    def validate_elites(self) -> ValidationReport:
+        """
+        Hard/soft constraint report for the hall of fame, one schedule per
+        elite, best first. Problem mode only: legacy genomes carry no
+        groups, days or limits to check.
+        """
+        if self.problem is None:
+            raise ValueError("Validation needs a problem model")
+        genomes = np.asarray([list(ind) for ind in self.hall_of_fame], dtype=self.encoding.index_dtype)
+        return validate_genomes(genomes, self.encoding, self.problem)
+
+    def _update_hall_of_fame(self, population) -> None:
+        # The array backend only materializes the few rows that can enter the hall of fame
+        if isinstance(population, ArrayPopulation):
+            top = population.best(self.hall_of_fame.maxsize)
+            population = self._individuals(population.genomes[top], population.fitness[top])
+        self.hall_of_fame.update(population)
+
+    def _population_arrays(self, population):
+        if isinstance(population, ArrayPopulation):
+            return population.genomes, population.fitness
+        return (np.asarray(population, dtype=self.encoding.index_dtype),
+                np.array([ind.fitness.values[0] for ind in population], dtype=np.float64))
+
+    def population_diversity(self, population) -> float:
+        """Mean share of genes in which an individual differs from the best one."""
+        genomes, fitness = self._population_arrays(population)
+        return float(np.mean(genomes != genomes[np.argmin(fitness)]))
+
+    def adapt_rates(self, population) -> None:
+        """
+        Sets the rates of the next generation from the population diversity.
+        At or above `diversity_target` the configured rates are used; as the
+        population converges, mutation grows (rate up to halfway to 1, gene
+        probability up to 4x) and crossover shrinks to half, so a collapsed
+        population is pushed back out instead of breeding copies.
+        """
+        self.diversity = self.population_diversity(population)
+        pressure = min(max(1.0 - self.diversity / self.diversity_target, 0.0), 1.0)
+
+        self.current_crossover_prob = self.crossover_prob * (1.0 - 0.5 * pressure)
+        self.current_mut_pb = self.mut_pb + (1.0 - self.mut_pb) * 0.5 * pressure
+        self.current_indpb = self.indpb * (1.0 + 3.0 * pressure)
+        logger.info(f"Diversity: {self.diversity:.3f}, cxpb: {self.current_crossover_prob:.3f}, "
+                    f"mutpb: {self.current_mut_pb:.3f}, indpb: {self.current_indpb:.3f}")
+
+    def _track_best(self) -> None:
+        best = self.hall_of_fame[0].fitness.values[0]
+        if best < self.best_fitness:
+            self.best_fitness = best
+            self.last_improvement = self.generation
+
+    def check_stop(self, started: float) -> bool:
+        """Sets `stop_reason` and returns True once any stopping criterion is met."""
+        if self.target_fitness is not None and self.best_fitness <= self.target_fitness:
+            self.stop_reason = "target_fitness"
+        elif (self.stagnation_generations is not None
+              and self.generation - self.last_improvement >= self.stagnation_generations):
+            self.stop_reason = "stagnation"
+        elif self.time_budget is not None and time.perf_counter() - started >= self.time_budget:
+            self.stop_reason = "time_budget"
+        elif self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.stop_reason = "max_evaluations"
+        return self.stop_reason is not None
+
+    def _individuals(self, genomes: np.ndarray, fitness: np.ndarray) -> List[List[int]]:
+        individuals = []
+        for genome, value in zip(genomes.tolist(), fitness.tolist()):
+            ind = creator.Individual(genome)
+            ind.fitness.values = (value,)
+            individuals.append(ind)
+        return individuals
+
+    def save_checkpoint(self, population, path=None) -> None:
+        """Writes the population, hall of fame, counters and RNG states to `path`."""
+        dtype = self.encoding.index_dtype
+        n_genes = self.config.n_groups * self.config.n_days * self.config.n_hours
+        hof = list(self.hall_of_fame)
+        genomes, fitness = self._population_arrays(population)
+        GACheckpoint(generation=self.generation,
+                     evaluations=self.evaluations,
+                     genomes=genomes,
+                     fitness=fitness,
+                     hof_genomes=np.asarray(hof, dtype=dtype).reshape(len(hof), n_genes),
+                     hof_fitness=np.array([ind.fitness.values[0] for ind in hof], dtype=np.float64),
+                     rng_state=capture_rng_state(),
+                     last_improvement=self.last_improvement,
+                     **self._cache_arrays()).save(path or self.checkpoint_path)
+
+    def _cache_arrays(self) -> dict:
+        # Fitness cache entries in LRU order as checkpoint arrays
+        items = self.fitness_cache.items() if self.fitness_cache is not None else []
+        keys = np.frombuffer(b"".join(key for key, _ in items), dtype=np.uint8).reshape(-1, DIGEST_SIZE)
+        return {"cache_keys": keys,
+                "cache_penalties": np.array([penalty for _, penalty in items], dtype=np.float64)}
+
+    def load_checkpoint(self, path=None):
+        """
+        Restores the state saved by save_checkpoint (including the global RNG
+        states) and returns the population to continue from.
+        """
+        checkpoint = GACheckpoint.load(path or self.checkpoint_path)
+        n_genes = self.config.n_groups * self.config.n_days * self.config.n_hours
+        if checkpoint.genomes.shape[1] != n_genes:
+            raise ValueError(f"Checkpoint genomes have {checkpoint.genomes.shape[1]} genes, expected {n_genes}")
+
+        self.generation = checkpoint.generation
+        self.evaluations = checkpoint.evaluations
+        self.hall_of_fame.clear()
+        self.hall_of_fame.update(self._individuals(checkpoint.hof_genomes, checkpoint.hof_fitness))
+        self.best_fitness = self.hall_of_fame[0].fitness.values[0] if len(self.hall_of_fame) else float("inf")
+        self.last_improvement = checkpoint.last_improvement
+        restore_rng_state(checkpoint.rng_state)
+        if self.fitness_cache is not None:
+            # A new executor clears the cache, so it is built before the entries are restored
+            self.executor
+            self.fitness_cache.clear()
+            self.fitness_cache.update([(key.tobytes(), penalty) for key, penalty
+                                       in zip(checkpoint.cache_keys, checkpoint.cache_penalties.tolist())])
+
+        if self.population_backend == "array":
+            return ArrayPopulation(checkpoint.genomes.astype(self.encoding.index_dtype), checkpoint.fitness)
+        return self._individuals(checkpoint.genomes, checkpoint.fitness)
+
+    def run(self, resume_from=None):
+        """
+        Evolves for `num_generations` generations in total. With `resume_from`
+        the run continues from that checkpoint, e.g. after a preemption or
+        with a larger `num_generations`. Stops earlier when a stopping
+        criterion is met; `stop_reason` then names it.
 
-        for _ in tqdm(range(self.num_generations)):
-            next_generation = self.generation_evolutionary_loop(next_generation)
+        Returns the final population: a list of individuals, or an
+        ArrayPopulation with population_backend="array".
+        """
+        started = time.perf_counter()
+        self.stop_reason = None
+        array_backend = self.population_backend == "array"
+        step = self.array_generation if array_backend else self.generation_evolutionary_loop
+        if resume_from is not None:
+            next_generation = self.load_checkpoint(resume_from)
+        else:
+            self.generation = 0
+            self.best_fitness = float("inf")
+            self.last_improvement = 0
+            self.hall_of_fame.clear()
+            if array_backend:
+                next_generation = self.array_population(self.population_size)
+                self.evaluate_rows(next_generation, next_generation.invalid())
+            else:
+                next_generation = self.toolbox.population(n=self.population_size)
+                self.evaluate_population(next_generation)
+            self._update_hall_of_fame(next_generation)
+            self._track_best()
+
+        try:
+            for _ in tqdm(range(self.generation, self.num_generations)):
+                if self.check_stop(started):
+                    logger.info(f"Stopped after {self.generation} generations: {self.stop_reason}")
+                    if self.checkpoint_path is not None:
+                        self.save_checkpoint(next_generation)
+                    break
+                next_generation = step(next_generation)
+                if self.checkpoint_path is not None and (self.generation % self.checkpoint_interval == 0
+                                                         or self.generation == self.num_generations):
+                    self.save_checkpoint(next_generation)
+        finally:
+            self.close()
 
         return next_generation
 
@@ -0,0 +1,213 @@
+import random
+
+import numpy as np
+
+from BatchEvaluator import (BatchEvaluator, CLASSROOM_CLASH_PENALTY, GAP_PENALTY, HOURS_PENALTY,
+                            TEACHER_CLASH_PENALTY, gaps_from_counts)
+
+
+def bucket_gaps(hour_counts: np.ndarray) -> int:
+    """Gaps of a single bucket given its per-hour occupancy counts."""
+    return int(gaps_from_counts(np.asarray(hour_counts)))
+
+
+class ConflictState:
+    """
+    Incremental conflict bookkeeping of one individual.
+
+    Holds the occupancy counts the batch evaluator would compute from scratch:
+    bookings per (teacher, slot) and per (classroom, slot), hour occupancy per
+    gap bucket and the resulting gap count of every bucket. In problem mode it
+    also keeps the placed hours per (group, subject). update() moves genes
+    from one triple to another and adjusts `penalty` by the delta, so
+    operators can keep the fitness current in O(changed genes).
+
+    The mapping arrays live on the evaluator, which is passed to every call,
+    so that toolbox.clone only copies the counters.
+    """
+
+    def __init__(self, teacher_counts, classroom_counts, bucket_counts, gap_counts, penalty, hour_counts=None):
+        self.teacher_counts = teacher_counts
+        self.classroom_counts = classroom_counts
+        self.bucket_counts = bucket_counts
+        self.gap_counts = gap_counts
+        self.penalty = penalty
+        self.hour_counts = hour_counts
+
+    @classmethod
+    def build(cls, evaluator: BatchEvaluator, genome) -> "ConflictState":
+        genome = np.asarray(genome, dtype=np.int64)
+        n_slots = evaluator.n_slots
+        n_hours = evaluator.config.n_hours
+        positions = np.flatnonzero(genome >= 0)
+        values = genome[positions]
+
+        teacher_counts = np.bincount(evaluator.teacher_of[values].astype(np.int64) * n_slots
+                                     + evaluator.gene_slot[positions],
+                                     minlength=evaluator.config.n_teachers * n_slots)
+        classroom_counts = np.bincount(evaluator.classroom_of[values].astype(np.int64) * n_slots
+                                       + evaluator.gene_slot[positions],
+                                       minlength=evaluator.config.n_classrooms * n_slots)
+        bucket_counts = np.bincount(evaluator.gene_bucket_hour[positions],
+                                    minlength=evaluator.n_buckets * n_hours).reshape(evaluator.n_buckets, n_hours)
+        gap_counts = gaps_from_counts(bucket_counts)
+
+        penalty = (TEACHER_CLASH_PENALTY * int(np.maximum(teacher_counts - 1, 0).sum())
+                   + CLASSROOM_CLASH_PENALTY * int(np.maximum(classroom_counts - 1, 0).sum())
+                   + GAP_PENALTY * int(gap_counts.sum()))
+
+        hour_counts = None
+        if evaluator.problem is not None:
+            hour_counts = np.bincount(cls._hour_keys(evaluator, positions, values),
+                                      minlength=evaluator.required_hours.shape[0])
+            penalty += HOURS_PENALTY * int(np.abs(hour_counts - evaluator.required_hours).sum())
+            penalty += int(evaluator.gene_penalty(positions, values).sum())
+
+        return cls(teacher_counts, classroom_counts, bucket_counts, gap_counts, penalty, hour_counts)
+
+    @staticmethod
+    def _hour_keys(evaluator: BatchEvaluator, positions: np.ndarray, values: np.ndarray) -> np.ndarray:
+        return evaluator.gene_group[positions] * evaluator.config.n_subjects + evaluator.subject_of[values]
+
+    def update(self, evaluator: BatchEvaluator, positions, old, new) -> None:
+        """
+        Moves the genes at `positions` from triples `old` to triples `new`.
+        Positions keep their slot, so as long as no gene becomes free or
+        occupied (always the case without a problem) bucket occupancy and gap
+        counts are unaffected and only the teacher and classroom bookings
+        move. The penalty delta is computed over the touched counters only.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if positions.size == 0:
+            return
+
+        old = np.asarray(old, dtype=np.int64)
+        new = np.asarray(new, dtype=np.int64)
+        old_occupied, new_occupied = old >= 0, new >= 0
+        old_positions, old = positions[old_occupied], old[old_occupied]
+        new_positions, new = positions[new_occupied], new[new_occupied]
+        old_slots = evaluator.gene_slot[old_positions]
+        new_slots = evaluator.gene_slot[new_positions]
+
+        self.penalty += TEACHER_CLASH_PENALTY * self._move(
+            self.teacher_counts, evaluator.teacher_of[old] * evaluator.n_slots + old_slots,
+            evaluator.teacher_of[new] * evaluator.n_slots + new_slots)
+        self.penalty += CLASSROOM_CLASH_PENALTY * self._move(
+            self.classroom_counts, evaluator.classroom_of[old] * evaluator.n_slots + old_slots,
+            evaluator.classroom_of[new] * evaluator.n_slots + new_slots)
+
+        if evaluator.problem is None:
+            return
+
+        flipped = old_occupied != new_occupied
+        if flipped.any():
+            self._move_occupancy(evaluator, positions[flipped & old_occupied], positions[flipped & new_occupied])
+
+        self.penalty += HOURS_PENALTY * self._move_hours(
+            evaluator, self._hour_keys(evaluator, old_positions, old), self._hour_keys(evaluator, new_positions, new))
+        self.penalty += int(evaluator.gene_penalty(new_positions, new).sum()
+                            - evaluator.gene_penalty(old_positions, old).sum())
+
+    def _move_occupancy(self, evaluator: BatchEvaluator, freed: np.ndarray, filled: np.ndarray) -> None:
+        """Frees and fills gene positions, recounting the gaps of the touched buckets."""
+        flat = self.bucket_counts.reshape(-1)
+        np.subtract.at(flat, evaluator.gene_bucket_hour[freed], 1)
+        np.add.at(flat, evaluator.gene_bucket_hour[filled], 1)
+
+        touched = np.unique(evaluator.gene_bucket[np.concatenate((freed, filled))])
+        gaps = gaps_from_counts(self.bucket_counts[touched])
+        self.penalty += GAP_PENALTY * int(gaps.sum() - self.gap_counts[touched].sum())
+        self.gap_counts[touched] = gaps
+
+    def _move_hours(self, evaluator: BatchEvaluator, removed: np.ndarray, added: np.ndarray) -> int:
+        """Applies the placed hours and returns the change in hour deviation."""
+        touched = np.unique(np.concatenate((removed, added)))
+        required = evaluator.required_hours[touched]
+        before = int(np.abs(self.hour_counts[touched] - required).sum())
+        np.subtract.at(self.hour_counts, removed, 1)
+        np.add.at(self.hour_counts, added, 1)
+        after = int(np.abs(self.hour_counts[touched] - required).sum())
+        return after - before
+
+    @staticmethod
+    def _move(counts: np.ndarray, removed: np.ndarray, added: np.ndarray) -> int:
+        """Applies the bookings and returns the change in extra bookings."""
+        touched = np.unique(np.concatenate((removed, added)))
+        before = int(np.maximum(counts[touched] - 1, 0).sum())
+        np.subtract.at(counts, removed, 1)
+        np.add.at(counts, added, 1)
+        after = int(np.maximum(counts[touched] - 1, 0).sum())
+        return after - before
+
+
+def attach_state(evaluator: BatchEvaluator, individual) -> ConflictState:
+    individual.conflict_state = ConflictState.build(evaluator, individual)
+    individual.fitness.values = (float(individual.conflict_state.penalty),)
+    return individual.conflict_state
+
+
+def _state_of(evaluator: BatchEvaluator, individual) -> ConflictState:
+    state = getattr(individual, "conflict_state", None)
+    if state is None:
+        state = attach_state(evaluator, individual)
+    return state
+
+
+def mut_shuffle_delta(individual, evaluator: BatchEvaluator, indpb: float):
+    """
+    Same moves (and random number draws) as tools.mutShuffleIndexes; the net
+    change of the swapped positions is then applied to the conflict state,
+    so the fitness stays valid.
+    """
+    state = _state_of(evaluator, individual)
+    size = len(individual)
+    touched = {}
+
+    for i in range(size):
+        if random.random() < indpb:
+            swap_indx = random.randint(0, size - 2)
+            if swap_indx >= i:
+                swap_indx += 1
+
+            touched.setdefault(i, individual[i])
+            touched.setdefault(swap_indx, individual[swap_indx])
+            individual[i], individual[swap_indx] = individual[swap_indx], individual[i]
+
+    if touched:
+        positions = np.fromiter(touched.keys(), dtype=np.int64, count=len(touched))
+        old = np.fromiter(touched.values(), dtype=np.int64, count=len(touched))
+        new = np.fromiter((individual[position] for position in touched), dtype=np.int64, count=len(touched))
+        state.update(evaluator, positions, old, new)
+
+    individual.fitness.values = (float(state.penalty),)
+    return individual,
+
+
+def cx_two_point_delta(ind1, ind2, evaluator: BatchEvaluator):
+    """
+    Same cut points (and random number draws) as tools.cxTwoPoint; the swapped
+    segment is applied to both conflict states in one vectorized update.
+    """
+    state1 = _state_of(evaluator, ind1)
+    state2 = _state_of(evaluator, ind2)
+    size = min(len(ind1), len(ind2))
+
+    cxpoint1 = random.randint(1, size)
+    cxpoint2 = random.randint(1, size - 1)
+    if cxpoint2 >= cxpoint1:
+        cxpoint2 += 1
+    else:  # Swap the two cx points
+        cxpoint1, cxpoint2 = cxpoint2, cxpoint1
+
+    segment1 = np.asarray(ind1[cxpoint1:cxpoint2], dtype=np.int64)
+    segment2 = np.asarray(ind2[cxpoint1:cxpoint2], dtype=np.int64)
+    changed = np.flatnonzero(segment1 != segment2)
+    positions = changed + cxpoint1
+
+    state1.update(evaluator, positions, segment1[changed], segment2[changed])
+    state2.update(evaluator, positions, segment2[changed], segment1[changed])
+    ind1[cxpoint1:cxpoint2], ind2[cxpoint1:cxpoint2] = ind2[cxpoint1:cxpoint2], ind1[cxpoint1:cxpoint2]
+
+    ind1.fitness.values = (float(state1.penalty),)
+    ind2.fitness.values = (float(state2.penalty),)
+    return ind1, ind2
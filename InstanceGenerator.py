@@ -0,0 +1,255 @@
+import math
+import random
+from dataclasses import dataclass, replace
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill
+
+from Entities import ClassGroup, MainData, Room, ScheduleConfig, Subject, Teacher
+
+DAYS = 6
+SLOTS = 8
+EQUIPMENT_KINDS = ("Компьютерное", "Химическое", "Лингвистическое")
+DIFFICULT_FILL = PatternFill(fill_type="solid", start_color="FFFFC000", end_color="FFFFC000")
+
+
+@dataclass
+class InstanceSpec:
+    """
+    Parameters of a synthetic instance.
+
+    density   - share of the weekly slots (6 x 8) every group has lessons in.
+    tightness - 0..1, scales how hard the instance is: teacher load (fewer
+                teachers per hour taught), spare rooms, and the share of
+                subjects with day/time restrictions.
+    n_campuses - independent campuses the groups are split over; each has
+                 its own teachers and its own building of rooms.
+    """
+    n_groups: int = 10
+    n_subjects: int = 16
+    density: float = 0.8
+    tightness: float = 0.5
+    difficult_share: float = 0.4
+    other_building_share: float = 0.2
+    daily_hours_limit: int = 8
+    weekly_hours_limit: int = 48
+    daily_difficult_hours_limit: int = 5
+    seed: int = 0
+    n_campuses: int = 1
+
+
+def split_hours(total, weights):
+    """Largest-remainder split of `total` hours by `weights`, at least one hour each when possible."""
+    base = 1 if total >= len(weights) else 0
+    rest = total - base * len(weights)
+    shares = [rest * weight / sum(weights) for weight in weights]
+    hours = [base + int(share) for share in shares]
+
+    order = sorted(range(len(weights)), key=lambda i: int(shares[i]) - shares[i])
+    for i in order[:total - sum(hours)]:
+        hours[i] += 1
+    return hours
+
+
+def generate_instance(spec: InstanceSpec) -> MainData:
+    """Seeded MainData instance with the same structure as the parsed workbook."""
+    if spec.n_campuses > 1:
+        return generate_campuses(spec)
+    rng = random.Random(spec.seed)
+    data = MainData()
+    data.set_schedule_config(ScheduleConfig(spec.daily_hours_limit, spec.weekly_hours_limit,
+                                            spec.daily_difficult_hours_limit))
+
+    group_names = [f"Группа {index + 1}" for index in range(spec.n_groups)]
+    group_position = {name: index for index, name in enumerate(group_names)}
+    subject_names = [f"Предмет {index + 1}" for index in range(spec.n_subjects)]
+    weekly_hours = min(round(spec.density * DAYS * SLOTS), spec.weekly_hours_limit)
+
+    # Subject properties shared by all groups
+    weights = [rng.uniform(0.5, 2.0) for _ in subject_names]
+    difficult = [rng.random() < spec.difficult_share for _ in subject_names]
+    equipment = [EQUIPMENT_KINDS[index] if index < len(EQUIPMENT_KINDS) and index < spec.n_subjects // 4 else None
+                 for index in range(spec.n_subjects)]
+
+    day_constraints, time_constraints = [], []
+    for index in range(spec.n_subjects):
+        days = [False] * DAYS
+        slots = [False] * SLOTS
+        if equipment[index] is None and rng.random() < 0.4 * spec.tightness:
+            # Marks are the allowed days; one or two days are closed
+            for day in rng.sample(range(DAYS), DAYS - rng.randint(1, 2)):
+                days[day] = True
+        if equipment[index] is None and rng.random() < 0.2 * spec.tightness:
+            slots[:SLOTS - 2] = [True] * (SLOTS - 2)
+        day_constraints.append(days)
+        time_constraints.append(slots)
+
+    # Curriculum
+    hours = {}
+    for group_name in group_names:
+        group = ClassGroup(group_name)
+        noisy = [weight * rng.uniform(0.8, 1.2) for weight in weights]
+        for index, group_hours in enumerate(split_hours(weekly_hours, noisy)):
+            if group_hours <= 0:
+                continue
+            subject = Subject(subject_names[index], weekly_hours=group_hours, is_difficult=difficult[index],
+                              equipment_requirement=equipment[index])
+            subject.day_constraints = list(day_constraints[index])
+            subject.time_constraints = list(time_constraints[index])
+            group.add_subject(subject)
+            hours[(group_name, index)] = group_hours
+        data.add_group(group)
+
+    # Teachers: one subject each, groups dealt to the least loaded teacher
+    capacity = max(1, round(DAYS * SLOTS * (0.35 + 0.45 * spec.tightness)))
+    teacher_index = 0
+    for index, subject_name in enumerate(subject_names):
+        demand = [(group_name, hours[(group_name, index)]) for group_name in group_names if (group_name, index) in hours]
+        if not demand:
+            continue
+        n_teachers = max(1, math.ceil(sum(h for _, h in demand) / capacity))
+        teachers = []
+        for _ in range(n_teachers):
+            teacher_index += 1
+            teacher = Teacher(f"Преподаватель {teacher_index}")
+            teacher.subjects_name.append(subject_name)
+            teachers.append([0, teacher])
+
+        for group_name, group_hours in sorted(demand, key=lambda item: -item[1]):
+            load = min(teachers, key=lambda item: item[0])
+            load[0] += group_hours
+            load[1].available_groups_name.append(group_name)
+
+        for _, teacher in teachers:
+            # Workbook order: groups as they appear in the header
+            teacher.available_groups_name.sort(key=group_position.get)
+            data.add_teacher(teacher)
+
+    # Rooms: every group needs a room in its busiest slot, plus slack that shrinks with tightness
+    equipped_hours = {}
+    for (group_name, index), group_hours in hours.items():
+        if equipment[index] is not None:
+            equipped_hours[equipment[index]] = equipped_hours.get(equipment[index], 0) + group_hours
+
+    room_number = 100
+    n_general = max(1, math.ceil(spec.n_groups * (1.0 + 0.5 * (1.0 - spec.tightness))))
+    for index in range(n_general):
+        room_number += 1
+        building = "Другой корпус" if rng.random() < spec.other_building_share else "Главный корпус"
+        data.add_room(Room(number=room_number, building=building, equipment=None))
+    for kind, kind_hours in equipped_hours.items():
+        for _ in range(max(1, math.ceil(kind_hours / capacity))):
+            room_number += 1
+            data.add_room(Room(number=room_number, building="Главный корпус", equipment=kind))
+
+    data.rebuild_indexes()
+    return data
+
+
+def generate_campuses(spec: InstanceSpec) -> MainData:
+    """
+    Instance of `spec.n_campuses` campuses generated like single-campus ones
+    (seeds spec.seed, spec.seed + 1, ...) and merged: groups and teachers
+    are prefixed with the campus, rooms are renumbered and put into the
+    campus building. Campuses share no teachers.
+    """
+    data = MainData()
+    data.set_schedule_config(ScheduleConfig(spec.daily_hours_limit, spec.weekly_hours_limit,
+                                            spec.daily_difficult_hours_limit))
+    sizes = split_hours(spec.n_groups, [1.0] * spec.n_campuses)
+    for campus, n_groups in enumerate(sizes):
+        part = generate_instance(replace(spec, n_groups=n_groups, n_campuses=1, seed=spec.seed + campus))
+        prefix = f"Кампус {campus + 1}: "
+        for group in part.groups.values():
+            group.name = prefix + group.name
+            data.add_group(group)
+        for teacher in part.teachers.values():
+            teacher.name = prefix + teacher.name
+            teacher.available_groups_name = [prefix + name for name in teacher.available_groups_name]
+            data.add_teacher(teacher)
+        for room in part.rooms:
+            data.add_room(Room(number=(campus + 1) * 100000 + room.number, building=f"Корпус {campus + 1}",
+                               equipment=room.equipment))
+    data.rebuild_indexes()
+    return data
+
+
+def write_workbook(data: MainData, path) -> None:
+    """
+    Writes `data` as a constraints workbook in the layout ExcelParser reads.
+    Uses write-only worksheets, so arbitrarily large instances stream to disk.
+    """
+    wb = Workbook(write_only=True)
+    group_names = list(data.groups)
+    subject_names = []
+    for group in data.groups.values():
+        for name in group.subjects:
+            if name not in subject_names:
+                subject_names.append(name)
+
+    def subject_of(group_name, subject_name):
+        return data.groups[group_name].subjects.get(subject_name)
+
+    # Curriculum: hours per group, a filled cell marks a difficult subject
+    ws = wb.create_sheet("Учебный план")
+    ws.append([])
+    ws.append(["ПРЕДМЕТ", None, "Группы:"])
+    ws.append([None, None] + group_names)
+    for subject_name in subject_names:
+        row = [subject_name, None]
+        for group_name in group_names:
+            subject = subject_of(group_name, subject_name)
+            if subject is None:
+                row.append(None)
+                continue
+            cell = WriteOnlyCell(ws, value=subject.weekly_hours)
+            if subject.is_difficult:
+                cell.fill = DIFFICULT_FILL
+            row.append(cell)
+        ws.append(row)
+
+    ws = wb.create_sheet("Аудитории")
+    ws.append(["Аудитории:", "Другой корпус (низкий приоритет):", "Оборудование аудитории:"])
+    for room in data.rooms:
+        ws.append([room.number, "Да" if room.building == "Другой корпус" else "Нет", room.equipment or "Нет"])
+
+    ws = wb.create_sheet("Требования по оснащению")
+    ws.append([])
+    ws.append(["ПРЕДМЕТ", None, "Группы:"])
+    ws.append([None, None] + group_names)
+    for subject_name in subject_names:
+        row = [subject_name, None]
+        for group_name in group_names:
+            subject = subject_of(group_name, subject_name)
+            row.append(None if subject is None else subject.equipment_requirement or "-")
+        ws.append(row)
+
+    config = data.schedule_config
+    ws = wb.create_sheet("Ограничения по часам")
+    ws.append(["Максимум часов учебы в день:", config.daily_hours_limit])
+    ws.append(["Максимум часов в неделю:", config.weekly_hours_limit])
+    ws.append(["Лимит на сложные предметы (день):", config.daily_difficult_hours_limit])
+
+    ws = wb.create_sheet("Матрицы преподавателей")
+    ws.append(["Преподаватель", "Предметы", "Группы"])
+    ws.append([None, None] + group_names)
+    for teacher in data.teachers.values():
+        groups = set(teacher.available_groups_name)
+        ws.append([teacher.name, ", ".join(teacher.subjects_name)]
+                  + ["X" if group_name in groups else "-" for group_name in group_names])
+
+    # Day/time restrictions are per subject; take them from the first group that has it
+    ws = wb.create_sheet("Ограничения по дням и времени")
+    ws.append([])
+    ws.append(["ПРЕДМЕТ"] + [f"День {day + 1}" for day in range(DAYS)]
+              + [f"{slot + 1}-ое занятие" for slot in range(SLOTS)])
+    ws.append([])
+    for subject_name in subject_names:
+        subject = next(subject_of(name, subject_name) for name in group_names
+                       if subject_of(name, subject_name) is not None)
+        ws.append([subject_name]
+                  + ["X" if mark else "-" for mark in subject.day_constraints]
+                  + ["X" if mark else "-" for mark in subject.time_constraints])
+
+    wb.save(path)
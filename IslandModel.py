@@ -0,0 +1,203 @@
+import logging
+import multiprocessing
+import queue
+import random
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+from deap import tools
+
+from GeneticAlgorithm import GeneticAlgorithm
+from models import Config
+from ProblemModel import ProblemModel
+
+logger = logging.getLogger(__name__)
+
+TOPOLOGIES = ("ring", "random")
+
+
+@dataclass
+class IslandSettings:
+    """Per-island GA parameters."""
+    seed: int
+    crossover_prob: float = 0.7
+    mut_pb: float = 0.2
+    tournament_size: int = 3
+
+
+@dataclass
+class IslandResult:
+    best: List[int]
+    best_fitness: float
+    best_island: int
+    # history[island][generation] --> best penalty of that island
+    history: List[List[float]] = field(default_factory=list)
+
+
+def _migration_sources(n_islands: int, topology: str, epoch: int, seed: int) -> List[int]:
+    """
+    sources[i] is the island whose elites island i receives. Every island
+    computes the same mapping, random topologies derive it from a seed shared
+    by all islands and the migration epoch.
+    """
+    if topology == "ring":
+        return [(island - 1) % n_islands for island in range(n_islands)]
+
+    order = np.random.default_rng((seed, epoch)).permutation(n_islands)
+    sources = [0] * n_islands
+    for position, island in enumerate(order):
+        sources[island] = int(order[position - 1])
+    return sources
+
+
+def _island_worker(index, settings, config, population_size, num_generations,
+                   migration_interval, n_migrants, topology, topology_seed,
+                   shm_names, barrier, results, problem=None):
+    random.seed(settings.seed)
+    np.random.seed(settings.seed)
+    logging.getLogger("GeneticAlgorithm").setLevel(logging.WARNING)
+
+    algo = GeneticAlgorithm(config,
+                            population_size=population_size,
+                            crossover_prob=settings.crossover_prob,
+                            mut_pb=settings.mut_pb,
+                            num_generations=num_generations,
+                            problem=problem)
+    algo.toolbox.register("select", tools.selTournament, tournsize=settings.tournament_size)
+
+    genomes_shm = shared_memory.SharedMemory(name=shm_names[0])
+    fitness_shm = shared_memory.SharedMemory(name=shm_names[1])
+    n_islands = barrier.parties
+    n_genes = config.n_groups * config.n_days * config.n_hours
+    migrants = np.ndarray((n_islands, n_migrants, n_genes), dtype=np.int32, buffer=genomes_shm.buf)
+    migrant_fitness = np.ndarray((n_islands, n_migrants), dtype=np.float64, buffer=fitness_shm.buf)
+
+    try:
+        population = algo.toolbox.population(n=population_size)
+        algo.evaluate_population(population)
+        history = []
+
+        for generation in range(num_generations):
+            population = algo.generation_evolutionary_loop(population)
+            history.append(min(ind.fitness.values[0] for ind in population))
+
+            if (generation + 1) % migration_interval or generation + 1 == num_generations:
+                continue
+
+            # Publish own elites, wait for everybody, then take the neighbour's
+            elites = tools.selBest(population, n_migrants)
+            migrants[index] = np.asarray(elites, dtype=np.int32)
+            migrant_fitness[index] = [ind.fitness.values[0] for ind in elites]
+            barrier.wait()
+
+            epoch = (generation + 1) // migration_interval
+            source = _migration_sources(n_islands, topology, epoch, topology_seed)[index]
+            worst = tools.selWorst(population, n_migrants)
+            for ind, genome, fit in zip(worst, migrants[source], migrant_fitness[source]):
+                ind[:] = genome.tolist()
+                ind.fitness.values = (float(fit),)
+            barrier.wait()
+
+        best = tools.selBest(population, 1)[0]
+        results.put((index, list(map(int, best)), best.fitness.values[0], history))
+    finally:
+        algo.close()
+        del migrants, migrant_fitness
+        genomes_shm.close()
+        fitness_shm.close()
+
+
+class IslandModel:
+    """
+    Runs independent GeneticAlgorithm populations ("islands") in separate
+    processes. Every `migration_interval` generations each island publishes its
+    `n_migrants` best individuals to a shared-memory buffer and replaces its
+    worst individuals with the elites of its source island (ring or random
+    topology). Pass a ProblemModel to evolve schedules of a parsed workbook.
+    """
+
+    def __init__(self,
+                 config: Config = None,
+                 n_islands=4,
+                 population_size=200,
+                 num_generations=50,
+                 migration_interval=5,
+                 n_migrants=5,
+                 topology="ring",
+                 island_settings: Optional[List[IslandSettings]] = None,
+                 seed=0,
+                 start_method=None,
+                 problem: ProblemModel = None):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology {topology!r}, expected one of {TOPOLOGIES}")
+        if island_settings is not None and len(island_settings) != n_islands:
+            raise ValueError("island_settings must contain one entry per island")
+
+        self.problem = problem
+        self.config = config if config is not None else problem.config()
+        self.n_islands = n_islands
+        self.population_size = population_size
+        self.num_generations = num_generations
+        self.migration_interval = migration_interval
+        self.n_migrants = n_migrants
+        self.topology = topology
+        self.seed = seed
+        self.start_method = start_method
+        self.island_settings = island_settings or [IslandSettings(seed=seed + island)
+                                                   for island in range(n_islands)]
+
+    def run(self) -> IslandResult:
+        context = multiprocessing.get_context(self.start_method)
+        n_genes = self.config.n_groups * self.config.n_days * self.config.n_hours
+
+        genomes_shm = shared_memory.SharedMemory(
+            create=True, size=self.n_islands * self.n_migrants * n_genes * np.dtype(np.int32).itemsize)
+        fitness_shm = shared_memory.SharedMemory(
+            create=True, size=self.n_islands * self.n_migrants * np.dtype(np.float64).itemsize)
+        barrier = context.Barrier(self.n_islands)
+        results = context.Queue()
+
+        processes = [
+            context.Process(target=_island_worker,
+                            args=(index, settings, self.config, self.population_size,
+                                  self.num_generations, self.migration_interval,
+                                  self.n_migrants, self.topology, self.seed,
+                                  (genomes_shm.name, fitness_shm.name), barrier, results, self.problem))
+            for index, settings in enumerate(self.island_settings)
+        ]
+
+        try:
+            for process in processes:
+                process.start()
+
+            collected = {}
+            while len(collected) < self.n_islands:
+                try:
+                    index, best, best_fitness, history = results.get(timeout=1)
+                    collected[index] = (best, best_fitness, history)
+                except queue.Empty:
+                    if any(p.exitcode not in (None, 0) for p in processes):
+                        barrier.abort()
+                        raise RuntimeError("An island process terminated unexpectedly")
+
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            genomes_shm.close()
+            genomes_shm.unlink()
+            fitness_shm.close()
+            fitness_shm.unlink()
+
+        best_island = min(collected, key=lambda island: collected[island][1])
+        best, best_fitness, _ = collected[best_island]
+        history = [collected[island][2] for island in range(self.n_islands)]
+
+        logger.info(f"Island model finished, best penalty {best_fitness} on island {best_island}")
+
+        return IslandResult(best=best, best_fitness=best_fitness,
+                            best_island=best_island, history=history)
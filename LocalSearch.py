@@ -0,0 +1,354 @@
+import math
+import random
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from BatchEvaluator import (CLASSROOM_CLASH_PENALTY, DAY_TIME_PENALTY, ELIGIBILITY_PENALTY, EQUIPMENT_PENALTY,
+                            GAP_PENALTY, HOURS_PENALTY, TEACHER_CLASH_PENALTY, BatchEvaluator)
+
+METHODS = ("anneal", "tabu")
+SWAP_SHARE = 0.6  # Share of swap/move proposals; the rest reassign a teacher or a room
+CHECK_EVERY = 256  # Iterations between clock reads and temperature updates
+
+
+def _undone(genes: list, undo: list) -> list:
+    # Copy of the genes as they were before the move that `undo` reverts
+    genes = genes[:]
+    for position, value in undo:
+        genes[position] = value
+    return genes
+
+
+class _SearchState:
+    """
+    Occupancy counters of one problem-mode genome as plain Python lists:
+    bookings per (teacher, slot) and (room, slot) and placed hours per
+    (group, subject). set() changes one gene and returns the exact penalty
+    delta in O(1) (the gap term rescans the group-day, n_hours cells), so the
+    penalty always equals what BatchEvaluator computes from scratch.
+    """
+
+    def __init__(self, evaluator: BatchEvaluator, genome: np.ndarray):
+        problem = evaluator.problem
+        config = evaluator.config
+        self.problem = problem
+        self.n_hours = config.n_hours
+        self.n_slots = config.n_days * config.n_hours
+        self.n_subjects = config.n_subjects
+        self.n_classrooms = config.n_classrooms
+        self.required = problem.required_hours.astype(np.int64).ravel().tolist()
+
+        self.genes = np.asarray(genome, dtype=np.int64).tolist()
+        self.teacher_counts = [0] * (config.n_teachers * self.n_slots)
+        self.room_counts = [0] * (config.n_classrooms * self.n_slots)
+        self.hour_counts = [0] * len(self.required)
+        for position, value in enumerate(self.genes):
+            if value >= 0:
+                teacher, subject, room = self.decode(value)
+                slot = position % self.n_slots
+                self.teacher_counts[teacher * self.n_slots + slot] += 1
+                self.room_counts[room * self.n_slots + slot] += 1
+                self.hour_counts[position // self.n_slots * self.n_subjects + subject] += 1
+
+        self.penalty = float(evaluator.evaluate(np.asarray([genome]))[0])
+
+    def decode(self, value: int) -> Tuple[int, int, int]:
+        rest, room = divmod(value, self.n_classrooms)
+        teacher, subject = divmod(rest, self.n_subjects)
+        return teacher, subject, room
+
+    def encode(self, teacher: int, subject: int, room: int) -> int:
+        return (teacher * self.n_subjects + subject) * self.n_classrooms + room
+
+    def gene_cost(self, position: int, value: int) -> int:
+        # Same static terms as BatchEvaluator.gene_penalty, for one gene
+        problem = self.problem
+        teacher, subject, room = self.decode(value)
+        group, slot = divmod(position, self.n_slots)
+        day, hour = divmod(slot, self.n_hours)
+        cost = 0
+        if not (problem.eligible[teacher, group, subject] and problem.teacher_days[teacher, day]):
+            cost += ELIGIBILITY_PENALTY
+        if not problem.room_ok[group, subject, room]:
+            cost += EQUIPMENT_PENALTY
+        if not (problem.day_allowed[group, subject, day] and problem.time_allowed[group, subject, hour]):
+            cost += DAY_TIME_PENALTY
+        return cost
+
+    def bucket_gaps(self, position: int) -> int:
+        # Gaps of the group-day of `position`: runs of lessons minus one
+        start = position - position % self.n_hours
+        runs, previous = 0, False
+        for value in self.genes[start:start + self.n_hours]:
+            present = value >= 0
+            runs += present and not previous
+            previous = present
+        return max(runs - 1, 0)
+
+    def set(self, position: int, value: int) -> float:
+        old = self.genes[position]
+        if old == value:
+            return 0.0
+
+        slot = position % self.n_slots
+        hours_base = position // self.n_slots * self.n_subjects
+        delta = 0
+        flips = (old >= 0) != (value >= 0)
+        if flips:
+            delta -= GAP_PENALTY * self.bucket_gaps(position)
+
+        if old >= 0:
+            teacher, subject, room = self.decode(old)
+            key = teacher * self.n_slots + slot
+            count = self.teacher_counts[key]
+            self.teacher_counts[key] = count - 1
+            delta -= TEACHER_CLASH_PENALTY * (count >= 2)
+            key = room * self.n_slots + slot
+            count = self.room_counts[key]
+            self.room_counts[key] = count - 1
+            delta -= CLASSROOM_CLASH_PENALTY * (count >= 2)
+            key = hours_base + subject
+            count = self.hour_counts[key]
+            self.hour_counts[key] = count - 1
+            delta += HOURS_PENALTY * (abs(count - 1 - self.required[key]) - abs(count - self.required[key]))
+            delta -= self.gene_cost(position, old)
+
+        if value >= 0:
+            teacher, subject, room = self.decode(value)
+            key = teacher * self.n_slots + slot
+            count = self.teacher_counts[key]
+            self.teacher_counts[key] = count + 1
+            delta += TEACHER_CLASH_PENALTY * (count >= 1)
+            key = room * self.n_slots + slot
+            count = self.room_counts[key]
+            self.room_counts[key] = count + 1
+            delta += CLASSROOM_CLASH_PENALTY * (count >= 1)
+            key = hours_base + subject
+            count = self.hour_counts[key]
+            self.hour_counts[key] = count + 1
+            delta += HOURS_PENALTY * (abs(count + 1 - self.required[key]) - abs(count - self.required[key]))
+            delta += self.gene_cost(position, value)
+
+        self.genes[position] = value
+        if flips:
+            delta += GAP_PENALTY * self.bucket_gaps(position)
+
+        self.penalty += delta
+        return delta
+
+    def apply(self, changes) -> Tuple[float, list]:
+        """Applies [(position, value), ...]; returns the delta and the changes that undo it."""
+        undo = [(position, self.genes[position]) for position, _ in changes]
+        delta = 0.0
+        for position, value in changes:
+            delta += self.set(position, value)
+        return delta, undo[::-1]
+
+
+class LocalSearch:
+    """
+    Refines a problem-mode genome (e.g. the GA's best individual or a
+    Schedule converted with ScheduleTable) by local search.
+
+    Neighbourhoods: swap two cells of one group (a swap with a free cell
+    moves the lesson), and reassign the teacher or the room of a lesson to
+    another one allowed for the group and subject. Weekly hours never
+    change. Moves are scored with exact O(1) deltas (see _SearchState).
+
+    method="anneal" accepts a worse move with probability exp(-delta / T),
+    cooling geometrically from `initial_temperature` to `final_temperature`
+    over the budget. method="tabu" scores `n_candidates` random moves per
+    iteration and takes the best one whose cells were not changed in the
+    last `tabu_tenure` iterations (unless it beats the best penalty).
+
+    The run stops after `max_iterations`, after `time_budget` seconds, or at
+    penalty 0. Random numbers come from `rng` (default: the `random`
+    module), so runs inside the GA stay reproducible when no time budget is
+    set.
+    """
+
+    def __init__(self, evaluator: BatchEvaluator, method: str = "anneal",
+                 time_budget: Optional[float] = 1.0, max_iterations: Optional[int] = None,
+                 initial_temperature: float = 10.0, final_temperature: float = 0.5,
+                 tabu_tenure: int = 10, n_candidates: int = 20, rng=None):
+        if evaluator.problem is None:
+            raise ValueError("Local search needs an evaluator built from a problem model")
+        if method not in METHODS:
+            raise ValueError(f"Unknown local search method {method!r}, expected one of {METHODS}")
+        if time_budget is None and max_iterations is None:
+            raise ValueError("Local search needs a time budget or an iteration limit")
+
+        self.evaluator = evaluator
+        self.method = method
+        self.time_budget = time_budget
+        self.max_iterations = max_iterations
+        self.initial_temperature = initial_temperature
+        self.final_temperature = final_temperature
+        self.tabu_tenure = tabu_tenure
+        self.n_candidates = n_candidates
+        self.rng = rng or random
+
+        problem = evaluator.problem
+        self.n_slots = evaluator.config.n_days * evaluator.config.n_hours
+        self.n_subjects = problem.n_subjects
+        self._teachers = {}
+        self._rooms = {}
+        self._movable_set = set()
+
+        # Statistics of the last run
+        self.iterations = 0
+        self.accepted = 0
+
+    def _allowed_teachers(self, group: int, subject: int) -> list:
+        key = (group, subject)
+        if key not in self._teachers:
+            self._teachers[key] = np.flatnonzero(self.evaluator.problem.eligible[:, group, subject]).tolist()
+        return self._teachers[key]
+
+    def _allowed_rooms(self, group: int, subject: int) -> list:
+        key = (group, subject)
+        if key not in self._rooms:
+            self._rooms[key] = np.flatnonzero(self.evaluator.problem.room_ok[group, subject]).tolist()
+        return self._rooms[key]
+
+    def _propose(self, state: _SearchState, movable: list):
+        """A random move as a list of (position, value) changes, or None."""
+        rng = self.rng
+        position = movable[int(rng.random() * len(movable))]
+        genes = state.genes
+        value = genes[position]
+        base = position - position % self.n_slots
+
+        if value < 0 or rng.random() < SWAP_SHARE:
+            other = base + int(rng.random() * self.n_slots)
+            if other == position or genes[other] == value or other not in self._movable_set:
+                return None
+            return [(position, genes[other]), (other, value)]
+
+        teacher, subject, room = state.decode(value)
+        group = position // self.n_slots
+        if rng.random() < 0.5:
+            choices = self._allowed_teachers(group, subject)
+            if not choices:
+                return None
+            teacher = choices[int(rng.random() * len(choices))]
+        else:
+            choices = self._allowed_rooms(group, subject)
+            if not choices:
+                return None
+            room = choices[int(rng.random() * len(choices))]
+        new_value = state.encode(teacher, subject, room)
+        return None if new_value == value else [(position, new_value)]
+
+    def run(self, genome, frozen: Optional[np.ndarray] = None) -> Tuple[np.ndarray, float]:
+        """
+        Returns the best genome found and its penalty. Cells marked in
+        `frozen` are neither moved nor moved into.
+        """
+        genome = np.asarray(genome)
+        state = _SearchState(self.evaluator, genome)
+        movable_mask = np.ones(len(state.genes), dtype=bool) if frozen is None else ~np.asarray(frozen, dtype=bool)
+        movable = np.flatnonzero(movable_mask).tolist()
+        self._movable_set = set(movable)
+
+        best_penalty = state.penalty
+        best_genes = None  # None: the current genes are the best ones
+        self.iterations = self.accepted = 0
+        if not movable:
+            return genome.copy(), best_penalty
+
+        rng = self.rng
+        started = time.perf_counter()
+        temperature = self.initial_temperature
+        tabu_until = {}
+
+        while best_penalty > 0:
+            if self.max_iterations is not None and self.iterations >= self.max_iterations:
+                break
+            if self.iterations % CHECK_EVERY == 0:
+                elapsed = time.perf_counter() - started
+                if self.time_budget is not None and elapsed >= self.time_budget:
+                    break
+                progress = max(elapsed / self.time_budget if self.time_budget else 0.0,
+                               self.iterations / self.max_iterations if self.max_iterations else 0.0)
+                temperature = self.initial_temperature * (self.final_temperature
+                                                          / self.initial_temperature) ** min(progress, 1.0)
+            self.iterations += 1
+
+            if self.method == "anneal":
+                move = self._propose(state, movable)
+                if move is None:
+                    continue
+                delta, undo = state.apply(move)
+                if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                    self.accepted += 1
+                    if state.penalty < best_penalty:
+                        best_penalty, best_genes = state.penalty, None
+                    elif best_genes is None and delta > 0:
+                        best_genes = _undone(state.genes, undo)
+                else:
+                    state.apply(undo)
+                continue
+
+            # Tabu: best admissible of several sampled moves
+            chosen, chosen_delta = None, math.inf
+            for _ in range(self.n_candidates):
+                move = self._propose(state, movable)
+                if move is None:
+                    continue
+                delta, undo = state.apply(move)
+                state.apply(undo)
+                tabu = any(tabu_until.get(position, 0) > self.iterations for position, _ in move)
+                if (not tabu or state.penalty + delta < best_penalty) and delta < chosen_delta:
+                    chosen, chosen_delta = move, delta
+            if chosen is None:
+                continue
+
+            _, undo = state.apply(chosen)
+            self.accepted += 1
+            for position, _ in chosen:
+                tabu_until[position] = self.iterations + self.tabu_tenure
+            if state.penalty < best_penalty:
+                best_penalty, best_genes = state.penalty, None
+            elif best_genes is None and chosen_delta > 0:
+                best_genes = _undone(state.genes, undo)
+
+        genes = state.genes if best_genes is None else best_genes
+        return np.asarray(genes, dtype=genome.dtype), best_penalty
+
+
+def refine_schedule(schedule, method: str = "anneal", time_budget: float = 1.0, **options):
+    """
+    Runs LocalSearch on a Schedule and returns (refined Schedule, penalty).
+    Lessons without a teacher or a room cannot be encoded: their cells stay
+    frozen during the search and the lessons are put back unchanged.
+    """
+    from Encoding import TripleEncoding
+    from ScheduleTable import MISSING, ScheduleTable
+
+    problem = schedule.problem
+    config = problem.config()
+    encoding = TripleEncoding.from_config(config)
+    evaluator = BatchEvaluator(config, encoding, problem=problem)
+
+    table = ScheduleTable.from_schedule(schedule)
+    genome = table.to_genomes(encoding, problem)[0]
+    columns = table.columns
+    missing = (columns["teacher"] == MISSING) | (columns["room"] == MISSING)
+    frozen = np.zeros(len(genome), dtype=bool)
+    frozen[((columns["group"][missing].astype(np.int64) * config.n_days + columns["day"][missing])
+            * config.n_hours + columns["slot"][missing])] = True
+
+    search = LocalSearch(evaluator, method=method, time_budget=time_budget, **options)
+    genome, penalty = search.run(genome, frozen=frozen)
+
+    refined = ScheduleTable.from_genomes(genome[None], encoding, problem)
+    kept = {name: np.concatenate([refined.columns[name], values[missing].astype(refined.columns[name].dtype)])
+            for name, values in columns.items()}
+    result = ScheduleTable(kept, problem.group_names, problem.subject_names, problem.teacher_names,
+                           problem.room_names).to_schedule(schedule.data)
+    result.log = schedule.log
+    result.unplaced_subjects = {group: list(subjects) for group, subjects in schedule.unplaced_subjects.items()}
+    return result, penalty
@@ -0,0 +1,174 @@
+import json
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+GA_PHASES = ("select", "clone", "mate", "mutate", "repair", "evaluate", "local_search", "stats")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water mark of the resident set of this process; None where `resource` is missing (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """
+    Opt-in run metrics of the solvers.
+
+    The GA calls start_generation(), then lap(phase) after each phase of the
+    loop and end_generation() at the end; every lap is a single perf_counter()
+    call, and without a Metrics object the loop only tests `metrics is not
+    None`. Schedule runs are recorded from the counters their ScheduleLog
+    keeps anyway (constraint checks, attempts, rejections by reason).
+
+    Results are available as a dict, JSON, or Prometheus text exposition.
+    """
+
+    def __init__(self, prefix: str = "solver"):
+        self.prefix = prefix
+        self.phase_seconds: Dict[str, float] = dict.fromkeys(GA_PHASES, 0.0)
+        self.generations: List[Dict] = []
+        self.schedules: List[Dict] = []
+        self.counters = Counter()
+        self.peak_rss_mb = peak_rss_mb()
+
+        self._generation_phases = None
+        self._generation_started = 0.0
+        self._lap_started = 0.0
+        self._evaluations_started = 0
+
+    # ----- GA -----
+
+    def start_generation(self, evaluations: int = 0) -> None:
+        self._generation_phases = dict.fromkeys(GA_PHASES, 0.0)
+        self._evaluations_started = evaluations
+        self._generation_started = self._lap_started = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """Charges the time since the previous lap to `phase`."""
+        now = time.perf_counter()
+        elapsed = now - self._lap_started
+        self._lap_started = now
+        self._generation_phases[phase] = self._generation_phases.get(phase, 0.0) + elapsed
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + elapsed
+
+    def end_generation(self, evaluations: int = 0, best: Optional[float] = None) -> Dict:
+        wall_time = time.perf_counter() - self._generation_started
+        evaluated = evaluations - self._evaluations_started
+        self._observe_rss()
+
+        record = {
+            "generation": len(self.generations),
+            "wall_time_s": wall_time,
+            "phases": self._generation_phases,
+            "evaluations": evaluated,
+            "evals_per_s": evaluated / wall_time if wall_time > 0 else 0.0,
+            "best": best,
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+        self.generations.append(record)
+        self.counters["generations"] += 1
+        self.counters["evaluations"] += evaluated
+        return record
+
+    # ----- Schedule -----
+
+    def observe_schedule(self, schedule, mode: str, wall_time: Optional[float] = None) -> Dict:
+        """
+        Records the counters of a finished Schedule run. Per-check counts
+        are only kept when the schedule's log has DEBUG enabled (e.g. a
+        CollectingSink), so they are empty for quiet runs.
+        """
+        log = schedule.log
+        checks = {key[len("check."):]: value for key, value in log.counters.items() if key.startswith("check.")}
+        record = {
+            "mode": mode,
+            "wall_time_s": wall_time,
+            "attempts": log.counters["attempts"],
+            "placed": log.counters["placed"],
+            "unplaced": log.counters["unplaced"],
+            "checks": checks,
+            "rejections": log.rejection_counts(),
+            "rejection_rates": log.rejection_rates(),
+        }
+        self.schedules.append(record)
+        for name, value in checks.items():
+            self.counters[f"schedule_checks.{name}"] += value
+        for reason, value in record["rejections"].items():
+            self.counters[f"schedule_rejections.{reason}"] += value
+        self.counters["schedule_attempts"] += record["attempts"]
+        self._observe_rss()
+        return record
+
+    def _observe_rss(self) -> None:
+        peak = peak_rss_mb()
+        if peak is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0.0, peak)
+
+    # ----- Export -----
+
+    def to_dict(self) -> Dict:
+        total = sum(record["wall_time_s"] for record in self.generations)
+        return {
+            "phase_seconds": dict(self.phase_seconds),
+            "evals_per_s": self.counters["evaluations"] / total if total > 0 else 0.0,
+            "peak_rss_mb": self.peak_rss_mb,
+            "counters": dict(self.counters),
+            "generations": self.generations,
+            "schedules": self.schedules,
+        }
+
+    def to_json(self, path=None, **kwargs) -> str:
+        text = json.dumps(self.to_dict(), ensure_ascii=False, **kwargs)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(text)
+        return text
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4) of the totals."""
+        prefix = self.prefix
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_label_value(val)}"' for key, val in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+
+        summary = self.to_dict()
+        metric("ga_phase_seconds_total", "counter", "Time spent in each phase of the GA loop.",
+               [({"phase": phase}, seconds) for phase, seconds in self.phase_seconds.items()])
+        metric("ga_generations_total", "counter", "Completed GA generations.",
+               [({}, self.counters["generations"])])
+        metric("ga_evaluations_total", "counter", "Individuals scored by the GA.",
+               [({}, self.counters["evaluations"])])
+        metric("ga_evaluations_per_second", "gauge", "Evaluation throughput over all generations.",
+               [({}, summary["evals_per_s"])])
+        if self.generations:
+            metric("ga_last_generation_evaluations_per_second", "gauge", "Evaluation throughput of the last generation.",
+                   [({}, self.generations[-1]["evals_per_s"])])
+        metric("schedule_attempts_total", "counter", "Placement attempts of the random scheduler.",
+               [({}, self.counters["schedule_attempts"])])
+        metric("schedule_checks_total", "counter", "Constraint checks of the random scheduler.",
+               [({"check": key.split(".", 1)[1]}, value) for key, value in sorted(self.counters.items())
+                if key.startswith("schedule_checks.")])
+        metric("schedule_rejections_total", "counter", "Rejected placements by reason.",
+               [({"reason": key.split(".", 1)[1]}, value) for key, value in sorted(self.counters.items())
+                if key.startswith("schedule_rejections.")])
+        if self.peak_rss_mb is not None:
+            metric("peak_rss_megabytes", "gauge", "Resident set high-water mark of the process.",
+                   [({}, self.peak_rss_mb)])
+        return "\n".join(lines) + "\n"
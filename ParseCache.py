@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from Entities import ClassGroup, MainData, Room, ScheduleConfig, Subject, Teacher
+from ProblemModel import FORMAT_VERSION as MODEL_FORMAT_VERSION, ProblemModel
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(file_path):
+    # SHA-256 содержимого файла, читаем блоками
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def main_data_to_dict(data):
+    config = data.schedule_config
+    return {
+        "schedule_config": None if config is None else [config.daily_hours_limit,
+                                                        config.weekly_hours_limit,
+                                                        config.daily_difficult_hours_limit],
+        "rooms": [[room.number, room.building, room.equipment, room.room_type] for room in data.rooms],
+        "groups": [[group.name, [[subject.name, subject.weekly_hours, subject.is_difficult,
+                                  subject.equipment_requirement, subject.day_constraints,
+                                  subject.time_constraints]
+                                 for subject in group.subjects.values()]]
+                   for group in data.groups.values()],
+        "teachers": [[teacher.name, teacher.subjects_name, teacher.available_groups_name, teacher.available_days]
+                     for teacher in data.teachers.values()],
+    }
+
+
+def main_data_from_dict(payload):
+    data = MainData()
+    if payload["schedule_config"] is not None:
+        data.set_schedule_config(ScheduleConfig(*payload["schedule_config"]))
+
+    for number, building, equipment, room_type in payload["rooms"]:
+        data.rooms.append(Room(number=number, building=building, equipment=equipment, room_type=room_type))
+
+    for group_name, subjects in payload["groups"]:
+        group = ClassGroup(group_name)
+        for name, weekly_hours, is_difficult, equipment, day_constraints, time_constraints in subjects:
+            subject = Subject(name, weekly_hours=weekly_hours, is_difficult=is_difficult,
+                              equipment_requirement=equipment)
+            subject.day_constraints = day_constraints
+            subject.time_constraints = time_constraints
+            group.add_subject(subject)
+        data.groups[group_name] = group
+
+    for name, subjects_name, available_groups_name, available_days in payload["teachers"]:
+        teacher = Teacher(name)
+        teacher.subjects_name = subjects_name
+        teacher.available_groups_name = available_groups_name
+        teacher.available_days = available_days
+        data.teachers[name] = teacher
+
+    data.rebuild_indexes()
+    return data
+
+
+class ParseCache:
+    """
+    Дисковый кэш результатов разбора книги.
+
+    Ключ записи - SHA-256 содержимого книги, версия парсера и версия
+    формата ProblemModel на диске, поэтому измененный файл, новая версия
+    парсера или нового формата модели сразу дают промах. Запись -
+    каталог с main_data.json (объекты MainData) и скомпилированной
+    ProblemModel: по файлу .npy на массив, которые при загрузке отображаются
+    в память. Запись сначала собирается во временном каталоге и затем
+    атомарно переименовывается.
+    """
+
+    def __init__(self, cache_dir, version):
+        self.cache_dir = Path(cache_dir)
+        self.version = version
+
+    @property
+    def suffix(self):
+        return f"-v{self.version}-m{MODEL_FORMAT_VERSION}"
+
+    def key(self, file_path):
+        return file_digest(file_path) + self.suffix
+
+    def load(self, key):
+        # Возвращает MainData с загруженной моделью в data.problem или None при промахе
+        entry = self.cache_dir / key
+        try:
+            with open(entry / "main_data.json", encoding="utf-8") as file:
+                data = main_data_from_dict(json.load(file))
+            data.problem = ProblemModel.load(entry / "problem")
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return data
+
+    def store(self, key, data):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = self.cache_dir / key
+        if entry.exists():
+            return
+
+        temp_dir = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir))
+        try:
+            with open(temp_dir / "main_data.json", "w", encoding="utf-8") as file:
+                json.dump(main_data_to_dict(data), file, ensure_ascii=False)
+            if data.problem is None:
+                data.problem = ProblemModel.from_main_data(data)
+            data.problem.save(temp_dir / "problem")
+            os.replace(temp_dir, entry)
+        except OSError:
+            # Запись могла появиться из параллельного процесса
+            if not entry.exists():
+                raise
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.prune()
+
+    def prune(self):
+        # Удаляем записи других версий парсера и формата модели
+        suffix = self.suffix
+        for entry in self.cache_dir.iterdir():
+            if entry.is_dir() and not entry.name.startswith(".") and not entry.name.endswith(suffix):
+                shutil.rmtree(entry, ignore_errors=True)
@@ -0,0 +1,114 @@
+import numpy as np
+
+
+class ArrayPopulation:
+    """
+    Population held as one C-contiguous genome matrix (individual x gene, in
+    the encoding's int16/int32 index type) with a parallel float64 fitness
+    vector; NaN marks a fitness that has to be (re)computed.
+
+    The operators mirror the DEAP ones the list backend uses (tournament
+    selection, cxTwoPoint on consecutive pairs, mutShuffleIndexes) but work
+    on index arrays and slices of the matrix. Offspring are copied into a
+    preallocated back buffer that is swapped with the front one, so a
+    generation allocates no per-individual objects and deep-copies nothing.
+    Random numbers come from numpy.random.
+    """
+
+    def __init__(self, genomes: np.ndarray, fitness: np.ndarray = None):
+        self.genomes = np.ascontiguousarray(genomes)
+        self.fitness = (np.full(len(self.genomes), np.nan) if fitness is None
+                        else np.array(fitness, dtype=np.float64))
+        self._back_genomes = np.empty_like(self.genomes)
+        self._back_fitness = np.empty_like(self.fitness)
+
+    def __len__(self) -> int:
+        return len(self.genomes)
+
+    @property
+    def n_genes(self) -> int:
+        return self.genomes.shape[1]
+
+    def invalid(self) -> np.ndarray:
+        """Rows whose fitness has to be computed."""
+        return np.flatnonzero(np.isnan(self.fitness))
+
+    def select_tournament(self, tournsize: int = 3) -> np.ndarray:
+        """Row of the fittest of `tournsize` random rows, once per individual."""
+        aspirants = np.random.randint(0, len(self), size=(len(self), tournsize))
+        return aspirants[np.arange(len(self)), np.argmin(self.fitness[aspirants], axis=1)]
+
+    def breed(self, parents: np.ndarray) -> None:
+        """Makes the rows `parents` the next generation (copied into the back buffer, then swapped)."""
+        np.take(self.genomes, parents, axis=0, out=self._back_genomes)
+        np.take(self.fitness, parents, out=self._back_fitness)
+        self.genomes, self._back_genomes = self._back_genomes, self.genomes
+        self.fitness, self._back_fitness = self._back_fitness, self.fitness
+
+    def crossover_two_point(self, cxpb: float) -> np.ndarray:
+        """
+        Two-point crossover of rows (0, 1), (2, 3), ... each with probability
+        `cxpb`; cut points are drawn like tools.cxTwoPoint. Returns the
+        changed rows.
+        """
+        n_pairs, size = len(self) // 2, self.n_genes
+        first = 2 * np.flatnonzero(np.random.random(n_pairs) < cxpb)
+        if not len(first) or size < 2:
+            return np.empty(0, dtype=np.int64)
+
+        cx1 = np.random.randint(1, size + 1, size=len(first))
+        cx2 = np.random.randint(1, size, size=len(first))
+        cx2 = np.where(cx2 >= cx1, cx2 + 1, cx2)
+        cx1, cx2 = np.minimum(cx1, cx2), np.maximum(cx1, cx2)
+
+        genes = np.arange(size)
+        segment = (genes >= cx1[:, None]) & (genes < cx2[:, None])
+        left, right = self.genomes[first], self.genomes[first + 1]
+        self.genomes[first] = np.where(segment, right, left)
+        self.genomes[first + 1] = np.where(segment, left, right)
+
+        changed = np.concatenate([first, first + 1])
+        self.fitness[changed] = np.nan
+        return changed
+
+    def mutate_shuffle(self, mutpb: float, indpb: float) -> np.ndarray:
+        """
+        tools.mutShuffleIndexes on every row with probability `mutpb`: each
+        gene is swapped with probability `indpb` with another random gene.
+        The swaps of a row are applied in gene order, like the sequential
+        loop, but every round of swaps runs over all mutated rows at once.
+        Returns the changed rows.
+        """
+        rows = np.flatnonzero(np.random.random(len(self)) < mutpb)
+        size = self.n_genes
+        if not len(rows) or size < 2:
+            return np.empty(0, dtype=np.int64)
+
+        swap_rows, swap_genes = np.nonzero(np.random.random((len(rows), size)) < indpb)
+        targets = np.random.randint(0, size - 1, size=len(swap_genes))
+        targets += targets >= swap_genes
+        swap_rows = rows[swap_rows]
+
+        # Rank of every swap within its row; np.nonzero already orders them by gene
+        starts = np.searchsorted(swap_rows, swap_rows)
+        ranks = np.arange(len(swap_rows)) - starts
+        genomes = self.genomes
+        for rank in range(int(ranks.max()) + 1 if len(ranks) else 0):
+            current = ranks == rank
+            row, gene, target = swap_rows[current], swap_genes[current], targets[current]
+            genomes[row, gene], genomes[row, target] = genomes[row, target], genomes[row, gene]
+
+        self.fitness[rows] = np.nan
+        return rows
+
+    def best(self, k: int = 1) -> np.ndarray:
+        """Rows of the `k` fittest individuals, best first."""
+        k = min(k, len(self))
+        top = np.argpartition(self.fitness, k - 1)[:k] if k < len(self) else np.arange(len(self))
+        return top[np.argsort(self.fitness[top], kind="stable")]
+
+    def worst(self, k: int) -> np.ndarray:
+        """Rows of the `k` least fit individuals."""
+        if k >= len(self):
+            return np.arange(len(self))
+        return np.argpartition(self.fitness, len(self) - k)[len(self) - k:]
@@ -0,0 +1,240 @@
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from models import Config
+
+N_DAYS = 6
+N_HOURS = 8
+
+MAIN_BUILDING = "Главный корпус"
+
+# Stored arrays, in constructor order; everything else is derived on load
+ARRAYS = ("required_hours", "group_subjects", "is_difficult", "subject_equipment",
+          "day_allowed", "time_allowed", "teacher_subjects", "teacher_groups",
+          "teacher_days", "room_equipment", "room_building")
+NAMES = ("group_names", "subject_names", "teacher_names", "room_names",
+         "equipment_names", "building_names")
+LIMITS = ("daily_hours_limit", "weekly_hours_limit", "daily_difficult_hours_limit")
+# On-disk format of save()/load(); bump on any change to ARRAYS, NAMES, LIMITS or the files written
+FORMAT_VERSION = 1
+
+
+def parse_hours(value) -> int:
+    """Weekly hours as an int; non-numeric cells (e.g. "-") count as zero."""
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class ProblemModel:
+    """
+    Dense, integer-indexed form of MainData shared by Schedule and GeneticAlgorithm.
+
+    Groups, subjects, teachers, rooms and equipment kinds get ids in the order
+    they appear in MainData; the *_names lists map ids back to names. All
+    relations are NumPy arrays:
+
+        required_hours   (G, S) int16  weekly hours of subject s in group g
+        group_subjects   (G, S) bool   subject belongs to the group's curriculum
+        is_difficult     (G, S) bool
+        subject_equipment(G, S) int16  equipment id, -1 if none required
+        day_allowed      (G, S, D) bool
+        time_allowed     (G, S, H) bool
+        teacher_subjects (T, S) bool
+        teacher_groups   (T, G) bool
+        teacher_days     (T, D) bool
+        room_equipment   (R,) int16    equipment id, -1 if none
+        room_building    (R,) int16    index into building_names
+        eligible         (T, G, S) bool  teacher may teach subject s to group g
+        room_ok          (G, S, R) bool  room has the equipment the lesson needs
+    """
+
+    def __init__(self,
+                 group_names: List[str],
+                 subject_names: List[str],
+                 teacher_names: List[str],
+                 room_names: List,
+                 equipment_names: List[str],
+                 building_names: List[str],
+                 required_hours: np.ndarray,
+                 group_subjects: np.ndarray,
+                 is_difficult: np.ndarray,
+                 subject_equipment: np.ndarray,
+                 day_allowed: np.ndarray,
+                 time_allowed: np.ndarray,
+                 teacher_subjects: np.ndarray,
+                 teacher_groups: np.ndarray,
+                 teacher_days: np.ndarray,
+                 room_equipment: np.ndarray,
+                 room_building: np.ndarray,
+                 daily_hours_limit: Optional[int] = None,
+                 weekly_hours_limit: Optional[int] = None,
+                 daily_difficult_hours_limit: Optional[int] = None):
+        self.group_names = group_names
+        self.subject_names = subject_names
+        self.teacher_names = teacher_names
+        self.room_names = room_names
+        self.equipment_names = equipment_names
+        self.building_names = building_names
+
+        self.required_hours = required_hours
+        self.group_subjects = group_subjects
+        self.is_difficult = is_difficult
+        self.subject_equipment = subject_equipment
+        self.day_allowed = day_allowed
+        self.time_allowed = time_allowed
+        self.teacher_subjects = teacher_subjects
+        self.teacher_groups = teacher_groups
+        self.teacher_days = teacher_days
+        self.room_equipment = room_equipment
+        self.room_building = room_building
+
+        self.daily_hours_limit = daily_hours_limit
+        self.weekly_hours_limit = weekly_hours_limit
+        self.daily_difficult_hours_limit = daily_difficult_hours_limit
+
+        # Derived relations
+        self.eligible = (self.teacher_subjects[:, None, :]
+                         & self.teacher_groups[:, :, None]
+                         & self.group_subjects[None, :, :])
+        no_requirement = (self.subject_equipment < 0)[:, :, None]
+        self.room_ok = no_requirement | (self.subject_equipment[:, :, None] == self.room_equipment[None, None, :])
+
+        self.group_index = {name: idx for idx, name in enumerate(group_names)}
+        self.subject_index = {name: idx for idx, name in enumerate(subject_names)}
+        self.teacher_index = {name: idx for idx, name in enumerate(teacher_names)}
+        self.room_index = {name: idx for idx, name in enumerate(room_names)}
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.group_names)
+
+    @property
+    def n_subjects(self) -> int:
+        return len(self.subject_names)
+
+    @property
+    def n_teachers(self) -> int:
+        return len(self.teacher_names)
+
+    @property
+    def n_rooms(self) -> int:
+        return len(self.room_names)
+
+    def config(self) -> Config:
+        """GA sizes of this problem."""
+        return Config(n_groups=self.n_groups,
+                      n_teachers=self.n_teachers,
+                      n_subjects=self.n_subjects,
+                      n_classrooms=self.n_rooms,
+                      n_days=N_DAYS,
+                      n_hours=N_HOURS)
+
+    def save(self, directory) -> None:
+        """Writes one .npy file per array plus model.json with names and limits."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for name in ARRAYS:
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+
+        meta = {name: getattr(self, name) for name in NAMES + LIMITS}
+        with open(directory / "model.json", "w", encoding="utf-8") as file:
+            json.dump(meta, file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory, mmap_mode: Optional[str] = "r") -> "ProblemModel":
+        """Reads a model written by save(); arrays are memory-mapped by default."""
+        directory = Path(directory)
+        with open(directory / "model.json", encoding="utf-8") as file:
+            meta = json.load(file)
+
+        arrays = [np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in ARRAYS]
+        return cls(*(meta[name] for name in NAMES), *arrays,
+                   **{name: meta[name] for name in LIMITS})
+
+    @classmethod
+    def from_main_data(cls, data) -> "ProblemModel":
+        group_names = list(data.groups)
+        teacher_names = list(data.teachers)
+        room_names = [room.number for room in data.rooms]
+
+        subject_names, equipment_names, building_names = [], [], [MAIN_BUILDING]
+
+        def subject_id(name):
+            if name not in subject_ids:
+                subject_ids[name] = len(subject_names)
+                subject_names.append(name)
+            return subject_ids[name]
+
+        def equipment_id(name):
+            if name is None:
+                return -1
+            if name not in equipment_ids:
+                equipment_ids[name] = len(equipment_names)
+                equipment_names.append(name)
+            return equipment_ids[name]
+
+        subject_ids, equipment_ids = {}, {}
+        for group in data.groups.values():
+            for name in group.subjects:
+                subject_id(name)
+        for teacher in data.teachers.values():
+            for name in teacher.subjects_name:
+                subject_id(name)
+
+        n_groups, n_subjects = len(group_names), len(subject_names)
+        n_teachers, n_rooms = len(teacher_names), len(room_names)
+
+        required_hours = np.zeros((n_groups, n_subjects), dtype=np.int16)
+        group_subjects = np.zeros((n_groups, n_subjects), dtype=bool)
+        is_difficult = np.zeros((n_groups, n_subjects), dtype=bool)
+        subject_equipment = np.full((n_groups, n_subjects), -1, dtype=np.int16)
+        day_allowed = np.ones((n_groups, n_subjects, N_DAYS), dtype=bool)
+        time_allowed = np.ones((n_groups, n_subjects, N_HOURS), dtype=bool)
+
+        for g, group in enumerate(data.groups.values()):
+            for name, subject in group.subjects.items():
+                s = subject_ids[name]
+                group_subjects[g, s] = True
+                required_hours[g, s] = parse_hours(subject.weekly_hours)
+                is_difficult[g, s] = bool(subject.is_difficult)
+                subject_equipment[g, s] = equipment_id(subject.equipment_requirement)
+                day_allowed[g, s] = [subject.is_day_allowed(day) for day in range(N_DAYS)]
+                time_allowed[g, s] = [subject.is_time_allowed(slot) for slot in range(N_HOURS)]
+
+        teacher_subjects = np.zeros((n_teachers, n_subjects), dtype=bool)
+        teacher_groups = np.zeros((n_teachers, n_groups), dtype=bool)
+        teacher_days = np.ones((n_teachers, N_DAYS), dtype=bool)
+        group_ids = {name: idx for idx, name in enumerate(group_names)}
+
+        for t, teacher in enumerate(data.teachers.values()):
+            for name in teacher.subjects_name:
+                teacher_subjects[t, subject_ids[name]] = True
+            for name in teacher.available_groups_name:
+                if name in group_ids:
+                    teacher_groups[t, group_ids[name]] = True
+            teacher_days[t] = teacher.available_days[:N_DAYS]
+
+        room_equipment = np.full(n_rooms, -1, dtype=np.int16)
+        room_building = np.zeros(n_rooms, dtype=np.int16)
+        for r, room in enumerate(data.rooms):
+            room_equipment[r] = equipment_id(room.equipment)
+            if room.building not in building_names:
+                building_names.append(room.building)
+            room_building[r] = building_names.index(room.building)
+
+        config = data.schedule_config
+        return cls(group_names, subject_names, teacher_names, room_names,
+                   equipment_names, building_names,
+                   required_hours, group_subjects, is_difficult, subject_equipment,
+                   day_allowed, time_allowed,
+                   teacher_subjects, teacher_groups, teacher_days,
+                   room_equipment, room_building,
+                   daily_hours_limit=getattr(config, "daily_hours_limit", None),
+                   weekly_hours_limit=getattr(config, "weekly_hours_limit", None),
+                   daily_difficult_hours_limit=getattr(config, "daily_difficult_hours_limit", None))
@@ -0,0 +1,158 @@
+import numpy as np
+
+from BatchEvaluator import EMPTY
+from Encoding import TripleEncoding
+from ProblemModel import ProblemModel
+
+TEACHER_DRAWS = 4  # Redraws of a teacher who does not work on the lesson's day
+
+
+def _ranks(keys: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """Position of every element among the elements with the same key, in `order`."""
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    run_start = np.repeat(starts, np.diff(np.r_[starts, len(keys)]))
+    ranks = np.empty(len(keys), dtype=np.int64)
+    ranks[order] = np.arange(len(keys)) - run_start
+    return ranks
+
+
+class _Candidates:
+    """Compressed lists of allowed values per key, e.g. teachers per (group, subject)."""
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray, n_keys: int):
+        order = np.argsort(keys, kind="stable")
+        self.values = np.r_[values[order], -1]  # The sentinel makes empty lists safe to index
+        self.counts = np.bincount(keys, minlength=n_keys)
+        self.starts = np.cumsum(self.counts) - self.counts
+
+    def draw(self, keys: np.ndarray) -> np.ndarray:
+        """A uniformly random allowed value per key, -1 where nothing is allowed."""
+        counts = self.counts[keys]
+        picks = self.starts[keys] + (np.random.random(len(keys)) * counts).astype(np.int64)
+        return np.where(counts > 0, self.values[np.where(counts > 0, picks, -1)], -1)
+
+
+class FeasibilityRepair:
+    """
+    Pulls problem-mode genomes back to a valid shape, one vectorized pass for
+    a whole batch:
+
+    1. weekly hours: extra lessons of a (group, subject) are dropped at
+       random, missing ones are added in random free slots of the group;
+    2. eligibility: lessons whose teacher may not teach the subject to the
+       group (or does not work that day), or whose room lacks the required
+       equipment, get an allowed teacher and room; valid ones are kept;
+    3. gaps: the lessons of every group-day are closed up into one block,
+       starting where the first lesson was (moved earlier if the block would
+       run past the last hour).
+
+    Clashes and day/time restrictions are left to the fitness. Randomness
+    comes from numpy.random, so runs are reproducible (and checkpointed) with
+    the rest of the GA state.
+    """
+
+    def __init__(self, problem: ProblemModel, encoding: TripleEncoding):
+        self.problem = problem
+        self.encoding = encoding
+        config = problem.config()
+        self.shape = (config.n_groups, config.n_days, config.n_hours)
+        self.n_genes = config.n_groups * config.n_days * config.n_hours
+
+        genes = np.arange(self.n_genes)
+        self.gene_group = genes // (config.n_days * config.n_hours)
+        self.gene_day = (genes // config.n_hours) % config.n_days
+
+        n_subjects = problem.n_subjects
+        self.required = problem.required_hours.astype(np.int64).ravel()
+
+        teachers, groups, subjects = np.nonzero(problem.eligible)
+        self.teachers = _Candidates(groups * n_subjects + subjects, teachers, len(self.required))
+        groups, subjects, rooms = np.nonzero(problem.room_ok)
+        self.rooms = _Candidates(groups * n_subjects + subjects, rooms, len(self.required))
+
+    def empty(self, n: int) -> np.ndarray:
+        return np.full((n, self.n_genes), EMPTY, dtype=np.int64)
+
+    def repair(self, genomes: np.ndarray) -> np.ndarray:
+        genomes = np.asarray(genomes).reshape(-1, self.n_genes)
+        n = len(genomes)
+        n_groups, n_subjects = self.problem.n_groups, self.problem.n_subjects
+        encoding = self.encoding
+
+        values = genomes.astype(np.int64)
+        occupied = values >= 0
+        safe = np.where(occupied, values, 0)
+        subject = np.where(occupied, encoding.subject[safe], -1).astype(np.int64)
+        teacher = np.where(occupied, encoding.teacher[safe], -1).astype(np.int64)
+        room = np.where(occupied, encoding.classroom[safe], -1).astype(np.int64)
+
+        # 1. Weekly hours: keep a random `required` lessons of every (individual, group, subject)
+        rows, positions = np.nonzero(occupied)
+        group_subject = self.gene_group[positions] * n_subjects + subject[rows, positions]
+        keys = rows * len(self.required) + group_subject
+        ranks = _ranks(keys, np.lexsort((np.random.random(len(keys)), keys)))
+        drop = ranks >= self.required[group_subject]
+        subject[rows[drop], positions[drop]] = -1
+        occupied[rows[drop], positions[drop]] = False
+
+        kept = np.bincount(keys[~drop], minlength=n * len(self.required))
+        missing = np.maximum(np.tile(self.required, n) - kept, 0)
+        lesson_keys = np.repeat(np.arange(len(missing)), missing)  # (individual, group, subject), sorted
+        lesson_subjects = lesson_keys % n_subjects
+        lesson_slots = lesson_keys // n_subjects  # individual * n_groups + group
+        lesson_ranks = np.arange(len(lesson_keys)) - np.searchsorted(lesson_slots, lesson_slots)
+
+        free_rows, free_positions = np.nonzero(~occupied)
+        free_slots = free_rows * n_groups + self.gene_group[free_positions]
+        free_order = np.lexsort((np.random.random(len(free_slots)), free_slots))
+        free_counts = np.bincount(free_slots, minlength=n * n_groups)
+        free_starts = np.cumsum(free_counts) - free_counts
+
+        fits = lesson_ranks < free_counts[lesson_slots]  # Curricula larger than the week keep their deficit
+        chosen = free_order[free_starts[lesson_slots[fits]] + lesson_ranks[fits]]
+        new_rows, new_positions = free_rows[chosen], free_positions[chosen]
+        subject[new_rows, new_positions] = lesson_subjects[fits]
+        teacher[new_rows, new_positions] = -1
+        room[new_rows, new_positions] = -1
+        occupied[new_rows, new_positions] = True
+
+        # 2. Eligible teachers and equipped rooms
+        rows, positions = np.nonzero(occupied)
+        lesson_subjects = subject[rows, positions]
+        group_subject = self.gene_group[positions] * n_subjects + lesson_subjects
+        days = self.gene_day[positions]
+        lesson_teachers = teacher[rows, positions]
+        lesson_rooms = room[rows, positions]
+
+        bad = (lesson_teachers < 0) | ~(self.problem.eligible[lesson_teachers, self.gene_group[positions],
+                                                              lesson_subjects]
+                                        & self.problem.teacher_days[lesson_teachers, days])
+        for _ in range(TEACHER_DRAWS):
+            if not bad.any():
+                break
+            drawn = self.teachers.draw(group_subject[bad])
+            lesson_teachers[bad] = drawn
+            works = (drawn >= 0) & self.problem.teacher_days[drawn, days[bad]]
+            bad[np.flatnonzero(bad)[works | (drawn < 0)]] = False
+
+        bad = (lesson_rooms < 0) | ~self.problem.room_ok[self.gene_group[positions], lesson_subjects, lesson_rooms]
+        lesson_rooms[bad] = self.rooms.draw(group_subject[bad])
+
+        # Lessons nobody may teach (or no room fits) keep index 0 so they stay encodable
+        values = np.full((n, self.n_genes), EMPTY, dtype=np.int64)
+        values[rows, positions] = encoding.encode(np.maximum(lesson_teachers, 0), lesson_subjects,
+                                                  np.maximum(lesson_rooms, 0))
+
+        # 3. Close the gaps of every group-day
+        grid = values.reshape((n,) + self.shape)
+        present = grid >= 0
+        n_hours = self.shape[-1]
+        count = present.sum(axis=-1, keepdims=True)
+        start = np.minimum(present.argmax(axis=-1)[..., None], n_hours - count)
+        target = start + np.cumsum(present, axis=-1) - 1
+
+        compact = np.full_like(grid, EMPTY)
+        index = np.nonzero(present)
+        compact[index[:-1] + (target[index],)] = grid[index]
+        return compact.reshape(n, self.n_genes).astype(genomes.dtype, copy=False)
@@ -0,0 +1,216 @@
+from Schedule import DAYS, SLOTS
+from ScheduleLog import DEBUG, INFO, WARNING
+
+
+class Rescheduler:
+    """
+    Инкрементальная перестройка готового расписания после изменения данных:
+    преподаватель не работает в некоторые дни (Teacher.available_days) или
+    кабинет выведен из пула. Перестраиваются только затронутые занятия,
+    остальное расписание не меняется.
+
+    Цель - устойчивость: как можно меньше изменений относительно текущего
+    расписания. Для каждого затронутого занятия варианты перебираются от
+    самого дешевого:
+
+    1. тот же слот с другим преподавателем и/или кабинетом;
+    2. перенос в свободный слот в конце другого дня, если освободившийся
+       слот был последним в своем дне (окно не появляется);
+    3. обмен слотами с другим занятием той же группы (меняются два
+       занятия, окна и число часов в днях сохраняются);
+    4. перенос в конец другого дня с окном на старом месте.
+
+    Занятие без единого варианта снимается и попадает в unplaced_subjects.
+    Все проверки занятости - по 48-битным маскам Schedule, поэтому
+    перестройка после отсутствия одного преподавателя занимает
+    миллисекунды даже на больших экземплярах.
+    """
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.data = schedule.data
+        self.log = schedule.log
+        config = self.data.schedule_config
+        self.daily_limit = min(SLOTS, getattr(config, "daily_hours_limit", None) or SLOTS)
+        self.difficult_limit = getattr(config, "daily_difficult_hours_limit", None)
+        self.changes = []
+
+    def apply(self, absences=None, removed_rooms=()):
+        """
+        absences - словарь имя преподавателя -> дни (0..5), в которые он не
+        работает; removed_rooms - номера выведенных кабинетов. Данные
+        обновляются, затронутые занятия перестраиваются. Возвращает список
+        изменений: словари с группой, предметом и местом занятия до (from)
+        и после (to, None - занятие снято) в виде (день, слот,
+        преподаватель, кабинет).
+        """
+        schedule, data = self.schedule, self.data
+        absences = {name: set(days) for name, days in (absences or {}).items()}
+        for name, days in absences.items():
+            teacher = data.teachers[name]
+            for day in days:
+                teacher.available_days[day] = False
+        removed = set(removed_rooms)
+        for number in removed:
+            data.remove_room(number)
+        if absences or removed:
+            data.problem = None
+
+        affected = []
+        for group_name, group_schedule in schedule.schedule.items():
+            teachers = schedule.teacher_assignments[group_name]
+            rooms = schedule.room_assignments[group_name]
+            for day in range(DAYS):
+                for slot in range(SLOTS):
+                    if group_schedule[day][slot] is not None and (
+                            day in absences.get(teachers[day][slot], ()) or rooms[day][slot] in removed):
+                        affected.append((group_name, day, slot))
+
+        # Сначала освобождаем все затронутые слоты, чтобы занятия не мешали друг другу
+        lessons = [self._take(*cell) for cell in affected]
+        for lesson in lessons:
+            self._reschedule(lesson)
+
+        log = self.log
+        if log.info:
+            log.emit(INFO, "reschedule_finished", affected=len(lessons), changed=len(self.changes))
+        return self.changes
+
+    # ----- Занятия -----
+
+    def _take(self, group_name, day, slot):
+        # Снимает занятие и возвращает его описание
+        schedule = self.schedule
+        lesson = (group_name, day, slot, schedule.schedule[group_name][day][slot],
+                  schedule.teacher_assignments[group_name][day][slot],
+                  schedule.room_assignments[group_name][day][slot])
+        schedule.remove_lesson(group_name, day, slot)
+        return lesson
+
+    def _put(self, lesson, day, slot, teacher, room):
+        group_name, _, _, subject_name, _, _ = lesson
+        self.schedule.place_lesson(group_name, day, slot, subject_name, teacher, room)
+
+    def _record(self, lesson, target):
+        group_name, day, slot, subject_name, teacher_name, room_number = lesson
+        self.changes.append({"group": group_name, "subject": subject_name,
+                             "from": (day, slot, teacher_name, room_number), "to": target})
+        log = self.log
+        if target is None:
+            self.schedule.unplaced_subjects.setdefault(group_name, []).append(subject_name)
+            log.counters["unplaced"] += 1
+            if log.warning:
+                log.emit(WARNING, "reschedule_failed", group=group_name, subject=subject_name, day=day, slot=slot)
+        elif log.debug:
+            log.emit(DEBUG, "rescheduled", group=group_name, subject=subject_name, day=day, slot=slot,
+                     to_day=target[0], to_slot=target[1])
+
+    # ----- Выбор ресурсов -----
+
+    def _teachers(self, lesson):
+        group_name, _, _, subject_name, _, _ = lesson
+        return list(self.data.get_teachers_for(subject_name, group_name))
+
+    def _teacher(self, lesson, day, slot):
+        # Прежний преподаватель, если он работает и свободен, иначе первый подходящий
+        schedule = self.schedule
+        candidates = sorted(self._teachers(lesson), key=lambda teacher: teacher.name != lesson[4])
+        for teacher in candidates:
+            if teacher.available_days[day] and schedule.is_teacher_available(teacher, day, slot):
+                return teacher
+        return None
+
+    def _room(self, lesson, day, slot):
+        group_name, _, _, subject_name, _, room_number = lesson
+        schedule = self.schedule
+        subject = self.data.groups[group_name].subjects[subject_name]
+        rooms = self.data.get_rooms_for(subject.equipment_requirement)
+        for room in rooms:
+            if room.number == room_number and schedule.is_room_free(room, day, slot):
+                return room
+        return schedule.find_free_room(subject, day, slot)
+
+    def _allowed(self, lesson, day, slot):
+        # Запреты предмета по дням и времени и лимит сложных предметов в день
+        group_name, _, _, subject_name, _, _ = lesson
+        group = self.data.groups[group_name]
+        subject = group.subjects[subject_name]
+        if not (subject.is_day_allowed(day) and subject.is_time_allowed(slot)):
+            return False
+        if subject.is_difficult and self.difficult_limit is not None:
+            row = self.schedule.schedule[group_name][day]
+            difficult = sum(1 for name in row if name is not None and group.subjects[name].is_difficult)
+            return difficult < self.difficult_limit
+        return True
+
+    def _try_place(self, lesson, day, slot):
+        # Ставит занятие в слот, если хватает ресурсов; возвращает место или None
+        if not self._allowed(lesson, day, slot):
+            return None
+        teacher = self._teacher(lesson, day, slot)
+        # Предмет, который некому вести, и раньше стоял без преподавателя
+        if teacher is None and self._teachers(lesson):
+            return None
+        room = self._room(lesson, day, slot)
+        if room is None:
+            return None
+        self._put(lesson, day, slot, teacher, room)
+        return day, slot, teacher.name if teacher else "N/A", room.number
+
+    # ----- Варианты перестройки -----
+
+    def _reschedule(self, lesson):
+        group_name, day, slot = lesson[:3]
+        row = self.schedule.schedule[group_name][day]
+        leaves_gap = any(name is not None for name in row[slot + 1:]) and any(name is not None for name in row[:slot])
+
+        target = self._try_place(lesson, day, slot)
+        if target is None and not leaves_gap:
+            target = self._move_to_day_end(lesson)
+        if target is None:
+            target = self._swap(lesson)
+        if target is None and leaves_gap:
+            target = self._move_to_day_end(lesson)
+        self._record(lesson, target)
+
+    def _move_to_day_end(self, lesson):
+        group_name, old_day = lesson[0], lesson[1]
+        busy = self.schedule.group_busy.get(group_name, 0)
+        for day in range(DAYS):
+            if day == old_day:
+                continue
+            day_mask = (busy >> (day * SLOTS)) & ((1 << SLOTS) - 1)
+            count = bin(day_mask).count("1")
+            slot = day_mask.bit_length()  # Слот после последнего занятия дня
+            if count >= self.daily_limit or slot >= SLOTS:
+                continue
+            target = self._try_place(lesson, day, slot)
+            if target is not None:
+                return target
+        return None
+
+    def _swap(self, lesson):
+        # Обмен с занятием той же группы: оно встает на освободившееся место, затронутое - на его
+        group_name, day, slot = lesson[:3]
+        schedule = self.schedule
+        for other_day in range(DAYS):
+            for other_slot in range(SLOTS):
+                if other_day == day or schedule.schedule[group_name][other_day][other_slot] is None:
+                    continue
+                # Снятое занятие освобождает свои ресурсы и место в лимите сложных предметов своего дня
+                other = self._take(group_name, other_day, other_slot)
+                moved = self._try_place(other, day, slot)
+                if moved is not None:
+                    target = self._try_place(lesson, other_day, other_slot)
+                    if target is not None:
+                        self._record(other, moved)
+                        return target
+                    schedule.remove_lesson(group_name, day, slot)
+                self._put(other, other_day, other_slot, *self._resources(other))
+        return None
+
+    def _resources(self, lesson):
+        # Объекты прежних преподавателя и кабинета занятия
+        teacher = self.data.teachers.get(lesson[4])
+        room = next((room for room in self.data.rooms if room.number == lesson[5]), None)
+        return teacher, room
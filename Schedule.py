@@ -1,106 +1,234 @@
 import random
 
+from ProblemModel import ProblemModel
+from ScheduleLog import DEBUG, GAP, INFO, NO_ROOM, SLOT_BUSY, TEACHER_BUSY, WARNING, ScheduleLog
+
+DAYS = 6
+SLOTS = 8
+ALL_SLOTS_MASK = (1 << (DAYS * SLOTS)) - 1  # 48 бит: бит day * 8 + slot
+
+
+def slot_bit(day, slot):
+    return 1 << (day * SLOTS + slot)
+
+
 class Schedule:
-    def __init__(self, data):
+    def __init__(self, data, sink=None):
         self.data = data  # Объект MainData, который содержит все данные
+        self.log = ScheduleLog(sink)  # События и счетчики отказов; по умолчанию print() уровня INFO
         self.schedule = {}  # Словарь для хранения расписания
         self.unplaced_subjects = {}  # Словарь для хранения предметов, которые не удалось разместить
         self.teacher_assignments = {}  # Словарь для хранения назначений преподавателей
+        self.room_assignments = {}  # Словарь для хранения назначений кабинетов
+
+        # Индекс занятости: 48-битная маска занятых слотов для каждого преподавателя, кабинета и группы
+        self.teacher_busy = {}  # Ключ - имя преподавателя
+        self.room_busy = {}  # Ключ - номер кабинета
+        self.group_busy = {}  # Ключ - название группы
 
-    def generate_initial_schedule(self):
-        print("Начало генерации начального расписания...")
-        # Для каждой группы создаем расписание на основе данных в self.data
-        for group_name, group in self.data.groups.items():
-            print(f"Генерация расписания для группы {group_name}...")
-            self.schedule[group_name] = self.generate_group_schedule(group)
-        print("Генерация начального расписания завершена.")
+    @property
+    def problem(self):
+        # Плотная NumPy-модель данных, общая для построителя расписания и генетического алгоритма;
+        # строится по требованию и хранится в MainData (из кэша парсера приходит готовой)
+        if self.data.problem is None:
+            self.data.problem = ProblemModel.from_main_data(self.data)
+        return self.data.problem
+
+    def generate_initial_schedule(self, mode="random", workers=None):
+        log = self.log
+        if log.info:
+            log.emit(INFO, "generation_started")
+        if mode not in ("constructive", "random"):
+            raise ValueError(f"Неизвестный режим генерации расписания: {mode}")
+        if workers is not None:
+            # Независимые части задачи решаются параллельно в workers процессах и сливаются
+            from Decomposition import solve_decomposed
+            solve_decomposed(self, mode, workers)
+        elif mode == "constructive":
+            # Детерминированное построение с распространением ограничений
+            from ConstructiveScheduler import ConstructiveScheduler
+            ConstructiveScheduler(self).run()
+        elif mode == "random":
+            # Для каждой группы создаем расписание на основе данных в self.data
+            for group_name, group in self.data.groups.items():
+                if log.info:
+                    log.emit(INFO, "group_started", group=group_name)
+                self.schedule[group_name] = self.generate_group_schedule(group)
+        if log.info:
+            log.emit(INFO, "generation_finished")
 
         # Выводим информацию о предметах, которые не удалось разместить
-        if self.unplaced_subjects:
-            print("Предметы, которые не удалось разместить:")
+        if self.unplaced_subjects and log.warning:
+            log.emit(WARNING, "unplaced_summary")
             for group_name, subjects in self.unplaced_subjects.items():
                 for subject_name in subjects:
-                    print(f"  Группа: {group_name}, Предмет: {subject_name}")
+                    log.emit(WARNING, "unplaced", group=group_name, subject=subject_name)
 
-    def generate_group_schedule(self, group):
+    def init_group_schedule(self, group_name):
         group_schedule = {day: [None] * 8 for day in range(6)}  # 6 дней, 8 слотов на день
-        self.teacher_assignments[group.name] = {day: [None] * 8 for day in range(6)}  # Создаем словарь для назначений
+        self.schedule[group_name] = group_schedule
+        self.teacher_assignments[group_name] = {day: [None] * 8 for day in range(6)}  # Создаем словарь для назначений
+        self.room_assignments[group_name] = {day: [None] * 8 for day in range(6)}
+        return group_schedule
+
+    def generate_group_schedule(self, group):
+        group_schedule = self.init_group_schedule(group.name)
+        log = self.log
+        counters = log.counters
 
         for subject_name, subject in group.subjects.items():
             try:
                 remaining_hours = int(subject.weekly_hours)
             except ValueError:
-                print(f"Ошибка: Некорректное количество часов для предмета {subject_name} в группе {group.name}. Пропускаем...")
+                if log.warning:
+                    log.emit(WARNING, "invalid_hours", group=group.name, subject=subject_name)
                 continue
 
-            print(f"Распределение предмета {subject_name} ({remaining_hours} часов) для группы {group.name}...")
+            if log.debug:
+                log.emit(DEBUG, "subject_started", group=group.name, subject=subject_name, hours=remaining_hours)
 
             attempts = 0
             while remaining_hours > 0:
                 attempts += 1
                 if attempts > 1000:
-                    print(f"Ошибка: Слишком много попыток ({attempts}) для распределения предмета {subject_name} в группе {group.name}. Пропускаем...")
+                    if log.warning:
+                        log.emit(WARNING, "too_many_attempts", group=group.name, subject=subject_name, attempts=attempts)
                     if group.name not in self.unplaced_subjects:
                         self.unplaced_subjects[group.name] = []
                     self.unplaced_subjects[group.name].append(subject_name)
+                    counters["unplaced"] += 1
                     break
 
                 day = random.randint(0, 5)
                 slot = random.randint(0, 7)
 
-                print(f"Попытка распределения предмета {subject_name} в день {day + 1}, слот {slot + 1}...")
+                counters["attempts"] += 1
+                if log.debug:
+                    log.emit(DEBUG, "attempt", group=group.name, subject=subject_name, day=day, slot=slot)
 
                 if self.is_slot_available(group, group_schedule, subject_name, day, slot):
-                    group_schedule[day][slot] = subject_name
                     teacher = self.get_teacher_for_subject(subject_name, group.name, day, slot)
-                    self.teacher_assignments[group.name][day][slot] = teacher.name if teacher else "N/A"
+                    room = self.find_free_room(subject, day, slot)
+                    self.place_lesson(group.name, day, slot, subject_name, teacher, room)
                     remaining_hours -= 1
-                    print(f"Предмет {subject_name} успешно распределен: день {day + 1}, слот {slot + 1}. Осталось часов: {remaining_hours}")
-                else:
-                    print(f"Не удалось распределить предмет {subject_name} в день {day + 1}, слот {slot + 1}. Попробуем снова...")
+                    counters["placed"] += 1
+                    if log.debug:
+                        log.emit(DEBUG, "placed", group=group.name, subject=subject_name, day=day, slot=slot,
+                                 remaining=remaining_hours)
+                elif log.debug:
+                    log.emit(DEBUG, "retry", group=group.name, subject=subject_name, day=day, slot=slot)
 
         return group_schedule
 
+    def place_lesson(self, group_name, day, slot, subject_name, teacher, room):
+        # Записываем занятие в расписание и отмечаем слот занятым в индексе;
+        # прежнее занятие ячейки снимаем, чтобы его преподаватель и кабинет освободились
+        bit = slot_bit(day, slot)
+        if self.group_busy.get(group_name, 0) & bit:
+            self.remove_lesson(group_name, day, slot)
+        self.schedule[group_name][day][slot] = subject_name
+        self.teacher_assignments[group_name][day][slot] = teacher.name if teacher else "N/A"
+        self.room_assignments[group_name][day][slot] = room.number if room else None
+
+        self.group_busy[group_name] = self.group_busy.get(group_name, 0) | bit
+        if teacher:
+            self.teacher_busy[teacher.name] = self.teacher_busy.get(teacher.name, 0) | bit
+        if room:
+            self.room_busy[room.number] = self.room_busy.get(room.number, 0) | bit
+
+    def remove_lesson(self, group_name, day, slot):
+        # Убираем занятие из расписания и освобождаем слот в индексе
+        bit = slot_bit(day, slot)
+        teacher_name = self.teacher_assignments[group_name][day][slot]
+        room_number = self.room_assignments[group_name][day][slot]
+
+        self.schedule[group_name][day][slot] = None
+        self.teacher_assignments[group_name][day][slot] = None
+        self.room_assignments[group_name][day][slot] = None
+
+        self.group_busy[group_name] = self.group_busy.get(group_name, 0) & ~bit
+        if teacher_name in self.teacher_busy:
+            self.teacher_busy[teacher_name] &= ~bit
+        if room_number in self.room_busy:
+            self.room_busy[room_number] &= ~bit
+
+    def free_slots_mask(self, teacher=None, room=None, group_name=None):
+        # Маска слотов, в которых свободны все переданные преподаватель, кабинет и группа
+        busy = 0
+        if teacher:
+            busy |= self.teacher_busy.get(teacher.name, 0)
+        if room:
+            busy |= self.room_busy.get(room.number, 0)
+        if group_name:
+            busy |= self.group_busy.get(group_name, 0)
+        return ~busy & ALL_SLOTS_MASK
 
     def is_slot_available(self, group, group_schedule, subject_name, day, slot):
         # Получаем предмет
         subject = group.subjects[subject_name]
 
+        log = self.log
+
+        counters = log.counters
+
+        # Проверка, что у группы нет занятия в этом слоте
+        if self.group_busy.get(group.name, 0) & slot_bit(day, slot):
+            log.reject(SLOT_BUSY)
+            if log.debug:
+                log.emit(DEBUG, "rejected", reason=SLOT_BUSY, group=group.name, subject=subject_name,
+                         day=day, slot=slot)
+            return False
+
         # Проверка на наличие преподавателя
         teacher = self.get_teacher_for_subject(subject_name, group.name, day, slot)
         if teacher:
+            if log.debug:
+                counters["check.teacher"] += 1
             if not self.is_teacher_available(teacher, day, slot):
-                print(f"Преподаватель {teacher.name} занят в день {day + 1}, слот {slot + 1}.")
+                log.reject(TEACHER_BUSY)
+                if log.debug:
+                    log.emit(DEBUG, "rejected", reason=TEACHER_BUSY, teacher=teacher.name, subject=subject_name,
+                             day=day, slot=slot)
                 return False
         else:
-            print(f"Преподаватель для предмета {subject_name} не найден.")
+            counters["teacher_missing"] += 1
+            if log.debug:
+                log.emit(DEBUG, "teacher_missing", group=group.name, subject=subject_name)
 
         # Проверка на наличие свободного кабинета
+        if log.debug:
+            counters["check.room"] += 1
         if not self.is_room_available(subject, day, slot):
-            print(f"Нет доступного кабинета для предмета {subject_name} в день {day + 1}, слот {slot + 1}.")
+            log.reject(NO_ROOM)
+            if log.debug:
+                log.emit(DEBUG, "rejected", reason=NO_ROOM, subject=subject_name, day=day, slot=slot)
             return False
 
         # Проверка на наличие окон
+        if log.debug:
+            counters["check.gap"] += 1
         if self.will_create_gap(group_schedule, day, slot):
-            print(f"Распределение предмета {subject_name} в день {day + 1}, слот {slot + 1} создаст окно.")
+            log.reject(GAP)
+            if log.debug:
+                log.emit(DEBUG, "rejected", reason=GAP, subject=subject_name, day=day, slot=slot)
             return False
 
         return True
 
     def is_room_available(self, subject, day, slot):
         # Проверяем, доступен ли кабинет с нужным оборудованием
-        for room in self.data.rooms:
-            if room.equipment == subject.equipment_requirement or subject.equipment_requirement is None:
-                if self.is_room_free(room, day, slot):
-                    return True
-        return False
+        return self.find_free_room(subject, day, slot) is not None
+
+    def find_free_room(self, subject, day, slot):
+        # Первый свободный в данный слот кабинет с нужным оборудованием
+        for room in self.data.get_rooms_for(subject.equipment_requirement):
+            if self.is_room_free(room, day, slot):
+                return room
+        return None
 
     def is_room_free(self, room, day, slot):
         # Проверяем, свободен ли кабинет в данный слот
-        for group_name, group_schedule in self.schedule.items():
-            if group_schedule[day][slot] == room.number:
-                return False
-        return True
+        return not self.room_busy.get(room.number, 0) & slot_bit(day, slot)
 
     def will_create_gap(self, group_schedule, day, slot):
         # Проверка для нулевого слота (первое занятие)
@@ -133,16 +261,9 @@ class Schedule:
         return False
 
     def get_teacher_for_subject(self, subject_name, group_name, day, slot):
-        available_teachers = []
-
-        # Шаг 1: Ищем всех учителей, которые ведут нужный предмет
-        for teacher in self.data.teachers.values():
-            if subject_name in teacher.subjects_name:
-                # Шаг 2: Проверяем, ведет ли этот учитель предмет в данной группе
-                if group_name in teacher.available_groups_name:
-                    # Шаг 3: Проверяем, свободен ли учитель в этот день и слот
-                    if self.is_teacher_available(teacher, day, slot):
-                        available_teachers.append(teacher)
+        # Берем из индекса учителей, которые ведут предмет в группе, и оставляем свободных
+        available_teachers = [teacher for teacher in self.data.get_teachers_for(subject_name, group_name)
+                              if self.is_teacher_available(teacher, day, slot)]
 
         # Если есть несколько доступных учителей, выбираем случайного
         if available_teachers:
@@ -152,12 +273,18 @@ class Schedule:
 
     def is_teacher_available(self, teacher, day, slot):
         # Проверяем, свободен ли преподаватель в этот день и слот
-        for group_name, group_schedule in self.schedule.items():
-            if group_name in teacher.available_groups_name:
-                if group_schedule[day][slot] is not None:
-                    return False
-        return True
+        return not self.teacher_busy.get(teacher.name, 0) & slot_bit(day, slot)
+
+    def reschedule(self, absences=None, removed_rooms=()):
+        # Инкрементальная перестройка после отсутствия преподавателей или вывода кабинетов (см. Rescheduler)
+        from Rescheduler import Rescheduler
+        return Rescheduler(self).apply(absences, removed_rooms)
+
+    def validate(self):
+        # Векторная проверка жестких и мягких ограничений: счетчики нарушений и ячейки-нарушители
+        from ScheduleValidator import validate_schedule
+        return validate_schedule(self)
 
     def is_valid(self):
-        # Проверка допустимости расписания (можно расширить для более детальных проверок)
-        return True
+        # Допустимо, если нет ни одного нарушения жестких ограничений
+        return self.validate().is_valid()
@@ -1,13 +1,32 @@
 import openpyxl
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
-from openpyxl.styles import Alignment
+from openpyxl.styles import Alignment, Font, NamedStyle
+
+from ScheduleTable import ScheduleTable, save_table
+from ScheduleValidator import validate_schedule
+
+DAYS = 6
+SLOTS = 8
+COLUMN_WIDTH = 16
+
+
+def make_styles():
+    # Общие именованные стили: один экземпляр на книгу вместо Alignment на каждую ячейку
+    lesson = NamedStyle(name="lesson")
+    lesson.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    header = NamedStyle(name="header")
+    header.font = Font(bold=True)
+    header.alignment = Alignment(horizontal="center", vertical="center")
+    return lesson, header
 
 
 class ScheduleExporter:
-    def __init__(self, schedule, file_name="output_schedule.xlsx"):
+    def __init__(self, schedule, file_name="output_schedule.xlsx", validate=False):
         self.schedule = schedule
         self.file_name = file_name
+        self.validate = validate  # Проверять ограничения экспортируемого расписания и возвращать отчет
 
     def export_to_excel(self):
         wb = Workbook()
@@ -55,3 +74,82 @@ class ScheduleExporter:
         # Сохранение файла
         wb.save(self.file_name)
         print(f"Расписание успешно экспортировано в файл {self.file_name}")
+        return self.validation_report()
+
+    def export_streaming(self):
+        # Потоковый экспорт: write-only листы, строки пишутся сразу по мере формирования.
+        # За один проход по (день, слот) заполняются три листа: по группам, по преподавателям и по кабинетам
+        wb = Workbook(write_only=True)
+        for style in make_styles():
+            wb.add_named_style(style)
+
+        groups = list(self.schedule.schedule.keys())
+        teachers = list(self.schedule.data.teachers.keys())
+        rooms = [room.number for room in self.schedule.data.rooms]
+        teacher_columns = {name: col for col, name in enumerate(teachers)}
+        room_columns = {number: col for col, number in enumerate(rooms)}
+
+        sheets = [self._create_sheet(wb, "Расписание", groups),
+                  self._create_sheet(wb, "Преподаватели", teachers),
+                  self._create_sheet(wb, "Кабинеты", rooms)]
+        group_ws, teacher_ws, room_ws = sheets
+
+        for day in range(DAYS):
+            for ws in sheets:
+                ws.append([self._cell(ws, f"День {day + 1}", "header")])
+
+            for slot in range(SLOTS):
+                group_row = [None] * len(groups)
+                teacher_row = [None] * len(teachers)
+                room_row = [None] * len(rooms)
+
+                for col, group_name in enumerate(groups):
+                    subject_name = self.schedule.schedule[group_name][day][slot]
+                    if subject_name is None:
+                        continue
+
+                    teacher_name = self.schedule.teacher_assignments[group_name][day][slot]
+                    room_number = self.schedule.room_assignments[group_name][day][slot]
+                    group_row[col] = f"{subject_name}\n{teacher_name}"
+                    if teacher_name in teacher_columns:
+                        teacher_row[teacher_columns[teacher_name]] = f"{subject_name}\n{group_name}"
+                    if room_number in room_columns:
+                        room_row[room_columns[room_number]] = f"{subject_name}\n{group_name}\n{teacher_name}"
+
+                for ws, row in zip(sheets, (group_row, teacher_row, room_row)):
+                    ws.append([self._cell(ws, f"Слот {slot + 1}", "header")]
+                              + [self._cell(ws, value, "lesson") if value is not None else None for value in row])
+
+            # Добавляем пустую строку между днями для удобства чтения
+            for ws in sheets:
+                ws.append([])
+
+        wb.save(self.file_name)
+        print(f"Расписание успешно экспортировано в файл {self.file_name}")
+        return self.validation_report()
+
+    def export_table(self, path):
+        # Столбцовая таблица для внешних систем: .npz, .csv, .jsonl или каталог .npy
+        save_table(ScheduleTable.from_schedule(self.schedule), path)
+        print(f"Расписание успешно экспортировано в {path}")
+        return self.validation_report()
+
+    def validation_report(self):
+        # Отчет ScheduleValidator о нарушениях, если проверка включена (validate=True); иначе None
+        return validate_schedule(self.schedule) if self.validate else None
+
+    @staticmethod
+    def _create_sheet(wb, title, columns):
+        ws = wb.create_sheet(title)
+        # В write-only режиме ширину столбцов задаем до первой строки
+        for col in range(1, len(columns) + 2):
+            ws.column_dimensions[get_column_letter(col)].width = COLUMN_WIDTH
+        ws.append([ScheduleExporter._cell(ws, "День/Слоты", "header")]
+                  + [ScheduleExporter._cell(ws, name, "header") for name in columns])
+        return ws
+
+    @staticmethod
+    def _cell(ws, value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
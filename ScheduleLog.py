@@ -0,0 +1,154 @@
+import logging
+from abc import ABC, abstractmethod
+from collections import Counter
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+
+# Причины отказа в размещении занятия
+TEACHER_BUSY = "teacher_busy"
+NO_ROOM = "no_room"
+GAP = "gap"
+SLOT_BUSY = "slot_busy"
+
+
+def _slot_text(fields):
+    return f"день {fields['day'] + 1}, слот {fields['slot'] + 1}"
+
+
+_REJECTION_MESSAGES = {
+    TEACHER_BUSY: lambda f: f"Преподаватель {f['teacher']} занят в {_slot_text(f)}.",
+    NO_ROOM: lambda f: f"Нет доступного кабинета для предмета {f['subject']} в {_slot_text(f)}.",
+    GAP: lambda f: f"Распределение предмета {f['subject']} в {_slot_text(f)} создаст окно.",
+    SLOT_BUSY: lambda f: f"У группы {f['group']} уже есть занятие в {_slot_text(f)}.",
+}
+
+# Человекочитаемый текст каждого события; вызывается только если уровень включен
+MESSAGES = {
+    "generation_started": lambda f: "Начало генерации начального расписания...",
+    "generation_finished": lambda f: "Генерация начального расписания завершена.",
+    "group_started": lambda f: f"Генерация расписания для группы {f['group']}...",
+    "invalid_hours": lambda f: (f"Ошибка: Некорректное количество часов для предмета {f['subject']} "
+                                f"в группе {f['group']}. Пропускаем..."),
+    "subject_started": lambda f: f"Распределение предмета {f['subject']} ({f['hours']} часов) для группы {f['group']}...",
+    "attempt": lambda f: f"Попытка распределения предмета {f['subject']} в {_slot_text(f)}...",
+    "teacher_missing": lambda f: f"Преподаватель для предмета {f['subject']} не найден.",
+    "rejected": lambda f: _REJECTION_MESSAGES[f["reason"]](f),
+    "placed": lambda f: (f"Предмет {f['subject']} успешно распределен: {_slot_text(f)}. "
+                         f"Осталось часов: {f['remaining']}"),
+    "retry": lambda f: f"Не удалось распределить предмет {f['subject']} в {_slot_text(f)}. Попробуем снова...",
+    "too_many_attempts": lambda f: (f"Ошибка: Слишком много попыток ({f['attempts']}) для распределения предмета "
+                                    f"{f['subject']} в группе {f['group']}. Пропускаем..."),
+    "unplaced_summary": lambda f: "Предметы, которые не удалось разместить:",
+    "unplaced": lambda f: f"  Группа: {f['group']}, Предмет: {f['subject']}",
+    "rescheduled": lambda f: (f"Занятие {f['subject']} группы {f['group']} перенесено: {_slot_text(f)} -> "
+                              f"день {f['to_day'] + 1}, слот {f['to_slot'] + 1}."),
+    "reschedule_failed": lambda f: (f"Не удалось перенести занятие {f['subject']} группы {f['group']} "
+                                    f"({_slot_text(f)}), оно снято."),
+    "reschedule_finished": lambda f: (f"Перестройка расписания завершена: затронуто занятий {f['affected']}, "
+                                      f"изменений {f['changed']}."),
+}
+
+
+def format_event(event, fields):
+    formatter = MESSAGES.get(event)
+    return formatter(fields) if formatter else f"{event} {fields}"
+
+
+class EventSink(ABC):
+    # Приемник событий с порогом уровня; подкласс без emit() нельзя создать
+    def __init__(self, level=INFO):
+        self.level = level
+
+    def enabled(self, level):
+        return level >= self.level
+
+    @abstractmethod
+    def emit(self, level, event, fields):
+        ...
+
+
+class NullSink(EventSink):
+    # Ничего не выводит; счетчики при этом продолжают работать
+    def enabled(self, level):
+        return False
+
+    def emit(self, level, event, fields):
+        pass
+
+
+class PrintSink(EventSink):
+    # Прежний вывод print() для включенных уровней
+    def emit(self, level, event, fields):
+        print(format_event(event, fields))
+
+
+class LoggingSink(EventSink):
+    # Передает события в logging; имя события и поля доступны обработчикам через extra
+    def __init__(self, logger=None, level=None):
+        self.logger = logger or logging.getLogger("Schedule")
+        super().__init__(self.logger.getEffectiveLevel() if level is None else level)
+
+    def enabled(self, level):
+        return level >= self.level and self.logger.isEnabledFor(level)
+
+    def emit(self, level, event, fields):
+        self.logger.log(level, format_event(event, fields), extra={"event": event, "fields": fields})
+
+
+class CollectingSink(EventSink):
+    # Сохраняет события как есть, без форматирования
+    def __init__(self, level=DEBUG):
+        super().__init__(level)
+        self.events = []
+
+    def emit(self, level, event, fields):
+        self.events.append((level, event, fields))
+
+
+class ScheduleLog:
+    """
+    Структурированные события построения расписания.
+
+    Флаги debug/info/warning вычисляются при установке приемника, поэтому в
+    горячих циклах проверка уровня - чтение атрибута, а поля события и текст
+    сообщения вообще не строятся, если уровень выключен:
+
+        if log.debug:
+            log.emit(DEBUG, "attempt", subject=..., day=day, slot=slot)
+
+    Счетчики (попытки, размещения, отказы по причинам, неразмещенные часы)
+    ведутся всегда и не зависят от уровня. Счетчики отдельных проверок
+    (check.*) считаются только при включенном DEBUG, как и подробные события.
+    """
+
+    def __init__(self, sink=None):
+        self.counters = Counter()
+        self.set_sink(sink if sink is not None else PrintSink(INFO))
+
+    def set_sink(self, sink):
+        self.sink = sink
+        self.refresh()
+
+    def refresh(self):
+        # Пересчитать флаги, если у приемника поменялся уровень
+        self.debug = self.sink.enabled(DEBUG)
+        self.info = self.sink.enabled(INFO)
+        self.warning = self.sink.enabled(WARNING)
+
+    def emit(self, level, event, **fields):
+        self.sink.emit(level, event, fields)
+
+    def reject(self, reason):
+        self.counters["rejected." + reason] += 1
+
+    def rejection_counts(self):
+        # Ключ - причина отказа, значение - число отказов
+        prefix = "rejected."
+        return {key[len(prefix):]: value for key, value in self.counters.items() if key.startswith(prefix)}
+
+    def rejection_rates(self):
+        # Доля попыток, отклоненных по каждой причине
+        attempts = self.counters["attempts"]
+        return {reason: count / attempts for reason, count in self.rejection_counts().items()} if attempts else {}
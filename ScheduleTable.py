@@ -0,0 +1,274 @@
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+
+from ProblemModel import N_DAYS, N_HOURS
+
+COLUMNS = ("schedule", "group", "day", "slot", "subject", "teacher", "room")
+ID_COLUMNS = ("group", "subject", "teacher", "room")  # Столбцы, которые ссылаются на словари
+DICTIONARIES = {"group": "group_names", "subject": "subject_names", "teacher": "teacher_names", "room": "room_names"}
+MISSING = -1  # Нет преподавателя ("N/A") или кабинета
+
+
+def id_dtype(size):
+    return np.int16 if size < np.iinfo(np.int16).max else np.int32
+
+
+class ScheduleTable:
+    """
+    Расписание (или пачка расписаний, например результаты ГА) в виде
+    столбцовой таблицы: одна строка на занятие, столбцы - номер расписания,
+    группа, день, слот, предмет, преподаватель и кабинет. Группы, предметы,
+    преподаватели и кабинеты хранятся номерами, их названия - в словарях.
+
+    Форматы: .npz и каталог .npy (отображаются в память при загрузке),
+    потоковые CSV и JSON Lines (в них названия вместо номеров). Из таблицы
+    можно восстановить Schedule или геномы ГА для повторной проверки без
+    повторного решения.
+    """
+
+    def __init__(self, columns, group_names, subject_names, teacher_names, room_names):
+        self.columns = columns  # Ключ - название столбца, значение - массив NumPy
+        self.group_names = list(group_names)
+        self.subject_names = list(subject_names)
+        self.teacher_names = list(teacher_names)
+        self.room_names = list(room_names)
+
+    def __len__(self):
+        return len(self.columns["schedule"])
+
+    @property
+    def n_schedules(self):
+        return int(self.columns["schedule"].max()) + 1 if len(self) else 0
+
+    # ----- Построение -----
+
+    @classmethod
+    def empty_columns(cls, size, problem):
+        return {
+            "schedule": np.zeros(size, dtype=np.int32),
+            "group": np.zeros(size, dtype=id_dtype(problem.n_groups)),
+            "day": np.zeros(size, dtype=np.int8),
+            "slot": np.zeros(size, dtype=np.int8),
+            "subject": np.zeros(size, dtype=id_dtype(problem.n_subjects)),
+            "teacher": np.zeros(size, dtype=id_dtype(problem.n_teachers)),
+            "room": np.zeros(size, dtype=id_dtype(problem.n_rooms)),
+        }
+
+    @classmethod
+    def from_problem_columns(cls, columns, problem):
+        return cls(columns, problem.group_names, problem.subject_names, problem.teacher_names, problem.room_names)
+
+    @classmethod
+    def from_schedule(cls, schedule):
+        # Занятия живого Schedule; номера берутся из schedule.problem
+        problem = schedule.problem
+        rows = []
+        for group_name, group_schedule in schedule.schedule.items():
+            group = problem.group_index[group_name]
+            for day in range(N_DAYS):
+                for slot in range(N_HOURS):
+                    subject_name = group_schedule[day][slot]
+                    if subject_name is None:
+                        continue
+                    teacher_name = schedule.teacher_assignments[group_name][day][slot]
+                    room_number = schedule.room_assignments[group_name][day][slot]
+                    rows.append((0, group, day, slot, problem.subject_index[subject_name],
+                                 problem.teacher_index.get(teacher_name, MISSING),
+                                 problem.room_index.get(room_number, MISSING)))
+
+        columns = cls.empty_columns(len(rows), problem)
+        if rows:
+            for name, values in zip(COLUMNS, zip(*rows)):
+                columns[name][:] = values
+        return cls.from_problem_columns(columns, problem)
+
+    @classmethod
+    def from_genomes(cls, genomes, encoding, problem):
+        # Пачка геномов ГА в режиме ProblemModel: (n, группы * дни * слоты), -1 - свободный слот
+        genomes = np.asarray(genomes).reshape(-1, problem.n_groups * N_DAYS * N_HOURS)
+        schedules, positions = np.nonzero(genomes >= 0)
+        values = genomes[schedules, positions]
+
+        columns = cls.empty_columns(len(values), problem)
+        columns["schedule"][:] = schedules
+        columns["group"][:] = positions // (N_DAYS * N_HOURS)
+        columns["day"][:] = positions // N_HOURS % N_DAYS
+        columns["slot"][:] = positions % N_HOURS
+        columns["subject"][:] = encoding.subject[values]
+        columns["teacher"][:] = encoding.teacher[values]
+        columns["room"][:] = encoding.classroom[values]
+        return cls.from_problem_columns(columns, problem)
+
+    # ----- Обратное преобразование -----
+
+    def select(self, index):
+        # Строки одного расписания из пачки
+        mask = self.columns["schedule"] == index
+        return ScheduleTable({name: values[mask] for name, values in self.columns.items()},
+                             self.group_names, self.subject_names, self.teacher_names, self.room_names)
+
+    def to_genomes(self, encoding, problem):
+        # Геномы ГА; номера таблицы должны совпадать с номерами problem.
+        # Занятия без преподавателя или кабинета в геноме не представимы и пропускаются
+        columns = self.columns
+        keep = (columns["teacher"] != MISSING) & (columns["room"] != MISSING)
+        genomes = np.full((max(self.n_schedules, 1), problem.n_groups * N_DAYS * N_HOURS), -1,
+                          dtype=encoding.index_dtype)
+
+        group, day, slot, teacher, subject, room = (columns[name][keep].astype(np.int64) for name in
+                                                    ("group", "day", "slot", "teacher", "subject", "room"))
+        genomes[columns["schedule"][keep], (group * N_DAYS + day) * N_HOURS + slot] = encoding.encode(
+            teacher, subject, room)
+        return genomes
+
+    def to_schedule(self, data, index=0):
+        # Восстанавливает Schedule по данным MainData, например для повторной проверки
+        from Schedule import Schedule
+
+        schedule = Schedule(data)
+        for group_name in data.groups:
+            schedule.init_group_schedule(group_name)
+        rooms = {room.number: room for room in data.rooms}
+
+        table = self.select(index)
+        for group, day, slot, subject, teacher, room in zip(*(table.columns[name].tolist() for name in COLUMNS[1:])):
+            group_name = self.group_names[group]
+            if group_name not in schedule.schedule:
+                schedule.init_group_schedule(group_name)
+            teacher_object = data.teachers.get(self.teacher_names[teacher]) if teacher != MISSING else None
+            room_object = rooms.get(self.room_names[room]) if room != MISSING else None
+            schedule.place_lesson(group_name, day, slot, self.subject_names[subject], teacher_object, room_object)
+        return schedule
+
+    # ----- Двоичные форматы -----
+
+    def dictionaries(self):
+        return {attr: getattr(self, attr) for attr in DICTIONARIES.values()}
+
+    def save_npz(self, path):
+        # Словари кладем в тот же архив как JSON-строку
+        np.savez(path, dictionaries=np.array(json.dumps(self.dictionaries(), ensure_ascii=False)), **self.columns)
+
+    @classmethod
+    def load_npz(cls, path):
+        with np.load(path) as archive:
+            dictionaries = json.loads(str(archive["dictionaries"]))
+            columns = {name: archive[name] for name in COLUMNS}
+        return cls(columns, **dictionaries)
+
+    def save_arrays(self, directory):
+        # Каталог с .npy на столбец и dictionaries.json; столбцы читаются через отображение в память
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, values in self.columns.items():
+            np.save(directory / f"{name}.npy", values)
+        with open(directory / "dictionaries.json", "w", encoding="utf-8") as file:
+            json.dump(self.dictionaries(), file, ensure_ascii=False)
+
+    @classmethod
+    def load_arrays(cls, directory, mmap_mode="r"):
+        directory = Path(directory)
+        with open(directory / "dictionaries.json", encoding="utf-8") as file:
+            dictionaries = json.load(file)
+        columns = {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in COLUMNS}
+        return cls(columns, **dictionaries)
+
+    # ----- Текстовые потоковые форматы -----
+
+    def iter_records(self):
+        # Строки таблицы с названиями вместо номеров
+        names = {column: getattr(self, attr) for column, attr in DICTIONARIES.items()}
+        for row in zip(*(self.columns[name].tolist() for name in COLUMNS)):
+            record = dict(zip(COLUMNS, row))
+            for column in ID_COLUMNS:
+                record[column] = names[column][record[column]] if record[column] != MISSING else None
+            yield record
+
+    def save_csv(self, path):
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=COLUMNS)
+            writer.writeheader()
+            for record in self.iter_records():
+                writer.writerow(record)
+
+    def save_jsonl(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            for record in self.iter_records():
+                file.write(json.dumps(record, ensure_ascii=False))
+                file.write("\n")
+
+    @classmethod
+    def from_records(cls, records, problem=None):
+        # Названия переводятся в номера problem; без problem словари собираются по порядку появления
+        # Поиск по строковому виду: в CSV номера кабинетов-чисел читаются строками
+        lookups = {}
+        for column, attr in DICTIONARIES.items():
+            names = list(getattr(problem, attr)) if problem is not None else []
+            lookups[column] = (names, {str(name): idx for idx, name in enumerate(names)})
+
+        def to_id(column, name):
+            if name is None or name == "":
+                return MISSING
+            names, index = lookups[column]
+            key = str(name)
+            if key not in index:
+                if problem is not None:
+                    raise KeyError(f"{column} {name!r} отсутствует в модели задачи")
+                index[key] = len(names)
+                names.append(name)
+            return index[key]
+
+        rows = [(int(record["schedule"]), to_id("group", record["group"]), int(record["day"]), int(record["slot"]),
+                 to_id("subject", record["subject"]), to_id("teacher", record["teacher"]),
+                 to_id("room", record["room"]))
+                for record in records]
+
+        columns = {name: np.array(values, dtype=np.int32) for name, values in zip(COLUMNS, zip(*rows))} if rows \
+            else {name: np.zeros(0, dtype=np.int32) for name in COLUMNS}
+        return cls(columns, *(lookups[column][0] for column in DICTIONARIES))
+
+    @classmethod
+    def load_csv(cls, path, problem=None):
+        # В CSV все значения - строки; номера кабинетов-чисел возвращаются к int, как в MainData
+        with open(path, encoding="utf-8", newline="") as file:
+            records = ({**record, "room": room_number(record["room"])} for record in csv.DictReader(file))
+            return cls.from_records(records, problem)
+
+    @classmethod
+    def load_jsonl(cls, path, problem=None):
+        with open(path, encoding="utf-8") as file:
+            return cls.from_records((json.loads(line) for line in file if line.strip()), problem)
+
+
+def room_number(value):
+    # Номер кабинета из CSV: целые числа - int (так их читает парсер книги), остальное - строкой
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value)
+    return value
+
+
+def save_table(table, path):
+    # Формат по расширению: .npz, .csv, .jsonl; иначе - каталог .npy
+    path = Path(path)
+    if path.suffix == ".npz":
+        table.save_npz(path)
+    elif path.suffix == ".csv":
+        table.save_csv(path)
+    elif path.suffix in (".jsonl", ".ndjson"):
+        table.save_jsonl(path)
+    else:
+        table.save_arrays(path)
+
+
+def load_table(path, problem=None):
+    path = Path(path)
+    if path.suffix == ".npz":
+        return ScheduleTable.load_npz(path)
+    if path.suffix == ".csv":
+        return ScheduleTable.load_csv(path, problem)
+    if path.suffix in (".jsonl", ".ndjson"):
+        return ScheduleTable.load_jsonl(path, problem)
+    return ScheduleTable.load_arrays(path)
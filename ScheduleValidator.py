@@ -0,0 +1,196 @@
+import numpy as np
+
+from ProblemModel import N_DAYS, N_HOURS
+from ScheduleTable import MISSING, ScheduleTable
+
+# Жесткие ограничения: расписание с любым из этих нарушений недопустимо
+HARD = ("group_clash", "teacher_clash", "room_clash",
+        "no_teacher", "teacher_not_eligible", "teacher_unavailable",
+        "no_room", "equipment", "day_banned", "time_banned",
+        "daily_hours", "weekly_hours", "difficult_hours", "curriculum_hours")
+# Мягкие ограничения: только ухудшают качество расписания
+SOFT = ("gaps",)
+
+DESCRIPTIONS = {
+    "group_clash": "у группы несколько занятий в одном слоте",
+    "teacher_clash": "преподаватель занят в нескольких группах одновременно",
+    "room_clash": "кабинет занят несколькими группами одновременно",
+    "no_teacher": "занятие без преподавателя",
+    "teacher_not_eligible": "преподаватель не ведет предмет у группы",
+    "teacher_unavailable": "преподаватель не работает в этот день",
+    "no_room": "занятие без кабинета",
+    "equipment": "в кабинете нет нужного оборудования",
+    "day_banned": "предмет запрещен в этот день",
+    "time_banned": "предмет запрещен в это время",
+    "daily_hours": "превышен дневной лимит часов",
+    "weekly_hours": "превышен недельный лимит часов",
+    "difficult_hours": "превышен дневной лимит сложных предметов",
+    "curriculum_hours": "число часов не совпадает с учебным планом",
+    "gaps": "окна между занятиями",
+}
+
+CELL_COLUMNS = ("schedule", "group", "day", "slot")
+
+
+class ValidationReport:
+    """
+    Результат проверки пачки расписаний (одно расписание - пачка из одного).
+
+    counts[name] - число нарушений ограничения name в каждом расписании
+    (массив длины n_schedules). Лишние бронирования, превышения лимитов и
+    отклонения от плана считаются в часах, окна - как в функции
+    приспособленности ГА (число блоков занятий дня минус один), остальное -
+    в занятиях.
+
+    cells[name] - ячейки-нарушители, массив (k, 4) со столбцами schedule,
+    group, day, slot: занятия-нарушители, все занятия дня (недели) с
+    превышенным лимитом, пустые слоты окон. Недостающие по плану часы
+    ячейки не имеют.
+    """
+
+    def __init__(self, table, counts, cells):
+        self.table = table
+        self.counts = counts
+        self.cells = cells
+
+    @property
+    def n_schedules(self):
+        return len(self.counts[HARD[0]])
+
+    def total(self, constraints=HARD):
+        # Сумма нарушений по расписаниям
+        return sum(self.counts[name] for name in constraints)
+
+    def valid(self):
+        # Маска допустимых расписаний (без жестких нарушений)
+        return self.total(HARD) == 0
+
+    def is_valid(self, index=0):
+        return bool(self.valid()[index])
+
+    def violations(self, index=0):
+        # Ненулевые счетчики одного расписания
+        return {name: int(self.counts[name][index]) for name in HARD + SOFT if self.counts[name][index]}
+
+    def offending(self, name, index=0):
+        # Ячейки-нарушители одного расписания с названиями групп
+        cells = self.cells[name]
+        for schedule, group, day, slot in cells[cells[:, 0] == index].tolist():
+            yield {"group": self.table.group_names[group], "day": day, "slot": slot if slot >= 0 else None}
+
+    def summary(self, index=0):
+        lines = []
+        for name, count in self.violations(index).items():
+            kind = "жесткое" if name in HARD else "мягкое"
+            lines.append(f"{DESCRIPTIONS[name]} ({kind}): {count}")
+        return "\n".join(lines) if lines else "Нарушений нет"
+
+
+def _cells_of_rows(columns, rows):
+    return np.stack([columns[name][rows].astype(np.int64) for name in CELL_COLUMNS], axis=1)
+
+
+def _no_cells():
+    return np.zeros((0, len(CELL_COLUMNS)), dtype=np.int64)
+
+
+def _clashes(schedule, resource, time, present, n_resources, n_schedules):
+    # Лишние бронирования ресурса на (расписание, ресурс, день-слот) и маска строк в таких слотах
+    keys = (schedule * n_resources + resource) * (N_DAYS * N_HOURS) + time
+    extra = np.zeros(n_schedules, dtype=np.int64)
+    rows = np.zeros(len(keys), dtype=bool)
+    if present.any():
+        unique, inverse, counts = np.unique(keys[present], return_inverse=True, return_counts=True)
+        np.add.at(extra, unique // (n_resources * N_DAYS * N_HOURS), counts - 1)
+        rows[present] = counts[inverse.ravel()] > 1
+    return extra, rows
+
+
+def _over_limit(counts, limit, keys):
+    # Превышение лимита по ячейкам counts и маска строк с ключами keys в превышенных ячейках
+    if limit is None:
+        return np.zeros(counts.shape[0], dtype=np.int64), np.zeros(len(keys), dtype=bool)
+    excess = np.maximum(counts - limit, 0)
+    return excess.reshape(counts.shape[0], -1).sum(axis=1), excess.ravel()[keys] > 0
+
+
+def validate(table, problem, n_schedules=None):
+    """
+    Проверяет все расписания таблицы ScheduleTable за один проход
+    операциями над массивами. Номера таблицы должны совпадать с номерами
+    problem (ProblemModel), лимиты берутся из него; лимит None не
+    проверяется. n_schedules задает размер пачки, если последние
+    расписания пусты.
+    """
+    columns = table.columns
+    n = max(table.n_schedules if n_schedules is None else n_schedules, 1)
+    n_groups, n_subjects = problem.n_groups, problem.n_subjects
+    schedule, group, day, slot, subject, teacher, room = (
+        columns[name].astype(np.int64) for name in ("schedule", "group", "day", "slot", "subject", "teacher", "room"))
+    time = day * N_HOURS + slot
+    every = np.ones(len(schedule), dtype=bool)
+    counts, cells = {}, {}
+
+    def record(name, per_schedule, rows):
+        counts[name] = per_schedule.astype(np.int64)
+        cells[name] = _cells_of_rows(columns, np.flatnonzero(rows))
+
+    def record_lessons(name, rows):
+        record(name, np.bincount(schedule[rows], minlength=n), rows)
+
+    # Накладки: группа, преподаватель и кабинет в одном слоте
+    record("group_clash", *_clashes(schedule, group, time, every, n_groups, n))
+    has_teacher, has_room = teacher != MISSING, room != MISSING
+    record("teacher_clash", *_clashes(schedule, teacher, time, has_teacher, problem.n_teachers, n))
+    record("room_clash", *_clashes(schedule, room, time, has_room, problem.n_rooms, n))
+
+    # Допустимость преподавателя и кабинета для занятия
+    safe_teacher, safe_room = np.where(has_teacher, teacher, 0), np.where(has_room, room, 0)
+    record_lessons("no_teacher", ~has_teacher)
+    record_lessons("teacher_not_eligible", has_teacher & ~problem.eligible[safe_teacher, group, subject])
+    record_lessons("teacher_unavailable", has_teacher & ~problem.teacher_days[safe_teacher, day])
+    record_lessons("no_room", ~has_room)
+    record_lessons("equipment", has_room & ~problem.room_ok[group, subject, safe_room])
+
+    # Запреты предмета по дням и времени
+    record_lessons("day_banned", ~problem.day_allowed[group, subject, day])
+    record_lessons("time_banned", ~problem.time_allowed[group, subject, slot])
+
+    # Лимиты часов: в день, в неделю и сложных предметов в день
+    group_day = (schedule * n_groups + group) * N_DAYS + day
+    daily = np.bincount(group_day, minlength=n * n_groups * N_DAYS).reshape(n, n_groups, N_DAYS)
+    record("daily_hours", *_over_limit(daily, problem.daily_hours_limit, group_day))
+    record("weekly_hours", *_over_limit(daily.sum(axis=2), problem.weekly_hours_limit, schedule * n_groups + group))
+    difficult = np.bincount(group_day, weights=problem.is_difficult[group, subject],
+                            minlength=n * n_groups * N_DAYS).astype(np.int64).reshape(n, n_groups, N_DAYS)
+    excess, rows = _over_limit(difficult, problem.daily_difficult_hours_limit, group_day)
+    record("difficult_hours", excess, rows & problem.is_difficult[group, subject])
+
+    # Учебный план: отклонение числа часов от требуемого в обе стороны
+    group_subject = (schedule * n_groups + group) * n_subjects + subject
+    hours = np.bincount(group_subject, minlength=n * n_groups * n_subjects).reshape(n, n_groups, n_subjects)
+    deviation = hours - problem.required_hours.astype(np.int64)
+    counts["curriculum_hours"] = np.abs(deviation).reshape(n, -1).sum(axis=1)
+    cells["curriculum_hours"] = _cells_of_rows(columns, np.flatnonzero(deviation.ravel()[group_subject] > 0))
+
+    # Окна: пустые слоты между первым и последним занятием дня
+    grid = np.zeros((n, n_groups, N_DAYS, N_HOURS), dtype=bool)
+    grid[schedule, group, day, slot] = True
+    runs = (grid & ~np.concatenate([np.zeros(grid.shape[:-1] + (1,), dtype=bool), grid[..., :-1]], axis=-1)).sum(-1)
+    counts["gaps"] = np.maximum(runs - 1, 0).reshape(n, -1).sum(axis=1)
+    before = np.cumsum(grid, axis=-1)
+    inside = ~grid & (before > 0) & (before < before[..., -1:])
+    cells["gaps"] = np.argwhere(inside) if inside.any() else _no_cells()
+
+    return ValidationReport(table, counts, cells)
+
+
+def validate_schedule(schedule):
+    # Проверка живого Schedule; модель и лимиты берутся из schedule.problem
+    return validate(ScheduleTable.from_schedule(schedule), schedule.problem)
+
+
+def validate_genomes(genomes, encoding, problem):
+    # Проверка пачки геномов ГА в режиме ProblemModel, например зала славы
+    genomes = np.asarray(genomes).reshape(-1, problem.n_groups * N_DAYS * N_HOURS)
+    return validate(ScheduleTable.from_genomes(genomes, encoding, problem), problem, len(genomes))
@@ -8,7 +8,8 @@ from ScheduleExporter import ScheduleExporter
 
 def main():
     data_path = Path().resolve() / "data" / "input_constraints.xlsx"
-    parser = ExcelParser(data_path)
+    # Разобранные данные кэшируются по хэшу книги; при изменении файла кэш пересобирается
+    parser = ExcelParser(data_path, cache_dir=data_path.parent / ".cache")
     parser.setup()
 
     schedule = Schedule(parser.data)
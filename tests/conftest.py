@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ExcelParser import ExcelParser  # noqa: E402
+from ProblemModel import ProblemModel  # noqa: E402
+
+WORKBOOK = os.path.join(ROOT, "data", "input_constraints.xlsx")
+
+
+@pytest.fixture
+def data():
+    # Свежие данные примера на каждый тест: генерация и перестройка их меняют
+    parser = ExcelParser(WORKBOOK)
+    parser.setup()
+    return parser.data
+
+
+@pytest.fixture
+def problem(data):
+    return ProblemModel.from_main_data(data)
@@ -0,0 +1,32 @@
+import numpy as np
+
+from Benchmark import compare, merge_repeats
+
+STAGES = {"generate": 0.05, "write_workbook": 0.12, "parse": 0.3, "schedule_constructive": 0.45, "ga": 0.65}
+
+
+def _sweep(rng, slowdown=1.0, repeats=5, sizes=(10, 50, 200, 1000)):
+    # run_sweep-like report: stages of 50-650 ms whose repeats jitter by 20-40%
+    results = []
+    for size in sizes:
+        runs = []
+        for _ in range(repeats):
+            jitter = rng.uniform(0.2, 0.4)
+            runs.append([{"n_groups": size, "stage": stage, "peak_rss_mb": 100.0, "evaluations": None,
+                          "penalty": None, "wall_time_s": seconds * slowdown * rng.uniform(1 - jitter, 1 + jitter)}
+                         for stage, seconds in STAGES.items()])
+        results.extend(merge_repeats(runs))
+    return {"meta": {}, "results": results}
+
+
+def test_same_configuration_passes_against_itself():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        assert compare(_sweep(rng), _sweep(rng)) == []
+
+
+def test_real_slowdown_is_reported():
+    rng = np.random.default_rng(0)
+    regressions = compare(_sweep(rng), _sweep(rng, slowdown=2.0))
+    assert {(entry["n_groups"], entry["stage"]) for entry in regressions} == {
+        (size, stage) for size in (10, 50, 200, 1000) for stage in STAGES}
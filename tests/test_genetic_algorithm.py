@@ -0,0 +1,49 @@
+import logging
+import random
+
+import numpy as np
+
+from GeneticAlgorithm import GeneticAlgorithm
+
+logging.getLogger("GeneticAlgorithm").setLevel(logging.WARNING)
+
+
+def _seed(seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def test_incremental_mode_stops_on_evaluation_budget(problem):
+    _seed()
+    ga = GeneticAlgorithm(problem=problem, population_size=20, num_generations=30,
+                          incremental=True, max_evaluations=100)
+    ga.run()
+
+    assert ga.stop_reason == "max_evaluations"
+    assert ga.generation < 30
+    assert ga.evaluations >= 100
+
+
+def test_incremental_mode_counts_delta_scored_offspring(problem):
+    _seed()
+    ga = GeneticAlgorithm(problem=problem, population_size=20, num_generations=3, incremental=True)
+    ga.run()
+
+    assert ga.evaluations > 20
+
+
+def test_resume_with_fitness_cache_keeps_evaluation_count(problem, tmp_path):
+    options = dict(problem=problem, population_size=20, mut_pb=0.1, crossover_prob=0.3, fitness_cache=1000)
+    _seed()
+    full = GeneticAlgorithm(num_generations=10, **options)
+    full.run()
+    assert full.fitness_cache.hits > 0
+
+    _seed()
+    checkpoint = tmp_path / "ga.npz"
+    GeneticAlgorithm(num_generations=5, checkpoint_path=checkpoint, **options).run()
+    resumed = GeneticAlgorithm(num_generations=10, **options)
+    resumed.run(resume_from=checkpoint)
+
+    assert resumed.evaluations == full.evaluations
+    assert resumed.best_fitness == full.best_fitness
@@ -0,0 +1,17 @@
+import random
+
+import pytest
+
+from Schedule import Schedule
+from ScheduleLog import NullSink
+
+
+def test_unknown_room_raises_key_error(data):
+    random.seed(0)
+    schedule = Schedule(data, NullSink())
+    schedule.generate_initial_schedule("constructive")
+
+    with pytest.raises(KeyError, match="не найден"):
+        schedule.reschedule(removed_rooms=["нет такого"])
+    with pytest.raises(KeyError):
+        schedule.reschedule({"Нет Такого": [0]})
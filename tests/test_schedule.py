@@ -0,0 +1,56 @@
+import random
+
+from Schedule import Schedule, slot_bit
+from ScheduleLog import NullSink
+
+
+def _masks_from_grid(schedule):
+    # Маски занятости, восстановленные по сетке расписания
+    groups, teachers, rooms = {}, {}, {}
+    for group_name, group_schedule in schedule.schedule.items():
+        for day, row in group_schedule.items():
+            for slot, subject_name in enumerate(row):
+                if subject_name is None:
+                    continue
+                bit = slot_bit(day, slot)
+                groups[group_name] = groups.get(group_name, 0) | bit
+                teacher_name = schedule.teacher_assignments[group_name][day][slot]
+                if teacher_name != "N/A":
+                    teachers[teacher_name] = teachers.get(teacher_name, 0) | bit
+                room_number = schedule.room_assignments[group_name][day][slot]
+                if room_number is not None:
+                    rooms[room_number] = rooms.get(room_number, 0) | bit
+    return groups, teachers, rooms
+
+
+def _nonzero(masks):
+    return {key: mask for key, mask in masks.items() if mask}
+
+
+def test_random_mode_masks_match_grid(data):
+    random.seed(0)
+    schedule = Schedule(data, NullSink())
+    schedule.generate_initial_schedule("random")
+
+    groups, teachers, rooms = _masks_from_grid(schedule)
+    assert _nonzero(schedule.group_busy) == groups
+    assert _nonzero(schedule.teacher_busy) == teachers
+    assert _nonzero(schedule.room_busy) == rooms
+    filled = sum(bin(mask).count("1") for mask in groups.values())
+    assert schedule.log.counters["placed"] == filled
+
+
+def test_place_lesson_over_occupied_cell_frees_old_resources(data):
+    schedule = Schedule(data, NullSink())
+    group = next(iter(data.groups.values()))
+    schedule.init_group_schedule(group.name)
+    first, second = list(data.teachers.values())[:2]
+    room = data.rooms[0]
+    subject_name = next(iter(group.subjects))
+
+    schedule.place_lesson(group.name, 0, 0, subject_name, first, room)
+    schedule.place_lesson(group.name, 0, 0, subject_name, second, None)
+
+    assert schedule.is_teacher_available(first, 0, 0)
+    assert schedule.is_room_free(room, 0, 0)
+    assert not schedule.is_teacher_available(second, 0, 0)